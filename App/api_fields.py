@@ -0,0 +1,137 @@
+"""
+Sparse fieldsets and relation expansion for the REST API.
+
+``?fields=id,slug,title`` keeps only the named fields of each object, and
+the view selects only the columns those fields read (the others are
+deferred).
+``?expand=author,reviews`` swaps a relation's compact form for its full
+serializer, loaded for the whole page with select_related or
+prefetch_related rather than a query per object.
+
+A serializer opts in with SparseFieldsMixin and describes, in its Meta:
+
+* ``field_loads``: for fields that are not just their own column, the
+  ``Load`` needed to render them (columns, joins, prefetches);
+* ``expandable``: an ``Expansion`` for each relation ?expand= accepts.
+
+Its view adds SparseQuerysetMixin, which narrows the queryset to match.
+Unknown names in either parameter are ignored.
+"""
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+class Load(namedtuple('Load', 'columns select prefetch')):
+    """Model columns, select_related paths and prefetch_related lookups a field reads."""
+    __slots__ = ()
+
+    def __new__(cls, columns=(), select=(), prefetch=()):
+        return super().__new__(cls, tuple(columns), tuple(select), tuple(prefetch))
+
+
+# ``serializer`` is a dotted path, resolved when used, so apps can expand into each other
+Expansion = namedtuple('Expansion', 'serializer load many', defaults=(Load(), False))
+
+
+def _names(request, param):
+    value = request.query_params.get(param) if request is not None else None
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def selection(request):
+    """(fields, expand) asked for: a set of field names or None for all, and a set of relations."""
+    return _names(request, FIELDS_PARAM), _names(request, EXPAND_PARAM) or set()
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin applying the request's ?fields= and ?expand=, when its
+    view is a SparseQuerysetMixin (other views don't load for them). Only
+    the top-level serializer (or the child of a top-level ``many=True``
+    list) does; nested and expanded serializers render in full.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not isinstance(self.context.get('view'), SparseQuerysetMixin):
+            return fields
+        if self.root is not self and self.root is not self.parent:
+            return fields
+        wanted, expand = selection(self.context.get('request'))
+        expandable = getattr(self.Meta, 'expandable', {})
+        for name in expand & expandable.keys():
+            expansion = expandable[name]
+            fields[name] = import_string(expansion.serializer)(many=expansion.many, read_only=True)
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted or name in expand}
+        return fields
+
+
+def sparse_queryset(queryset, serializer_class, request, keep=()):
+    """
+    ``queryset`` loading what ``serializer_class`` renders for ``request``:
+    the expanded relations added and, when ?fields= is given, only the
+    columns, joins and prefetches of the fields asked for (plus ``keep``,
+    e.g. the pagination ordering).
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    if meta is None or not issubclass(serializer_class, SparseFieldsMixin):
+        return queryset
+    wanted, expand = selection(request)
+    expandable = getattr(meta, 'expandable', {})
+    loads = [expandable[name].load for name in expand & expandable.keys()]
+    if wanted is None:
+        return _apply(queryset, loads)
+
+    field_loads = getattr(meta, 'field_loads', {})
+    columns = set(keep)
+    for name in set(meta.fields) & wanted - expand:
+        if name in field_loads:
+            loads.append(field_loads[name])
+        else:
+            columns.add(name)
+    for load in loads:
+        columns.update(load.columns)
+    # Defer the rest rather than .only() the wanted: .only() would also defer
+    # the columns of the select_related models
+    unused = [
+        field.name for field in queryset.model._meta.concrete_fields
+        if not field.primary_key and field.name not in columns
+    ]
+    return _apply(queryset.select_related(None).prefetch_related(None), loads).defer(*unused)
+
+
+def _apply(queryset, loads):
+    select = [path for load in loads for path in load.select]
+    prefetch = [lookup for load in loads for lookup in load.prefetch]
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SparseQuerysetMixin:
+    """
+    View mixin narrowing the queryset to the request's ?fields= and
+    ?expand= (for reads only), after the view's own filtering. Columns the
+    paginator orders by are kept.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        keep = ()
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        if get_ordering is not None:
+            keep = [field.lstrip('-') for field in get_ordering(self)]
+        return sparse_queryset(queryset, self.get_serializer_class(), self.request, keep)
@@ -0,0 +1,244 @@
+"""
+HTTP load scenarios for `manage.py benchmark_http`.
+
+Each virtual user is a thread with its own cookie jar that repeats one
+scenario against a running server until the time is up. Every request is
+recorded under an endpoint name with its status, latency and the query
+count the server reports in X-DB-Queries (see App.middleware), and the
+samples are summarized per endpoint as p50/p95/p99 latency, throughput and
+queries per request. Recipes, users and search terms are sampled from the
+local database, so run it against a server using the same data, e.g. one
+filled by `manage.py populate_db`.
+"""
+import http.cookiejar
+import math
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from App import synthetic
+from App.middleware import QUERY_COUNT_HEADER
+from recipeApp.models import Recipe, RecipeView
+from reviewApp.models import Review
+
+Sample = namedtuple('Sample', 'endpoint status seconds queries')
+Scenario = namedtuple('Scenario', 'login run')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Client:
+    """One virtual user: keeps cookies and records a Sample per request."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.samples = []
+        self.recording = True
+
+    def cookie(self, name):
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), None)
+
+    def request(self, endpoint, path, data=None):
+        body, headers = None, {}
+        if data is not None:
+            token = self.cookie('csrftoken') or ''
+            body = urllib.parse.urlencode({'csrfmiddlewaretoken': token, **data}).encode()
+            headers = {'X-CSRFToken': token, 'Referer': self.base_url + path}
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                status, queries = response.status, response.headers.get(QUERY_COUNT_HEADER)
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, queries = error.code, error.headers.get(QUERY_COUNT_HEADER)
+        except (urllib.error.URLError, OSError):
+            status, queries = 0, None
+        seconds = time.perf_counter() - started
+        if self.recording:
+            self.samples.append(Sample(endpoint, status, seconds, None if queries is None else int(queries)))
+        return status
+
+    def login(self, username, password):
+        recording, self.recording = self.recording, False
+        try:
+            self.request('login', reverse('login'))
+            self.request('login', reverse('login'), {'username': username, 'password': password})
+        finally:
+            self.recording = recording
+        if not self.cookie('sessionid'):
+            raise BenchmarkError(f'Could not log in as {username!r}; check --password')
+
+
+def sample_dataset(recipes=200, users=50):
+    """Popular recipe slugs, users to log in as and search terms from the local database."""
+    slugs = list(Recipe.objects.order_by('-view_count', '-pk').values_list('slug', flat=True)[:recipes])
+    usernames = list(
+        User.objects.filter(is_active=True, is_superuser=False, userprofile__isnull=False)
+        .order_by('pk').values_list('username', flat=True)[:users]
+    )
+    if not slugs:
+        raise BenchmarkError('There are no recipes to request; run `manage.py populate_db` first')
+    cuisines = [value for value, _ in Recipe.CUISINE_CHOICES]
+    return {
+        'slugs': slugs,
+        'usernames': usernames,
+        'terms': [word.lower() for word in synthetic.MAINS + synthetic.DISHES],
+        'cuisines': cuisines,
+        'counts': {
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'reviews': Review.objects.count(),
+            'views': RecipeView.objects.count(),
+        },
+    }
+
+
+def _popular(rng, items):
+    """Most requests go to the first (most viewed) items, as real traffic does."""
+    return items[min(int(len(items) * rng.random() ** 3), len(items) - 1)]
+
+
+def browse_anonymously(client, data, rng):
+    client.request('home', reverse('home'))
+    query = {'cuisine': rng.choice(data['cuisines'])} if rng.random() < 0.3 else {}
+    client.request('recipe_list', reverse('recipe_list') + '?' + urllib.parse.urlencode(query))
+    for _ in range(2):
+        client.request('recipe_detail', reverse('recipe_detail', args=[_popular(rng, data['slugs'])]))
+    client.request('api_recipe_list', reverse('api_recipe_list'))
+
+
+def browse_and_save(client, data, rng):
+    client.request('recipe_list', reverse('recipe_list'))
+    slug = _popular(rng, data['slugs'])
+    client.request('recipe_detail', reverse('recipe_detail', args=[slug]))
+    client.request('save_recipe', reverse('save_recipe', args=[slug]), {})
+    client.request('unsave_recipe', reverse('unsave_recipe', args=[slug]), {})
+
+
+def search_burst(client, data, rng):
+    # Search-as-you-type: one request per keystroke after the third
+    term = rng.choice(data['terms'])
+    for end in range(3, len(term) + 1):
+        query = urllib.parse.urlencode({'q': term[:end]})
+        client.request('api_recipe_search', f"{reverse('api_recipe_search')}?{query}")
+
+
+SCENARIOS = {
+    'anonymous': Scenario(login=False, run=browse_anonymously),
+    'browse-and-save': Scenario(login=True, run=browse_and_save),
+    'search-burst': Scenario(login=False, run=search_burst),
+}
+
+
+def run(base_url, scenarios, data, concurrency=8, duration=30, warmup=0, seed=0,
+        password=synthetic.DEFAULT_PASSWORD):
+    """
+    Drive ``concurrency`` virtual users, spread over ``scenarios``, for
+    ``warmup`` unrecorded seconds and then ``duration`` recorded ones.
+    Returns (samples, iterations per scenario, recorded seconds).
+    """
+    if any(SCENARIOS[name].login for name in scenarios) and not data['usernames']:
+        raise BenchmarkError('Logged-in scenarios need users with profiles; run `manage.py populate_db` first')
+    iterations = Counter()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    record_from = started + warmup
+    deadline = record_from + duration
+
+    def virtual_user(number):
+        name = scenarios[number % len(scenarios)]
+        scenario = SCENARIOS[name]
+        rng = random.Random(f'{seed}:{number}')
+        client = Client(base_url)
+        if scenario.login:
+            client.login(data['usernames'][number % len(data['usernames'])], password)
+        while time.perf_counter() < deadline:
+            client.recording = time.perf_counter() >= record_from
+            scenario.run(client, data, rng)
+            if client.recording:
+                with lock:
+                    iterations[name] += 1
+        return client.samples
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [sample for result in pool.map(virtual_user, range(concurrency)) for sample in result]
+    return samples, dict(iterations), max(time.perf_counter() - record_from, 1e-9)
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if not 200 <= sample.status < 400),
+        'throughput': round(len(samples) / seconds, 2),
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'max': latencies[-1] if latencies else None,
+        },
+        'queries': {
+            'mean': sum(queries) / len(queries) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def report(samples, iterations, seconds, meta):
+    """The JSON-ready result of a run: metadata, totals and a summary per endpoint."""
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+    return {
+        'meta': {**meta, 'commit': git_commit(), 'seconds': round(seconds, 2)},
+        'iterations': iterations,
+        'total': summarize(samples, seconds),
+        'endpoints': {name: summarize(group, seconds) for name, group in sorted(by_endpoint.items())},
+    }
+
+
+def compare(previous, current, key='p95'):
+    """Rows of (endpoint, previous, current, change in %) for one latency percentile."""
+    rows = []
+    for name, summary in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name, {}).get('latency_ms', {}).get(key)
+        after = summary['latency_ms'][key]
+        change = (after - before) / before * 100 if before and after is not None else None
+        rows.append((name, before, after, change))
+    return rows
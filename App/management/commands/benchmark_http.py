@@ -0,0 +1,96 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from App import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent scenarios against a running server and report p50/p95/p99 latency, '
+        'throughput and queries per request for each endpoint, written to JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to benchmark')
+        parser.add_argument(
+            '--scenario', action='append', choices=loadtest.SCENARIOS, dest='scenarios',
+            help='Scenario to run (repeatable; default: all of them, spread over the virtual users)',
+        )
+        parser.add_argument('--concurrency', type=int, default=8, help='Virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Recorded seconds')
+        parser.add_argument('--warmup', type=float, default=5, help='Seconds of unrecorded requests first')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default=loadtest.synthetic.DEFAULT_PASSWORD,
+                            help='Password of the users logged-in scenarios sign in as')
+        parser.add_argument('--output', help='JSON file to write (default: benchmark-<time>-<commit>.json)')
+        parser.add_argument('--compare', help='Earlier JSON result to compare p95 latencies against')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios'] or list(loadtest.SCENARIOS)
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as earlier:
+                    previous = json.load(earlier)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Cannot read {options["compare"]}: {error}')
+
+        try:
+            data = loadtest.sample_dataset()
+            self.stdout.write(
+                f'{options["url"]}: {", ".join(scenarios)} with {options["concurrency"]} virtual users '
+                f'for {options["duration"]:g}s after {options["warmup"]:g}s warm-up'
+            )
+            samples, iterations, seconds = loadtest.run(
+                options['url'], scenarios, data, concurrency=options['concurrency'],
+                duration=options['duration'], warmup=options['warmup'], seed=options['seed'],
+                password=options['password'],
+            )
+        except loadtest.BenchmarkError as error:
+            raise CommandError(error)
+        if not samples:
+            raise CommandError('No requests completed; is the server running?')
+
+        result = loadtest.report(samples, iterations, seconds, {
+            'url': options['url'],
+            'scenarios': scenarios,
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'dataset': data['counts'],
+        })
+        self.print_table(result)
+        if previous:
+            self.print_comparison(loadtest.compare(previous, result), previous['meta'].get('commit'))
+
+        output = options['output']
+        if not output:
+            output = f'benchmark-{time.strftime("%Y%m%d-%H%M%S")}-{result["meta"]["commit"] or "local"}.json'
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as out:
+            json.dump(result, out, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output}.'))
+
+    def print_table(self, result):
+        self.stdout.write(
+            f'{"endpoint":20} {"reqs":>7} {"err":>5} {"req/s":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8}'
+        )
+        rows = list(result['endpoints'].items()) + [('total', result['total'])]
+        for name, summary in rows:
+            latency, queries = summary['latency_ms'], summary['queries']['mean']
+            self.stdout.write(
+                f'{name:20} {summary["requests"]:7} {summary["errors"]:5} {summary["throughput"]:8.1f} '
+                f'{latency["p50"]:8.1f} {latency["p95"]:8.1f} {latency["p99"]:8.1f} '
+                f'{"-" if queries is None else f"{queries:.1f}":>8}'
+            )
+
+    def print_comparison(self, rows, commit):
+        self.stdout.write(f'p95 latency against {commit or "the earlier run"}:')
+        for name, before, after, change in rows:
+            if change is None:
+                self.stdout.write(f'  {name:20} {after:8.1f} ms (new)')
+            else:
+                self.stdout.write(f'  {name:20} {before:8.1f} -> {after:8.1f} ms ({change:+.0f}%)')
@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import RequestFactory
+
+from recipeApp.api import rows as recipe_rows
+from recipeApp.api.serializer import RecipeSerializer
+from recipeApp.models import Recipe
+from recipeApp.pagination import DEFAULT_ORDERING
+from reviewApp.api import rows as review_rows
+from reviewApp.api.serializer import ReviewSerializer, SavedRecipeSerializer
+from reviewApp.models import Review, SavedRecipe
+
+
+def _cases(size, request):
+    """Endpoint name: (DRF serializer path, .values() path), each building one page of ``size``."""
+    recipes = Recipe.objects.for_api().order_by(*DEFAULT_ORDERING)
+    recipe = Recipe.objects.order_by('-rating_count').first()
+    reviewer = User.objects.annotate(n=Count('review')).order_by('-n').first()
+    saver = User.objects.annotate(n=Count('saved_recipes')).order_by('-n').first()
+    if recipe is None or reviewer is None:
+        raise CommandError('No data to benchmark; run `manage.py populate_db` first')
+    recipe_reviews = Review.objects.filter(recipe=recipe)
+    user_reviews = Review.objects.filter(user=reviewer)
+    saved = SavedRecipe.objects.filter(user=saver)
+    context = {'request': request}
+    return {
+        'recipe_list': (
+            lambda: RecipeSerializer(recipes[:size], many=True, context=context).data,
+            lambda: recipe_rows.recipe_dicts(recipe_rows.recipe_values(recipes)[:size], request),
+        ),
+        'recipe_reviews': (
+            lambda: ReviewSerializer(recipe_reviews[:size], many=True).data,
+            lambda: review_rows.review_dicts(recipe_reviews[:size]),
+        ),
+        'user_reviews': (
+            lambda: ReviewSerializer(user_reviews[:size], many=True).data,
+            lambda: review_rows.review_dicts(user_reviews[:size]),
+        ),
+        'user_saved_recipes': (
+            lambda: SavedRecipeSerializer(saved.select_related('recipe')[:size], many=True, context=context).data,
+            lambda: review_rows.saved_recipe_dicts(saved[:size], request),
+        ),
+    }
+
+
+def _median_seconds(build, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time one page of each read-only list endpoint built by the DRF serializers and by the '
+        '.values() fast path (queries included), on the current database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Objects per page')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per path; the median is reported')
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Endpoint to time (repeatable; default: all of them)')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/')
+        cases = _cases(options['page_size'], request)
+        endpoints = options['endpoints'] or list(cases)
+        unknown = set(endpoints) - set(cases)
+        if unknown:
+            raise CommandError(f'Unknown endpoint(s): {", ".join(sorted(unknown))}; choose from {", ".join(cases)}')
+
+        self.stdout.write(f'{"endpoint":<20} {"rows":>5} {"serializer ms":>14} {"values() ms":>12} {"speedup":>8}')
+        for name in endpoints:
+            serializer, fast = cases[name]
+            count = len(fast())  # also warms up both paths
+            serializer()
+            slow_seconds = _median_seconds(serializer, options['repeat'])
+            fast_seconds = _median_seconds(fast, options['repeat'])
+            self.stdout.write(
+                f'{name:<20} {count:>5} {slow_seconds * 1000:>14.2f} {fast_seconds * 1000:>12.2f} '
+                f'{slow_seconds / fast_seconds:>7.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Median of {options["repeat"]} runs per path'))
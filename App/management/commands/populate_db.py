@@ -1,89 +1,64 @@
-from django.core.management.base import BaseCommand
-from faker import Faker
-from django.contrib.auth.models import User
-from userApp.models import UserProfile
-from recipeApp.models import Recipe
-from reviewApp.models import Review, SavedRecipe
-from random import choice, randint
+import time
+from datetime import datetime, time as day_start, timezone
 
-class Command(BaseCommand):
-    help = 'Populate the database with fake data'
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
 
-    def handle(self, *args, **kwargs):
-        fake = Faker()
+from App import synthetic
 
-        # Create fake users and user profiles
-        num_users = 10  # 10 users for testing
-        for _ in range(num_users):
-            user = User.objects.create_user(
-                username=fake.user_name(),
-                email=fake.email(),
-                password='Password@123',
-            )
 
-            # Create UserProfile for each user
-            UserProfile.objects.create(
-                user=user,
-                bio=fake.text(max_nb_chars=500),
-                favorite_cuisines=fake.word() + ',' + fake.word(),  # You can adjust this for more cuisines
-                profile_image=None,  # Set a path to a dummy image if you have one
-                created_at=fake.date_this_year(),
-                updated_at=fake.date_this_year()
-            )
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {num_users} users and profiles.'))
+class Command(BaseCommand):
+    help = (
+        'Fill the database with seeded synthetic users, recipes, reviews, saved recipes and views. '
+        'The same profile and seed always produce the same data.'
+    )
 
-        # Create fake recipes
-        num_recipes = 30  # Adjust this number as needed
-        for _ in range(num_recipes):
-            # Randomly pick an existing UserProfile (author)
-            author = choice(UserProfile.objects.all())
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=synthetic.PROFILES, default='small', help='Dataset size')
+        for kind in synthetic.KINDS:
+            parser.add_argument(f'--{kind}', type=int, help=f'Number of {kind} (overrides the profile)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skew', type=float, default=synthetic.RECIPE_SKEW,
+                            help='Zipf exponent of recipe popularity (higher: fewer recipes get more activity)')
+        parser.add_argument('--days', type=int, default=365, help='Days of history the rows are spread over')
+        parser.add_argument('--until', help='Date the history ends (default: today), fixed for repeatable data')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows generated and committed together')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating rows in parallel')
 
-            recipe = Recipe.objects.create(
-                author=author,
-                title=fake.sentence(nb_words=5),
-                slug=fake.slug(),
-                description=fake.text(),
-                ingredients=fake.text(),
-                instructions=fake.text(),
-                tags=choice([choice(Recipe.TAG_CHOICES)[0] for _ in range(6)]),  # Random tags
-                cuisine=choice([choice(Recipe.CUISINE_CHOICES)[0] for _ in range(15)]),  # Random cuisine
-                difficulty=choice([difficulty[0] for difficulty in Recipe.DIFFICULTY_CHOICES]),
-                prep_time=randint(10, 120),
-                created_at=fake.date_this_year(),
-                updated_at=fake.date_this_year()
+    def handle(self, *args, **options):
+        counts = dict(synthetic.PROFILES[options['profile']])
+        for kind in synthetic.KINDS:
+            if options[kind] is not None:
+                counts[kind] = options[kind]
+        until = None
+        if options['until']:
+            day = parse_date(options['until'])
+            if day is None:
+                raise CommandError(f'--until {options["until"]!r} is not a date (YYYY-MM-DD)')
+            until = datetime.combine(day, day_start.min, timezone.utc)
+        try:
+            plan = synthetic.plan_for(
+                counts, seed=options['seed'], chunk_size=options['chunk_size'], skew=options['skew'],
+                days=options['days'], until=until,
             )
+        except ValueError as error:
+            raise CommandError(error)
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {num_recipes} recipes.'))
-
-        # Create fake reviews for recipes
-        num_reviews = 50  # Adjust this number as needed
-        for _ in range(num_reviews):
-            recipe = choice(Recipe.objects.all())
-            user = choice(User.objects.all())
-
-            if not Review.objects.filter(user=user, recipe=recipe).exists():
-                Review.objects.create(
-                    recipe=recipe,
-                    user=user,
-                    rating=randint(1, 5),
-                    comment=fake.text(),
-                    created_at=fake.date_this_year()
-                )
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {num_reviews} reviews.'))
-
-        # Create fake saved recipes
-        num_saved_recipes = 40  # Adjust this number as needed
-        for _ in range(num_saved_recipes):
-            user = choice(User.objects.all())
-            recipe = choice(Recipe.objects.all())
+        self.stdout.write(', '.join(f'{counts[kind]:,} {kind}' for kind in synthetic.KINDS))
+        started = time.perf_counter()
 
-            if not SavedRecipe.objects.filter(user=user, recipe=recipe).exists():
-                    SavedRecipe.objects.create(
-                    user=user,
-                    recipe=recipe,
-                    saved_at=fake.date_this_year()
-                )
+        def report(kind, written):
+            rate = written / (time.perf_counter() - started)
+            self.stdout.write(f'  {kind}: {written:,} / {counts[kind]:,} ({rate:,.0f} rows/s)')
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {num_saved_recipes} saved recipes.'))
+        written = synthetic.populate(plan, workers=options['workers'], batch_size=options['batch_size'],
+                                     on_chunk=report)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {", ".join(f"{written[kind]:,} {kind}" for kind in synthetic.KINDS)} in {elapsed:.1f}s.'
+        ))
+        self.stdout.write(
+            f'Every user\'s password is {synthetic.DEFAULT_PASSWORD!r}. Run `manage.py rollup_views`, '
+            '`refresh_trending` and `rebuild_related` to build the derived tables.'
+        )
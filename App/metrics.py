@@ -0,0 +1,338 @@
+"""
+Request metrics in the Prometheus text format, for `/metrics`.
+
+App.middleware.MetricsMiddleware times every request and the database
+queries and template rendering inside it, then records them here per
+resolved URL name: request counts and histograms of latency, queries, DB
+time, template time and response size. Recording only touches an in-memory
+registry; every METRICS_FLUSH_INTERVAL seconds the process writes its
+totals to its own file in METRICS_DIR, and `/metrics` adds up the files of
+every worker process. Totals are cumulative: a scrape folds the files of
+exited workers into one file of their totals, so the directory holds one
+file per live worker plus that one. Empty the directory when deploying.
+"""
+import atexit
+import contextvars
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' files are not folded
+    fcntl = None
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+PREFIX = 'enibla_'
+EXITED_FILE = 'exited.json'  # totals of worker processes that have exited
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by view, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling a request.', LATENCY_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Database queries made by a request.', QUERY_BUCKETS),
+    'db_duration_seconds': ('histogram', 'Time a request spent in database queries.', LATENCY_BUCKETS),
+    'template_render_seconds': ('histogram', 'Time a request spent rendering templates.', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Size of non-streaming response bodies.', SIZE_BUCKETS),
+}
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def allowed(request):
+    """May ``request`` read /metrics: staff users, or a scraper sending METRICS_TOKEN as a bearer token."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_dir():
+    return str(getattr(settings, 'METRICS_DIR', os.path.join(settings.BASE_DIR, 'var', 'metrics')))
+
+
+def flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+
+
+class RequestStats:
+    """Timings gathered while one request is handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_time * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+
+
+# Stats of the request being handled in this thread or task
+current = contextvars.ContextVar('request_stats', default=None)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, adding render time to the current request's stats."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = current.get()
+        if stats is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+def _write(path, data):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as out:
+        json.dump(data, out)
+    os.replace(temporary, path)
+
+
+class Registry:
+    """This process's metric totals, written to its own file in METRICS_DIR."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._path = None
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # A forked worker starts with a copy of its parent's totals; drop them
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._check_fork()
+            self._counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            self._check_fork()
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[name, labels] = [0] * (len(buckets) + 1) + [0.0]
+            # Per-bucket counts (the last one is +Inf) followed by the sum
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, dict(labels), list(values)] for (name, labels), values in self._histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Write the totals if the flush interval has passed (or ``force``)."""
+        if not force and time.monotonic() - self._last_flush < flush_interval():
+            return
+        # One thread writes; the others carry on rather than wait
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            data = self.snapshot()
+            if not data['counters'] and not data['histograms']:
+                return
+            directory = metrics_dir()
+            os.makedirs(directory, exist_ok=True)
+            if self._path is None or os.path.dirname(self._path) != directory:
+                self._path = os.path.join(directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+            _write(self._path, data)
+        finally:
+            self._flush_lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+registry = Registry()
+
+
+def record(view, method, status, seconds, stats, size=None):
+    registry.inc('http_requests_total', (('view', view), ('method', method), ('status', str(status))))
+    labels = (('view', view),)
+    registry.observe('http_request_duration_seconds', labels, seconds)
+    registry.observe('db_queries_per_request', labels, stats.queries)
+    registry.observe('db_duration_seconds', labels, stats.db_time)
+    registry.observe('template_render_seconds', labels, stats.template_time)
+    if size is not None:
+        registry.observe('http_response_size_bytes', labels, size)
+    registry.flush()
+
+
+def _add(path, counters, histograms):
+    """Add the totals in the file at ``path`` to ``counters`` and ``histograms``; False if unreadable."""
+    try:
+        with open(path) as source:
+            data = json.load(source)
+    except (OSError, ValueError):
+        return False
+    for metric, labels, value in data.get('counters', []):
+        counters[metric, tuple(labels.items())] += value
+    for metric, labels, values in data.get('histograms', []):
+        if metric not in METRICS or len(values) != len(METRICS[metric][2]) + 2:
+            continue  # written with different buckets
+        key = (metric, tuple(labels.items()))
+        total = histograms.setdefault(key, [0] * len(values))
+        histograms[key] = [a + b for a, b in zip(total, values)]
+    return True
+
+
+def _exited(name):
+    """Is the process that wrote the file ``name`` (``<pid>-<id>.json``) gone?"""
+    pid = name.split('-', 1)[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+@contextmanager
+def _locked(directory):
+    """Hold METRICS_DIR's lock file, so only one scrape at a time reads or folds the files."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _fold_exited(directory, names):
+    """Add the files of exited processes to EXITED_FILE and delete them; the names left to read."""
+    exited = [name for name in names if _exited(name)] if fcntl else []
+    if not exited:
+        return names
+    path = os.path.join(directory, EXITED_FILE)
+    counters, histograms = defaultdict(float), {}
+    _add(path, counters, histograms)
+    for name in exited:
+        _add(os.path.join(directory, name), counters, histograms)
+    _write(path, {
+        'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, dict(labels), values] for (name, labels), values in histograms.items()],
+    })
+    for name in exited:
+        os.remove(os.path.join(directory, name))
+    return [name for name in names if name not in exited and name != EXITED_FILE] + [EXITED_FILE]
+
+
+def collect():
+    """Totals of every process that wrote to METRICS_DIR, this one included."""
+    registry.flush(force=True)
+    counters, histograms = defaultdict(float), {}
+    directory = metrics_dir()
+    if not os.path.isdir(directory):
+        return counters, histograms
+    with _locked(directory):
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+        for name in _fold_exited(directory, names):
+            _add(os.path.join(directory, name), counters, histograms)
+    return counters, histograms
+
+
+def _labels(pairs):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render(counters, histograms):
+    """The Prometheus text exposition (format 0.0.4) of collected totals."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {PREFIX}{name} {help_text}', f'# TYPE {PREFIX}{name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{PREFIX}{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f'{PREFIX}{name}_bucket{_labels((*labels, ("le", le)))} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {_number(values[-1])}')
+            lines.append(f'{PREFIX}{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _flush_on_exit():
+    try:
+        registry.flush(force=True)
+    except OSError:
+        pass
+
+
+atexit.register(_flush_on_exit)
@@ -0,0 +1,48 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from App import metrics
+
+QUERY_COUNT_HEADER = 'X-DB-Queries'
+
+
+class MetricsMiddleware:
+    """
+    Time each request, and the database queries and template rendering in
+    it, and record them in App.metrics under the resolved URL name. Adds a
+    Server-Timing header (METRICS_SERVER_TIMING) and, for
+    `manage.py benchmark_http`, an X-DB-Queries header (QUERY_COUNT_HEADER);
+    both settings are on by default only when DEBUG is. Queries a
+    streaming response makes while it is being sent are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.time_query))
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        seconds = time.perf_counter() - started
+
+        if getattr(settings, 'QUERY_COUNT_HEADER', settings.DEBUG):
+            response[QUERY_COUNT_HEADER] = str(stats.queries)
+        if getattr(settings, 'METRICS_SERVER_TIMING', settings.DEBUG):
+            response['Server-Timing'] = stats.server_timing(seconds)
+        if metrics.enabled():
+            match = request.resolver_match
+            metrics.record(
+                match.view_name if match else 'unresolved', request.method, response.status_code, seconds, stats,
+                size=None if response.streaming else len(response.content),
+            )
+        return response
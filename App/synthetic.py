@@ -0,0 +1,431 @@
+"""
+Seeded synthetic data for `manage.py populate_db`.
+
+Every row is derived from the seed and its own position, never from what is
+already in the database, so a given profile and seed produce the same users,
+recipes, reviews, saved recipes and views on every run and with any number of
+worker processes. Popularity is Zipf-distributed: a few recipes collect most
+of the reviews, saves and views, and a few users write most of the recipes
+and reviews. Rows are generated in fixed-size chunks, optionally in worker
+processes, and written here in chunk order with bulk_create. bulk_create
+fires no signals, so ratings, view counts, the search index and the facet
+cache are brought up to date once at the end.
+"""
+import bisect
+import functools
+import itertools
+import math
+import random
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipeApp import facets, search
+from recipeApp.models import Recipe, RecipeTag, RecipeView, Tag, base_slug
+from reviewApp.models import Review, SavedRecipe
+from reviewApp.ratings import recompute_ratings
+from userApp.models import UserProfile
+
+KINDS = ('users', 'recipes', 'reviews', 'saved', 'views')
+
+PROFILES = {
+    'small': {'users': 100, 'recipes': 500, 'reviews': 2_000, 'saved': 1_000, 'views': 10_000},
+    'medium': {'users': 10_000, 'recipes': 50_000, 'reviews': 250_000, 'saved': 100_000, 'views': 1_000_000},
+    'prod-like': {
+        'users': 200_000, 'recipes': 1_000_000, 'reviews': 5_000_000, 'saved': 3_000_000, 'views': 20_000_000,
+    },
+}
+
+DEFAULT_PASSWORD = 'Password@123'
+# Zipf exponent of recipe popularity; user activity is flatter so the busiest
+# user does not review a sizeable share of the catalogue
+RECIPE_SKEW = 1.1
+USER_SKEW = 0.8
+# Share of views made by signed-out visitors
+ANONYMOUS_VIEWS = 0.6
+
+FIRST_NAMES = (
+    'Abebe', 'Almaz', 'Bethlehem', 'Dawit', 'Eden', 'Fikir', 'Hana', 'Kebede', 'Lidya', 'Meron', 'Nahom',
+    'Rahel', 'Selam', 'Tigist', 'Yonas', 'Amina', 'Carlos', 'Chen', 'Emma', 'Giulia', 'Hiro', 'Lucas',
+    'Maya', 'Noah', 'Priya', 'Sofia', 'Tariq', 'Yuki', 'Zara', 'Omar',
+)
+LAST_NAMES = (
+    'Alemu', 'Bekele', 'Desta', 'Gebre', 'Haile', 'Kassa', 'Mekonnen', 'Tesfaye', 'Wolde', 'Yilma', 'Garcia',
+    'Kim', 'Rossi', 'Sato', 'Silva', 'Smith', 'Patel', 'Nguyen', 'Dubois', 'Okafor',
+)
+ADJECTIVES = (
+    'Spicy', 'Smoky', 'Creamy', 'Crispy', 'Quick', 'Hearty', 'Tangy', 'Golden', 'Slow-Cooked', 'Roasted',
+    'Grilled', 'Herbed', 'Lemony', 'Garlicky', 'Sweet', 'Rustic', 'Classic', 'Fiery', 'Fresh', 'Braised',
+)
+MAINS = (
+    'Lentil', 'Chickpea', 'Chicken', 'Beef', 'Lamb', 'Mushroom', 'Spinach', 'Cabbage', 'Potato', 'Tomato',
+    'Eggplant', 'Pumpkin', 'Salmon', 'Shrimp', 'Tofu', 'Bean', 'Teff', 'Barley', 'Coconut', 'Pepper',
+    'Carrot', 'Cauliflower', 'Pork', 'Rice', 'Noodle', 'Corn', 'Okra', 'Mango', 'Apple', 'Chocolate',
+)
+DISHES = (
+    'Stew', 'Wat', 'Curry', 'Soup', 'Salad', 'Tacos', 'Pasta', 'Risotto', 'Bowl', 'Flatbread', 'Pie',
+    'Skillet', 'Bake', 'Fritters', 'Stir-Fry', 'Tibs', 'Dumplings', 'Porridge', 'Cake', 'Sandwich',
+)
+INGREDIENTS = (
+    'onion', 'garlic', 'ginger', 'berbere', 'niter kibbeh', 'olive oil', 'butter', 'salt', 'black pepper',
+    'cumin', 'turmeric', 'paprika', 'chili flakes', 'tomato paste', 'lemon juice', 'cilantro', 'parsley',
+    'rosemary', 'thyme', 'stock', 'rice', 'flour', 'eggs', 'milk', 'yogurt', 'sugar', 'honey', 'vinegar',
+)
+STEPS = (
+    'Chop the {0} and set it aside.', 'Warm the {0} in a heavy pot over medium heat.',
+    'Add the {0} and stir for two minutes.', 'Simmer gently until the {0} is tender.',
+    'Season with {0} to taste.', 'Fold in the {0} off the heat.', 'Roast the {0} until golden.',
+    'Whisk the {0} until smooth.', 'Rest for ten minutes, then serve with {0}.',
+)
+REVIEW_COMMENTS = (
+    'Made this twice already.', 'Too salty for me.', 'Family favourite now!', 'Needed more spice.',
+    'Easy and quick.', 'Great for meal prep.', 'The timings were off.', 'Perfect on a cold evening.',
+    'Would make again.', 'Not my thing.',
+)
+# Ratings lean positive, as they do in practice
+RATING_WEIGHTS = (5, 7, 15, 33, 40)
+DIFFICULTIES = [value for value, _ in Recipe.DIFFICULTY_CHOICES]
+CUISINES = [value for value, _ in Recipe.CUISINE_CHOICES]
+TAGS = [value for value, _ in Recipe.TAG_CHOICES]
+
+
+def plan_for(counts, seed=0, chunk_size=5000, skew=RECIPE_SKEW, days=365, until=None):
+    """
+    Everything a chunk generator needs, as plain picklable values. New rows
+    get explicit primary keys after the current largest ones, so generators
+    can refer to users and recipes without reading them back.
+    """
+    if until is None:
+        until = datetime.combine(datetime.now(dt_timezone.utc).date(), time.min, dt_timezone.utc)
+    if (counts['reviews'] or counts['saved'] or counts['views']) and not (counts['users'] and counts['recipes']):
+        raise ValueError('Reviews, saved recipes and views need users and recipes to be generated too.')
+    if counts['recipes'] and not counts['users']:
+        raise ValueError('Recipes need users to be generated too.')
+
+    def start(model):
+        return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    return {
+        'seed': seed,
+        'counts': dict(counts),
+        'chunk_size': chunk_size,
+        'skew': skew,
+        'user_start': start(User),
+        'profile_start': start(UserProfile),
+        'recipe_start': start(Recipe),
+        'until': until,
+        'span': timedelta(days=days),
+    }
+
+
+def chunk_count(plan, kind):
+    total = plan['counts'][kind]
+    chunks = math.ceil(total / plan['chunk_size'])
+    if kind in ('reviews', 'saved'):
+        # Chunks own disjoint slices of users, so (user, recipe) pairs never clash across chunks
+        chunks = min(chunks, plan['counts']['users'])
+    return chunks
+
+
+def _rng(plan, kind, chunk):
+    return random.Random(f'{plan["seed"]}:{kind}:{chunk}')
+
+
+def _stride(n):
+    """A step coprime with ``n``, so i -> i * step % n shuffles 0..n-1 without a table."""
+    step = int(n * 0.6180339887) | 1
+    while math.gcd(step, n) != 1:
+        step += 2
+    return step
+
+
+@functools.lru_cache(maxsize=4)
+def _popularity(n, skew):
+    """Cumulative Zipf weights over 0..n-1, with the most popular items at scattered positions."""
+    step = _stride(n)
+    weights = array('d', bytes(8 * n))
+    for rank in range(n):
+        weights[rank * step % n] = 1.0 / (rank + 1) ** skew
+    return array('d', itertools.accumulate(weights))
+
+
+def _pick(rng, cumulative, lo=0, hi=None):
+    """A Zipf-weighted index in [lo, hi)."""
+    hi = len(cumulative) if hi is None else hi
+    base = cumulative[lo - 1] if lo else 0.0
+    target = base + rng.random() * (cumulative[hi - 1] - base)
+    return min(bisect.bisect_right(cumulative, target, lo, hi), hi - 1)
+
+
+def _slice(total, chunks, chunk):
+    return total * chunk // chunks, total * (chunk + 1) // chunks
+
+
+def _created(plan, kind, index):
+    """Users and recipes are spread evenly over the time span, oldest first."""
+    return plan['until'] - plan['span'] + plan['span'] * ((index + 0.5) / plan['counts'][kind])
+
+
+def _after(plan, rng, *moments, recent=1):
+    """A moment between the latest of ``moments`` and the end of the span; ``recent`` > 1 favours the end."""
+    start = max(moments)
+    return plan['until'] - (plan['until'] - start) * rng.random() ** recent
+
+
+def generate_users(plan, chunk):
+    rng = _rng(plan, 'users', chunk)
+    lo, hi = _slice(plan['counts']['users'], chunk_count(plan, 'users'), chunk)
+    rows = []
+    for index in range(lo, hi):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{first}.{last}{plan["user_start"] + index}'.lower()
+        cuisines = ','.join(rng.sample(CUISINES, rng.randint(1, 3)))
+        bio = f'Home cook from {rng.choice(CUISINES)} kitchens. Loves {rng.choice(MAINS).lower()} dishes.'
+        rows.append((index, username, first, last, bio, cuisines, _created(plan, 'users', index)))
+    return rows
+
+
+def generate_recipes(plan, chunk):
+    rng = _rng(plan, 'recipes', chunk)
+    users = _popularity(plan['counts']['users'], USER_SKEW)
+    lo, hi = _slice(plan['counts']['recipes'], chunk_count(plan, 'recipes'), chunk)
+    rows = []
+    for index in range(lo, hi):
+        main = rng.choice(MAINS)
+        title = f'{rng.choice(ADJECTIVES)} {main} {rng.choice(DISHES)}'
+        ingredients = [main.lower(), *rng.sample(INGREDIENTS, rng.randint(3, 9))]
+        steps = [rng.choice(STEPS).format(rng.choice(ingredients)) for _ in range(rng.randint(3, 7))]
+        rows.append((
+            index,
+            _pick(rng, users),
+            title,
+            f'A {title.lower()} with {", ".join(ingredients[1:3])}.',
+            '\n'.join(f'{rng.randint(1, 4)} {unit} {name}' for unit, name in zip(
+                itertools.cycle(('cups', 'tbsp', 'tsp', 'pieces')), ingredients)),
+            '\n'.join(f'{number}. {step}' for number, step in enumerate(steps, 1)),
+            rng.choice(CUISINES),
+            rng.choice(DIFFICULTIES),
+            rng.randrange(10, 181, 5),
+            rng.sample(TAGS, rng.randint(1, 2)),
+            _created(plan, 'recipes', index),
+        ))
+    return rows
+
+
+def _pairs(plan, kind, chunk):
+    """
+    Yield (rng, user index, recipe index) for distinct pairs. The chunk's
+    share of rows follows the Zipf weight of its slice of users.
+    """
+    rng = _rng(plan, kind, chunk)
+    total = plan['counts'][kind]
+    users = _popularity(plan['counts']['users'], USER_SKEW)
+    recipes = _popularity(plan['counts']['recipes'], plan['skew'])
+    lo, hi = _slice(plan['counts']['users'], chunk_count(plan, kind), chunk)
+
+    def share(end):
+        return round(total * (users[end - 1] if end else 0.0) / users[-1])
+
+    quota = share(hi) - share(lo)
+    seen = set()
+    # A busy user can run out of recipes; give up rather than loop forever
+    for _ in range(quota * 4):
+        if len(seen) >= quota:
+            break
+        pair = (_pick(rng, users, lo, hi), _pick(rng, recipes))
+        if pair not in seen:
+            seen.add(pair)
+            yield rng, *pair
+
+
+def generate_reviews(plan, chunk):
+    rows = []
+    for rng, user, recipe in _pairs(plan, 'reviews', chunk):
+        created = _after(plan, rng, _created(plan, 'users', user), _created(plan, 'recipes', recipe))
+        rating = rng.choices(range(1, 6), RATING_WEIGHTS)[0]
+        rows.append((user, recipe, rating, rng.choice(REVIEW_COMMENTS), created))
+    return rows
+
+
+def generate_saved(plan, chunk):
+    return [
+        (user, recipe, _after(plan, rng, _created(plan, 'users', user), _created(plan, 'recipes', recipe)))
+        for rng, user, recipe in _pairs(plan, 'saved', chunk)
+    ]
+
+
+def generate_views(plan, chunk):
+    rng = _rng(plan, 'views', chunk)
+    users = _popularity(plan['counts']['users'], USER_SKEW)
+    recipes = _popularity(plan['counts']['recipes'], plan['skew'])
+    lo, hi = _slice(plan['counts']['views'], chunk_count(plan, 'views'), chunk)
+    rows = []
+    for _ in range(lo, hi):
+        recipe = _pick(rng, recipes)
+        user = None if rng.random() < ANONYMOUS_VIEWS else _pick(rng, users)
+        # Views cluster towards the present, as trending expects
+        rows.append((recipe, user, _after(plan, rng, _created(plan, 'recipes', recipe), recent=3)))
+    return rows
+
+
+GENERATORS = {
+    'users': generate_users,
+    'recipes': generate_recipes,
+    'reviews': generate_reviews,
+    'saved': generate_saved,
+    'views': generate_views,
+}
+
+
+# Held while a model's auto_now_add is switched off, so two writers in one
+# process can't restore each other's field mid-insert. Other code saving the
+# model meanwhile would get no date at all: only populate_db, which runs on
+# its own, uses this.
+_AUTO_NOW_LOCK = threading.Lock()
+
+
+@contextmanager
+def _explicit_dates(model, field):
+    """Let instances of ``model`` be saved with their own ``field`` instead of the auto_now_add stamp."""
+    date_field = model._meta.get_field(field)
+    with _AUTO_NOW_LOCK:
+        date_field.auto_now_add = False
+        try:
+            yield
+        finally:
+            date_field.auto_now_add = True
+
+
+def _bulk_create_dated(model, objects, field, batch_size):
+    """bulk_create ``objects`` keeping their generated ``field`` dates."""
+    with _explicit_dates(model, field):
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+class Writer:
+    """Turns generated rows into model instances and bulk-creates them."""
+
+    def __init__(self, plan, batch_size=1000):
+        self.plan = plan
+        self.batch_size = batch_size
+        self.password = make_password(DEFAULT_PASSWORD)
+        Tag.objects.bulk_create([Tag(name=name) for name in TAGS], ignore_conflicts=True)
+        self.tag_ids = dict(Tag.objects.filter(name__in=TAGS).values_list('name', 'pk'))
+
+    def user_id(self, index):
+        return None if index is None else self.plan['user_start'] + index
+
+    def recipe_id(self, index):
+        return self.plan['recipe_start'] + index
+
+    def write(self, kind, rows):
+        with transaction.atomic():
+            getattr(self, f'write_{kind}')(rows)
+        return len(rows)
+
+    def write_users(self, rows):
+        User.objects.bulk_create([
+            User(
+                pk=self.user_id(index), username=username, first_name=first, last_name=last,
+                email=f'{username}@example.com', password=self.password, date_joined=joined,
+            )
+            for index, username, first, last, _, _, joined in rows
+        ], batch_size=self.batch_size)
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                pk=self.plan['profile_start'] + index, user_id=self.user_id(index), username=username,
+                bio=bio, favorite_cuisines=cuisines, created_at=joined, updated_at=joined,
+            )
+            for index, username, _, _, bio, cuisines, joined in rows
+        ], batch_size=self.batch_size)
+
+    def write_recipes(self, rows):
+        recipes, links = [], []
+        for (index, author, title, description, ingredients, instructions,
+             cuisine, difficulty, prep_time, tags, created) in rows:
+            pk = self.recipe_id(index)
+            recipes.append(Recipe(
+                pk=pk, author_id=self.plan['profile_start'] + author, title=title,
+                slug=f'{base_slug(title)}-{pk}', description=description, ingredients=ingredients,
+                instructions=instructions, cuisine=cuisine, difficulty=difficulty, prep_time=prep_time,
+                created_at=created, updated_at=created,
+            ))
+            links.extend(RecipeTag(recipe_id=pk, tag_id=self.tag_ids[name]) for name in tags)
+        Recipe.objects.bulk_create(recipes, batch_size=self.batch_size)
+        RecipeTag.objects.bulk_create(links, batch_size=self.batch_size)
+
+    def write_reviews(self, rows):
+        _bulk_create_dated(Review, [
+            Review(
+                user_id=self.user_id(user), recipe_id=self.recipe_id(recipe),
+                rating=rating, comment=comment, created_at=created,
+            )
+            for user, recipe, rating, comment, created in rows
+        ], 'created_at', self.batch_size)
+
+    def write_saved(self, rows):
+        _bulk_create_dated(SavedRecipe, [
+            SavedRecipe(user_id=self.user_id(user), recipe_id=self.recipe_id(recipe), saved_at=saved)
+            for user, recipe, saved in rows
+        ], 'saved_at', self.batch_size)
+
+    def write_views(self, rows):
+        RecipeView.objects.bulk_create([
+            RecipeView(recipe_id=self.recipe_id(recipe), user_id=self.user_id(user), viewed_at=viewed)
+            for recipe, user, viewed in rows
+        ], batch_size=self.batch_size)
+
+
+def _chunks(plan, kind, workers):
+    """Generated chunks of ``kind`` in order, at most a few chunks ahead of the writer."""
+    generator = GENERATORS[kind]
+    chunks = range(chunk_count(plan, kind))
+    if workers <= 1:
+        for chunk in chunks:
+            yield generator(plan, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(generator, plan, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def refresh_aggregates(plan):
+    """Bring the denormalized data bulk_create skipped up to date for the new recipes."""
+    recipes = Recipe.objects.filter(pk__gte=plan['recipe_start'])
+    recompute_ratings(recipes)
+    views = RecipeView.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    recipes.update(view_count=Coalesce(Subquery(views.annotate(total=Count('id')).values('total')), 0))
+    search.rebuild_index()
+    facets.invalidate()
+
+
+def populate(plan, workers=1, batch_size=1000, on_chunk=None):
+    """
+    Generate and write everything in ``plan``. ``on_chunk(kind, written)``
+    is called after each chunk is committed. Returns rows written per kind.
+    """
+    writer = Writer(plan, batch_size)
+    written = dict.fromkeys(KINDS, 0)
+    for kind in KINDS:
+        for rows in _chunks(plan, kind, workers):
+            written[kind] += writer.write(kind, rows)
+            if on_chunk:
+                on_chunk(kind, written[kind])
+    if plan['counts']['recipes']:
+        refresh_aggregates(plan)
+    return written
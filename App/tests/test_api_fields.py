@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipeApp.models import Recipe
+from reviewApp.models import Review, SavedRecipe
+from userApp.models import UserProfile
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.chef = User.objects.create_user(username='chef', password='pass', first_name='Almaz')
+        self.profile = UserProfile.objects.create(user=self.chef, bio='Cooks shiro')
+        self.recipes = []
+        for i in range(3):
+            self.add_recipe(i)
+
+    def add_recipe(self, i):
+        recipe = Recipe.objects.create(
+            author=self.profile, title=f'Shiro {i}', description='d', ingredients='chickpea flour',
+            instructions='simmer', tags='dinner',
+        )
+        critic = User.objects.create(username=f'critic{len(self.recipes)}')
+        Review.objects.create(recipe=recipe, user=critic, rating=4, comment='good')
+        SavedRecipe.objects.create(user=self.chef, recipe=recipe)
+        self.recipes.append(recipe)
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json(), captured
+
+    def test_fields_narrow_the_payload_and_the_select(self):
+        for name in ('api_recipe_list', 'recipe-list'):
+            data, captured = self.get(reverse(name) + '?fields=id,slug,title,rating_avg')
+            with self.subTest(endpoint=name):
+                self.assertEqual(set(data['results'][0]), {'id', 'slug', 'title', 'rating_avg'})
+                sql = ' '.join(query['sql'] for query in captured)
+                self.assertNotIn('"ingredients"', sql)
+                self.assertNotIn('"instructions"', sql)
+                self.assertNotIn('SELECT "recipeApp_recipetag"', sql)  # no tag prefetch
+
+    def test_narrowed_fields_do_not_query_per_row(self):
+        url = reverse('api_recipe_list') + '?fields=id,title,author,tags,image_variants&expand=reviews'
+        _, three = self.get(url)
+        for i in range(3, 10):
+            self.add_recipe(i)
+        data, ten = self.get(url)
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(len(ten), len(three))
+
+    def test_cursor_pages_keep_working(self):
+        first, _ = self.get(reverse('api_recipe_list') + '?fields=title&page_size=2')
+        second, _ = self.get(first['next'])
+        self.assertEqual(
+            [r['title'] for r in first['results'] + second['results']], ['Shiro 2', 'Shiro 1', 'Shiro 0'],
+        )
+
+    def test_expand_author_and_reviews(self):
+        data, _ = self.get(reverse('recipe-detail', args=[self.recipes[0].pk]) + '?expand=author,reviews')
+        self.assertEqual(data['author']['bio'], 'Cooks shiro')
+        self.assertEqual((data['author']['username'], data['author']['name']), ('chef', 'Almaz'))
+        self.assertEqual(data['reviews'], [
+            {'recipe': self.recipes[0].pk, 'user': self.recipes[0].reviews.get().user_id, 'rating': 4, 'comment': 'good'},
+        ])
+        self.assertIn('ingredients', data)
+
+    def test_expanded_users_are_public_summaries(self):
+        self.chef.email = 'chef@secret.example'
+        self.chef.save()
+        User.objects.filter(username__startswith='critic').update(email='critic@secret.example')
+        for url in (
+            reverse('api_recipe_list') + '?expand=author',
+            reverse('recipe-list') + '?expand=author',
+            reverse('review-list') + '?expand=user',
+        ):
+            with self.subTest(url=url):
+                data, _ = self.get(url)
+                self.assertNotIn('@secret.example', str(data))
+                expanded = data['results'][0].get('author') or data['results'][0]['user']
+                self.assertNotIn('email', expanded)
+                self.assertNotIn('is_active', expanded)
+
+    def test_expanded_relations_are_kept_by_fields(self):
+        data, _ = self.get(reverse('api_recipe_list') + '?fields=title&expand=reviews')
+        self.assertEqual(set(data['results'][0]), {'title', 'reviews'})
+
+    def test_reviews_and_saved_recipes(self):
+        data, _ = self.get(reverse('review-list') + '?fields=rating&expand=user')
+        self.assertEqual(set(data['results'][0]), {'rating', 'user'})
+        self.assertTrue(data['results'][0]['user']['username'].startswith('critic'))
+
+        self.client.force_login(self.chef)
+        data, _ = self.get(reverse('savedrecipe-list') + '?expand=recipe')
+        recipe = data['results'][0]['recipe']
+        self.assertEqual((recipe['author']['username'], recipe['tags']), ('chef', ['dinner']))
+
+        data, _ = self.get(reverse('savedrecipe-list') + '?fields=recipe')
+        self.assertEqual(set(data['results'][0]['recipe']), {'id', 'title', 'image', 'slug'})
+        data, captured = self.get(reverse('savedrecipe-list') + '?fields=user')
+        self.assertEqual(data['results'][0], {'user': self.chef.pk})
+        self.assertNotIn('recipeApp_recipe', ' '.join(query['sql'] for query in captured))
+
+    def test_other_views_ignore_the_parameters(self):
+        data, _ = self.get(reverse('api_recipe_trending') + '?fields=title&expand=reviews')
+        self.assertTrue(all('reviews' not in recipe for recipe in data))
+
+    def test_unknown_names_are_ignored(self):
+        data, _ = self.get(reverse('api_recipe_list') + '?fields=title,nope&expand=nope')
+        self.assertEqual(set(data['results'][0]), {'title'})
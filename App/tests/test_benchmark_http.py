@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from App import loadtest
+from App.loadtest import Sample
+from recipeApp.models import Recipe
+from recipeApp.tracking import view_buffer
+from userApp.models import UserProfile
+
+
+class QueryCountHeaderTests(TestCase):
+    @override_settings(QUERY_COUNT_HEADER=True)
+    def test_header_reports_queries(self):
+        response = self.client.get(reverse('api_cuisine_list'))
+        self.assertEqual(response['X-DB-Queries'], '0')
+        response = self.client.get(reverse('api_recipe_list'))
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+
+    @override_settings(QUERY_COUNT_HEADER=False)
+    def test_off(self):
+        self.assertNotIn('X-DB-Queries', self.client.get(reverse('api_cuisine_list')))
+
+
+class SummaryTests(SimpleTestCase):
+    def test_percentiles(self):
+        ordered = list(range(1, 101))
+        self.assertEqual([loadtest.percentile(ordered, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_summary_and_comparison(self):
+        samples = [Sample('home', 200, 0.010, 4), Sample('home', 500, 0.030, 9), Sample('home', 200, 0.020, None)]
+        summary = loadtest.summarize(samples, seconds=2)
+        self.assertEqual((summary['requests'], summary['errors'], summary['throughput']), (3, 1, 1.5))
+        self.assertEqual(summary['latency_ms']['p50'], 20)
+        self.assertEqual(summary['queries'], {'mean': 6.5, 'max': 9})
+
+        previous = {'endpoints': {'home': {'latency_ms': {'p95': 15.0}}}}
+        current = {'endpoints': {'home': summary, 'search': summary}}
+        rows = {name: change for name, _, _, change in loadtest.compare(previous, current)}
+        self.assertAlmostEqual(rows['home'], 100)
+        self.assertIsNone(rows['search'])
+
+
+@override_settings(QUERY_COUNT_HEADER=True)
+class BenchmarkCommandTests(LiveServerTestCase):
+    def setUp(self):
+        cache.clear()
+        self.workdir = tempfile.mkdtemp()
+        user = User.objects.create_user(username='almaz', password='secret')
+        profile = UserProfile.objects.create(user=user)
+        Recipe.objects.create(author=profile, title='Shiro', description='d', ingredients='i', instructions='s')
+
+    def tearDown(self):
+        view_buffer.clear()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def test_writes_json_results(self):
+        path = os.path.join(self.workdir, 'result.json')
+        out = io.StringIO()
+        call_command(
+            'benchmark_http', '--url', self.live_server_url, '--concurrency', '3', '--duration', '3',
+            '--warmup', '0', '--password', 'secret', '--output', path, stdout=out,
+        )
+        with open(path) as result:
+            result = json.load(result)
+        self.assertEqual(set(result['iterations']), set(loadtest.SCENARIOS))
+        self.assertTrue({'home', 'recipe_detail', 'api_recipe_search', 'save_recipe'} <= set(result['endpoints']))
+        detail = result['endpoints']['recipe_detail']
+        self.assertEqual(detail['errors'], 0)
+        self.assertIsNotNone(detail['queries']['mean'])
+        self.assertEqual(result['meta']['dataset']['recipes'], 1)
+        self.assertIn('p95', out.getvalue())
+
+        call_command(
+            'benchmark_http', '--url', self.live_server_url, '--concurrency', '1', '--duration', '0.5',
+            '--warmup', '0', '--scenario', 'anonymous', '--compare', path,
+            '--output', os.path.join(self.workdir, 'second.json'), stdout=out,
+        )
+        self.assertIn('p95 latency against', out.getvalue())
@@ -0,0 +1,31 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipeApp.models import Recipe
+from reviewApp.models import Review, SavedRecipe
+from userApp.models import UserProfile
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+    def test_reports_every_endpoint(self):
+        reader = User.objects.create_user(username='reader')
+        profile = UserProfile.objects.create(user=User.objects.create_user(username='chef'))
+        for i in range(3):
+            recipe = Recipe.objects.create(author=profile, title=f'Shiro {i}', description='d', ingredients='i', instructions='s')
+            Review.objects.create(recipe=recipe, user=reader, rating=4)
+            SavedRecipe.objects.create(user=reader, recipe=recipe)
+
+        out = io.StringIO()
+        call_command('benchmark_serializers', '--repeat', '2', '--page-size', '2', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:5]],
+                         ['recipe_list', 'recipe_reviews', 'user_reviews', 'user_saved_recipes'])
+        self.assertEqual([line.split()[1] for line in lines[1:5]], ['2', '1', '2', '2'])
+        self.assertTrue(all(line.endswith('x') for line in lines[1:5]))
+
+    def test_needs_data(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_serializers', stdout=io.StringIO())
@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from App import metrics
+from recipeApp.models import Recipe
+from userApp.models import UserProfile
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR, METRICS_ENABLED=True, METRICS_TOKEN='scrape-token', METRICS_SERVER_TIMING=True)
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        profile = UserProfile.objects.create(user=User.objects.create_user(username='almaz', password='pass'))
+        Recipe.objects.create(author=profile, title='Shiro', description='d', ingredients='i', instructions='s')
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode()
+
+    def test_records_requests_per_view(self):
+        response = self.client.get(reverse('recipe_list'))
+        self.client.get(reverse('recipe_list'))
+        self.client.get(reverse('api_recipe_list'))
+        self.assertRegex(
+            response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+        body = self.scrape()
+        self.assertIn('enibla_http_requests_total{view="recipe_list",method="GET",status="200"} 2', body)
+        self.assertIn('enibla_http_requests_total{view="api_recipe_list",method="GET",status="200"} 1', body)
+        self.assertIn('enibla_http_request_duration_seconds_bucket{view="recipe_list",le="+Inf"} 2', body)
+        self.assertIn('enibla_db_queries_per_request_count{view="recipe_list"} 2', body)
+        self.assertIn('enibla_http_response_size_bytes_count{view="recipe_list"} 2', body)
+        template_time = [
+            float(line.split()[-1]) for line in body.splitlines()
+            if line.startswith('enibla_template_render_seconds_sum{view="recipe_list"}')
+        ]
+        self.assertGreater(template_time[0], 0)
+
+    def test_processes_are_added_up_from_their_files(self):
+        self.client.get(reverse('recipe_list'))
+        other_process = metrics.Registry()
+        other_process.inc('http_requests_total', (('view', 'recipe_list'), ('method', 'GET'), ('status', '200')), 4)
+        other_process.observe('db_queries_per_request', (('view', 'recipe_list'),), 3)
+        other_process.flush(force=True)
+
+        body = self.scrape()
+        self.assertIn('enibla_http_requests_total{view="recipe_list",method="GET",status="200"} 5', body)
+        self.assertIn('enibla_db_queries_per_request_count{view="recipe_list"} 2', body)
+
+    def test_files_of_exited_processes_are_folded(self):
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        for name in (f'{int(exited.stdout)}-aaaa.json', f'{int(exited.stdout)}-bbbb.json'):
+            with open(os.path.join(METRICS_DIR, name), 'w') as out:
+                json.dump({'counters': [['http_requests_total', {'view': 'home', 'method': 'GET', 'status': '200'}, 3]]}, out)
+        self.client.get(reverse('recipe_list'))
+
+        for _ in range(2):
+            self.assertIn('enibla_http_requests_total{view="home",method="GET",status="200"} 6', self.scrape())
+        names = sorted(name for name in os.listdir(METRICS_DIR) if name.endswith('.json'))
+        self.assertEqual(len(names), 2)  # this process's file and the exited ones' totals
+        self.assertIn(metrics.EXITED_FILE, names)
+
+    def test_unresolved_paths_share_a_label(self):
+        self.client.get('/no/such/page/')
+        self.assertIn('view="unresolved",method="GET",status="404"', self.scrape())
+
+    def test_scrapes_need_the_token_or_staff(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer '}).status_code, 403)
+            self.client.force_login(User.objects.get(username='almaz'))
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.client.force_login(User.objects.create_user(username='ops', password='pass', is_staff=True))
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_off(self):
+        self.assertFalse(self.client.get(reverse('recipe_list')).has_header('Server-Timing'))
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse('recipe_list'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        self.assertEqual(metrics.registry.snapshot(), {'counters': [], 'histograms': []})
+
+
+class ExpositionTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        counters = {('http_requests_total', (('view', 'say "hi"'),)): 3.0}
+        buckets = [0] * (len(metrics.QUERY_BUCKETS) + 1) + [0.0]
+        buckets[1], buckets[3], buckets[-2], buckets[-1] = 1, 2, 1, 312.0
+        body = metrics.render(counters, {('db_queries_per_request', (('view', 'home'),)): buckets})
+
+        self.assertIn('# TYPE enibla_db_queries_per_request histogram', body)
+        self.assertIn('enibla_http_requests_total{view="say \\"hi\\""} 3', body)
+        self.assertIn('enibla_db_queries_per_request_bucket{view="home",le="0"} 0', body)
+        self.assertIn('enibla_db_queries_per_request_bucket{view="home",le="1"} 1', body)
+        self.assertIn('enibla_db_queries_per_request_bucket{view="home",le="5"} 3', body)
+        self.assertIn('enibla_db_queries_per_request_bucket{view="home",le="+Inf"} 4', body)
+        self.assertIn('enibla_db_queries_per_request_sum{view="home"} 312', body)
+        self.assertIn('enibla_db_queries_per_request_count{view="home"} 4', body)
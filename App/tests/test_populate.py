@@ -0,0 +1,83 @@
+import io
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from App import synthetic
+from recipeApp.models import Recipe, RecipeTag, RecipeView
+from reviewApp.models import Review, SavedRecipe
+
+COUNTS = {'users': 40, 'recipes': 120, 'reviews': 600, 'saved': 200, 'views': 3000}
+UNTIL = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class PopulateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def populate(self, **options):
+        plan = synthetic.plan_for(COUNTS, seed=7, chunk_size=50, until=UNTIL)
+        return synthetic.populate(plan, **options)
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('username').values_list('username', 'date_joined')),
+            list(Recipe.objects.order_by('slug').values_list(
+                'title', 'author__user__username', 'cuisine', 'created_at', 'rating_count', 'view_count')),
+            sorted(Review.objects.values_list('user__username', 'recipe__slug', 'rating', 'created_at')),
+            sorted(SavedRecipe.objects.values_list('user__username', 'recipe__slug', 'saved_at')),
+            Counter(RecipeView.objects.values_list('recipe__slug', 'user__username')),
+        )
+
+    def test_counts_and_denormalized_fields(self):
+        written = self.populate()
+        self.assertEqual(written, COUNTS)
+        self.assertEqual(Recipe.objects.count(), 120)
+        self.assertEqual(RecipeView.objects.count(), 3000)
+        self.assertEqual(Review.objects.count(), 600)
+        self.assertTrue(RecipeTag.objects.exists())
+
+        recipe = Recipe.objects.order_by('-rating_count').first()
+        self.assertEqual(recipe.rating_count, recipe.reviews.count())
+        self.assertEqual(recipe.view_count, RecipeView.objects.filter(recipe=recipe).count())
+        review = Review.objects.first()
+        self.assertLess(review.created_at, UNTIL)
+        self.assertGreaterEqual(review.created_at, review.recipe.created_at)
+        self.assertFalse(Review.objects.filter(created_at__gte=UNTIL).exists())
+        self.assertFalse(SavedRecipe.objects.filter(saved_at__gte=UNTIL).exists())
+
+    def test_same_seed_same_data(self):
+        self.populate()
+        first = self.snapshot()
+        for model in (RecipeView, SavedRecipe, Review, Recipe, User):
+            model.objects.all().delete()
+        self.populate()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_worker_processes_produce_the_same_rows(self):
+        plan = synthetic.plan_for(COUNTS, seed=7, chunk_size=50, until=UNTIL)
+        serial = list(synthetic._chunks(plan, 'reviews', workers=1))
+        self.assertEqual(list(synthetic._chunks(plan, 'reviews', workers=2)), serial)
+
+    def test_popularity_is_skewed(self):
+        self.populate()
+        views = sorted(Recipe.objects.values_list('view_count', flat=True), reverse=True)
+        # The top 10% of recipes get far more than 10% of the views
+        self.assertGreater(sum(views[:12]), sum(views) * 0.4)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command(
+            'populate_db', '--users', '5', '--recipes', '10', '--reviews', '20', '--saved', '5', '--views', '50',
+            '--until', '2026-01-01', stdout=out,
+        )
+        self.assertIn('Created 5 users, 10 recipes, 20 reviews, 5 saved, 50 views', out.getvalue())
+        self.assertTrue(User.objects.get(username__endswith='1').check_password(synthetic.DEFAULT_PASSWORD))
+
+    def test_activity_needs_users_and_recipes(self):
+        with self.assertRaises(ValueError):
+            synthetic.plan_for({**COUNTS, 'users': 0})
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from App.query_budget import budget_for
+from recipeApp import trending
+from recipeApp.models import Recipe
+from recipeApp.tracking import view_buffer
+from reviewApp.models import Review, SavedRecipe
+from userApp.models import UserProfile
+
+# (name, URL for the fixture's recipe, log in as the author)
+ENDPOINTS = [
+    ('home', lambda recipe: reverse('home'), False),
+    ('recipe_list', lambda recipe: reverse('recipe_list'), False),
+    ('recipe_list_search', lambda recipe: reverse('recipe_list') + '?q=stew', False),
+    ('recipe_detail', lambda recipe: reverse('recipe_detail', args=[recipe.slug]), True),
+    ('profile_detail', lambda recipe: reverse('profile_detail', args=['chef']), True),
+    ('api_recipe_list', lambda recipe: reverse('api_recipe_list'), False),
+    ('api_recipe_viewset', lambda recipe: reverse('recipe-list'), False),
+    ('api_recipe_search', lambda recipe: reverse('api_recipe_search') + '?q=stew', False),
+    ('api_recipe_detail', lambda recipe: reverse('api_recipe_detail', args=[recipe.slug]), False),
+    ('api_recipe_trending', lambda recipe: reverse('api_recipe_trending'), False),
+    ('api_recipe_export', lambda recipe: reverse('api_recipe_export'), False),
+    ('api_recipe_reviews', lambda recipe: reverse('api_recipe_reviews', args=[recipe.slug]), False),
+    ('api_review_viewset', lambda recipe: reverse('review-list'), False),
+    ('api_user_reviews', lambda recipe: reverse('api_user_reviews'), True),
+    ('api_saved_recipe_viewset', lambda recipe: reverse('savedrecipe-list'), True),
+    ('api_user_saved_recipes', lambda recipe: reverse('api_user_saved_recipe_list'), True),
+    ('api_profile_viewset', lambda recipe: reverse('userprofile-list'), False),
+]
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every hot endpoint is requested with 1 and with 50 recipes, reviews and
+    saved recipes behind it. The query count must not grow with the number
+    of objects and must stay within the view's @query_budget.
+    """
+
+    def setUp(self):
+        self.chef = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=self.chef)
+        self.recipes = []
+
+    def tearDown(self):
+        view_buffer.clear()
+
+    def grow(self, count):
+        """Bring the fixture up to ``count`` recipes, reviews of the first recipe, saves and trending views."""
+        for i in range(len(self.recipes), count):
+            recipe = Recipe.objects.create(
+                author=self.profile, title=f'Lentil Stew {i}', description='d', ingredients='lentils',
+                instructions='s', tags='dinner,fasting', cuisine='Ethiopian', featured=True,
+            )
+            self.recipes.append(recipe)
+            reviewer = User.objects.create(username=f'reviewer{i}')
+            UserProfile.objects.create(user=reviewer)
+            Review.objects.create(recipe=self.recipes[0], user=reviewer, rating=4, comment='good')
+            Review.objects.create(recipe=recipe, user=self.chef, rating=5, comment='mine')
+            SavedRecipe.objects.create(user=self.chef, recipe=recipe)
+            trending.add_views([(recipe.pk, None, timezone.now())])
+
+    def queries(self, path, login):
+        self.client.logout()
+        if login:
+            self.client.force_login(self.chef)
+        # Flush buffered recipe views now, so the measured request is not the one that writes them
+        cache.clear()
+        view_buffer.flush()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, path)
+        return len(captured)
+
+    def measure(self):
+        return {name: self.queries(url(self.recipes[0]), login) for name, url, login in ENDPOINTS}
+
+    def test_query_counts_do_not_grow_and_fit_the_budget(self):
+        self.grow(1)
+        one = self.measure()
+        self.grow(50)
+        fifty = self.measure()
+
+        for name, url, _ in ENDPOINTS:
+            path = url(self.recipes[0])
+            with self.subTest(endpoint=name):
+                budget = budget_for(path)
+                self.assertIsNotNone(budget, f'{path} declares no @query_budget')
+                self.assertLessEqual(
+                    fifty[name], one[name], f'{path}: {one[name]} queries for 1 object, {fifty[name]} for 50',
+                )
+                self.assertLessEqual(fifty[name], budget, f'{path}: {fifty[name]} queries, budget {budget}')
@@ -1,4 +1,6 @@
+from io import StringIO
 from django.test import TestCase, Client
+from django.core.management import call_command
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -41,6 +43,9 @@ class IndexViewTest(TestCase):
             viewed_at=timezone.now() - timedelta(days=10)
         )
 
+        # The home page reads trending scores built from the view rollups
+        call_command('refresh_trending', rebuild=True, stdout=StringIO())
+
     def test_index_status_code(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
@@ -8,6 +8,9 @@ urlpatterns = [
     # Home page
     path('', views.index, name='home'),
     path('index/', views.index, name='index'),
+
+    # Prometheus scrape target
+    path('metrics', views.metrics, name='metrics'),
 ]
 
 
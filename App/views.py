@@ -1,8 +1,10 @@
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 from django.contrib.auth.models import User
-from django.utils import timezone
-from datetime import timedelta
-from recipeApp.models import Recipe, RecipeView
+from recipeApp.models import Recipe
+from recipeApp import trending
+from App import metrics as request_metrics
+from App.query_budget import query_budget
 
 
 
@@ -13,21 +15,17 @@ TAG_CHOICES = (('breakfast', 'Breakfast'),('lunch', 'Lunch'),('dinner', 'Dinner'
 
 # Create your views here.
 
+@query_budget(9)
 def index(request):
     """Home page view with featured and trending recipes and stats"""
     # Featured recipes (explicit flag)
-    featured_recipes = Recipe.objects.filter(featured=True).select_related('author__user').order_by('-created_at')[:6]
-
-    # Trending recipes: count views within last 7 days
-    one_week_ago = timezone.now() - timedelta(days=7)
-    recent_views = RecipeView.objects.filter(viewed_at__gte=one_week_ago)
-    counts = {}
-    for v in recent_views.values('recipe'):
-        rid = v['recipe']
-        counts[rid] = counts.get(rid, 0) + 1
-    top_ids = sorted(counts.keys(), key=lambda rid: counts[rid], reverse=True)[:6]
-    trending_recipes = list(Recipe.objects.filter(id__in=top_ids))
-    trending_recipes.sort(key=lambda r: top_ids.index(r.id) if r.id in top_ids else 999)
+    featured_recipes = (
+        Recipe.objects.filter(featured=True).select_related('author__user')
+        .prefetch_related('tag_links__tag').order_by('-created_at')[:6]
+    )
+
+    # Trending recipes: highest time-decayed view scores
+    trending_recipes = trending.top_recipes(limit=6)
 
     # Community stats
     total_recipes = Recipe.objects.count()
@@ -46,3 +44,12 @@ def index(request):
     return render(request, 'home.html', context)
 
 
+def metrics(request):
+    """Request metrics of every worker process in the Prometheus text format; staff or METRICS_TOKEN only."""
+    if not request_metrics.enabled():
+        return HttpResponse(status=404)
+    if not request_metrics.allowed(request):
+        return HttpResponseForbidden()
+    body = request_metrics.render(*request_metrics.collect())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
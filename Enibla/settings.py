@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'App.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,7 +77,8 @@ ROOT_URLCONF = 'Enibla.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates, timed for the request metrics
+        'BACKEND': 'App.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -177,4 +179,58 @@ environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 # Email settings for development (prints emails to console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'eniblarecipies.com'
-PASSWORD_RESET_TIMEOUT = 86400  # 24 hours for password reset link validity
\ No newline at end of file
+PASSWORD_RESET_TIMEOUT = 86400  # 24 hours for password reset link validity
+
+# Recipe view tracking: views are buffered in process and written in batches
+RECIPE_VIEW_BUFFER_SIZE = 100  # flush after this many views
+RECIPE_VIEW_FLUSH_INTERVAL = 5  # or this many seconds after the previous flush
+RECIPE_VIEW_RETENTION_DAYS = 30  # raw views older than this are pruned by `manage.py rollup_views`
+
+# Trending: views lose half their weight every TRENDING_HALF_LIFE_HOURS and stop
+# counting after TRENDING_WINDOW_DAYS. Run `manage.py refresh_trending` on a schedule.
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_DAYS = 7
+
+# Number of precomputed related recipes kept per recipe (`manage.py rebuild_related`)
+RELATED_RECIPES_K = 8
+
+# Shared by every worker process, so a write handled by one invalidates the cached
+# facet counts and recipe pages of all of them. Defaults to files under var/cache;
+# point CACHE_URL at Redis or Memcached (e.g. redis://127.0.0.1:6379/1) in production.
+CACHES = {'default': env.cache('CACHE_URL', default=f'filecache://{BASE_DIR / "var" / "cache"}')}
+
+# Seconds the recipe list's facet counts are cached; any recipe write invalidates them
+RECIPE_FACET_CACHE_TIMEOUT = 300
+
+# Seconds a rendered recipe_detail page is cached; recipe, review and profile writes replace it sooner
+RECIPE_PAGE_CACHE_TIMEOUT = 600
+
+# Recipe images are resized off the request by `manage.py process_images`
+RECIPE_IMAGE_MAX_SIZE = 800  # longest side in pixels
+RECIPE_IMAGE_MAX_ATTEMPTS = 3  # tries before a job is marked failed
+RECIPE_IMAGE_JOB_TIMEOUT = 600  # seconds before a running job is assumed abandoned and requeued
+RECIPE_IMAGE_WIDTHS = (160, 320, 640, 800)  # widths of the JPEG and WebP copies written for srcset
+RECIPE_IMAGE_MAX_PIXELS = 50_000_000  # uploads with more pixels are refused from the header, before decoding
+RECIPE_IMAGE_MAX_DECODED_PIXELS = 16_000_000  # most pixels the worker decodes, after JPEG draft-mode scaling
+
+# Write uploads straight to a temporary file rather than buffering them in memory
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Recipes fetched per database round trip by the NDJSON export (`/api/recipes/export/`, `manage.py export_recipes`)
+RECIPE_EXPORT_CHUNK_SIZE = 500
+
+# Most results a search API query returns, over all its pages or streamed (?stream=true)
+RECIPE_SEARCH_MAX_RESULTS = 1000
+
+# Add an X-DB-Queries header with each response's query count (read by `manage.py benchmark_http`)
+QUERY_COUNT_HEADER = DEBUG
+
+# Request metrics served at /metrics (Prometheus text format). Each worker process
+# writes its totals to METRICS_DIR every METRICS_FLUSH_INTERVAL seconds; /metrics adds
+# them up. Empty the directory when deploying. Only staff users, or scrapers sending
+# `Authorization: Bearer <METRICS_TOKEN>`, may read /metrics.
+METRICS_ENABLED = True
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_DIR = env('METRICS_DIR', default=str(BASE_DIR / 'var' / 'metrics'))
+METRICS_FLUSH_INTERVAL = 5
+METRICS_SERVER_TIMING = DEBUG  # Server-Timing header with DB, template and total time
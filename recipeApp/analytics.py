@@ -0,0 +1,117 @@
+"""
+Recipe view rollups.
+
+Raw RecipeView rows are folded into hourly and daily totals by the
+`rollup_views` command. Readers (`refresh_trending --rebuild`) query the
+rollups; raw rows are only kept for a retention window.
+"""
+import csv
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncDay, TruncHour
+
+from recipeApp.models import RecipeView, RecipeViewDaily, RecipeViewHourly, RollupCheckpoint
+
+CHECKPOINT_NAME = 'recipe_views'
+
+# (rollup model, truncation function, bucket width)
+ROLLUPS = (
+    (RecipeViewHourly, TruncHour, timedelta(hours=1)),
+    (RecipeViewDaily, TruncDay, timedelta(days=1)),
+)
+
+
+def rollup_new_views(batch_size=10000):
+    """
+    Fold RecipeView rows added since the last run into the rollup tables.
+
+    Rows are processed in id order, one transaction per batch, and the
+    checkpoint moves with each batch so an interrupted run resumes cleanly.
+    Returns the number of raw rows processed.
+    """
+    checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    last_id = checkpoint.last_id
+    max_id = RecipeView.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    processed = 0
+
+    while last_id < max_id:
+        upper = min(last_id + batch_size, max_id)
+        batch = RecipeView.objects.filter(id__gt=last_id, id__lte=upper)
+        with transaction.atomic():
+            processed += batch.count()
+            for model, trunc, width in ROLLUPS:
+                _merge_batch(model, trunc, width, batch)
+            RollupCheckpoint.objects.filter(pk=checkpoint.pk).update(last_id=upper)
+        last_id = upper
+
+    return processed
+
+
+def _merge_batch(model, trunc, width, batch):
+    totals = (
+        batch.annotate(bucket=trunc('viewed_at'))
+        .values('recipe_id', 'bucket')
+        .annotate(views=Count('id'))
+    )
+    touched = set()
+    for row in totals:
+        key = (row['recipe_id'], row['bucket'])
+        touched.add(key)
+        updated = model.objects.filter(recipe_id=key[0], bucket=key[1]).update(
+            views=F('views') + row['views']
+        )
+        if not updated:
+            model.objects.create(recipe_id=key[0], bucket=key[1], views=row['views'])
+
+    if not touched:
+        return
+
+    # Distinct users can't be summed across batches, so recount the touched
+    # buckets from the raw rows (which are still within the retention window).
+    buckets = [bucket for _, bucket in touched]
+    distinct = (
+        RecipeView.objects.filter(
+            recipe_id__in={recipe_id for recipe_id, _ in touched},
+            viewed_at__gte=min(buckets),
+            viewed_at__lt=max(buckets) + width,
+        )
+        .annotate(bucket=trunc('viewed_at'))
+        .values('recipe_id', 'bucket')
+        .annotate(users=Count('user', distinct=True))
+    )
+    for row in distinct:
+        key = (row['recipe_id'], row['bucket'])
+        if key in touched:
+            model.objects.filter(recipe_id=key[0], bucket=key[1]).update(unique_users=row['users'])
+
+
+def prune_raw_views(before, archive_path=None, batch_size=10000):
+    """
+    Delete raw views older than ``before`` that are already rolled up,
+    optionally appending them to a CSV archive first. Returns the count.
+    """
+    checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None:
+        return 0
+
+    expired = RecipeView.objects.filter(viewed_at__lt=before, id__lte=checkpoint.last_id).order_by('id')
+    deleted = 0
+    archive = open(archive_path, 'a', newline='') if archive_path else None
+    try:
+        writer = csv.writer(archive) if archive else None
+        while True:
+            rows = list(expired.values_list('id', 'recipe_id', 'user_id', 'viewed_at')[:batch_size])
+            if not rows:
+                break
+            if writer:
+                writer.writerows((pk, recipe_id, user_id or '', viewed_at.isoformat())
+                                 for pk, recipe_id, user_id, viewed_at in rows)
+                archive.flush()
+            RecipeView.objects.filter(id__in=[row[0] for row in rows]).delete()
+            deleted += len(rows)
+    finally:
+        if archive:
+            archive.close()
+    return deleted
@@ -0,0 +1,75 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from recipeApp.pagination import DEFAULT_ORDERING, InvalidCursor, paginate
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the view's ``keyset_ordering`` (newest first by
+    default). The total is left out unless asked for with ?count=true; views
+    can supply a cheap one through ``get_total_count()``.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, view):
+        return getattr(view, 'keyset_ordering', None) or DEFAULT_ORDERING
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate(
+                queryset,
+                cursor=request.query_params.get(self.cursor_query_param),
+                per_page=self.get_page_size(request),
+                ordering=self.get_ordering(view),
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            get_total_count = getattr(view, 'get_total_count', None)
+            self.count = get_total_count() if get_total_count else queryset.count()
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        body = {}
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_link(self.page.next_cursor)
+        body['previous'] = self.get_link(self.page.previous_cursor)
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,26 +1,76 @@
 from rest_framework import serializers
-from recipeApp.models import Recipe
+from App.api_fields import Expansion, Load, SparseFieldsMixin
+from recipeApp.models import Recipe, normalize_tags
+
+
+class TagListField(serializers.ListField):
+    """Tag names as a list; also accepts a comma-separated string on input."""
+    child = serializers.CharField()
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.split(',')
+        return normalize_tags(super().to_internal_value(data))
+
+
+class AuthorSummarySerializer(serializers.Serializer):
+    """The recipe author in brief; needs the profile's user, e.g. from Recipe.objects.for_api()."""
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    name = serializers.SerializerMethodField()
+
+    def get_name(self, obj):
+        return obj.user.get_full_name() or obj.username or obj.user.username
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tags = TagListField(source='get_tag_choices_list', read_only=True)
+    author = AuthorSummarySerializer(read_only=True)
+    image_variants = serializers.SerializerMethodField()
 
-class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = ['id', 'title', 'image', 'tags', 'description', 'ingredients', 'instructions', 'created_at', 'updated_at', 'author']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'author']
+        fields = ['id', 'slug', 'title', 'image', 'image_status', 'image_variants', 'tags', 'description', 'ingredients', 'instructions', 'created_at', 'updated_at', 'author', 'rating_avg', 'rating_count']
+        read_only_fields = ['id', 'slug', 'image_status', 'created_at', 'updated_at', 'author', 'rating_avg', 'rating_count']
+        field_loads = {
+            'image_variants': Load(columns=['image', 'image_status', 'image_derivatives']),
+            'tags': Load(prefetch=['tag_links__tag']),
+            'author': Load(columns=['author'], select=['author__user']),
+        }
+        expandable = {
+            'author': Expansion(
+                'userApp.api.serializer.PublicProfileSerializer', Load(columns=['author'], select=['author__user']),
+            ),
+            'reviews': Expansion('reviewApp.api.serializer.ReviewSerializer', Load(prefetch=['reviews']), many=True),
+        }
+
     def get_image(self, obj):
         request = self.context.get('request')
         if obj.image:
             return request.build_absolute_uri(obj.image.url)
         return None
-    def get_tag(self, obj):
+
+    def get_image_variants(self, obj):
+        """Resized JPEG/WebP URLs by width, so clients can pick one that fits instead of the full image."""
         request = self.context.get('request')
-        if obj.tags:
-            return [tag.name for tag in obj.tags.all()]
-        return None
+        absolute = request.build_absolute_uri if request else str
+        return [
+            {key: value if key == 'width' else absolute(value) for key, value in variant.items()}
+            for variant in obj.image_variants()
+        ]
+
+class RecipeSearchResultSerializer(RecipeSerializer):
+    snippet = serializers.CharField(source='search_snippet', read_only=True, default='')
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ['snippet']
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
+    tags = TagListField(required=False)
+
     class Meta:
         model = Recipe
-        fields = ['title', 'description', 'ingredients', 'instructions', 'image', 'cuisine', 'difficulty', 'prep_time']
+        fields = ['title', 'description', 'ingredients', 'instructions', 'image', 'tags', 'cuisine', 'difficulty', 'prep_time']
         read_only_fields = ['author']
     
     def validate_description(self, value):
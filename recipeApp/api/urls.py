@@ -13,8 +13,10 @@ urlpatterns = [
 
     # Additional API endpoints
     path('recipes/', views.RecipeListAPIView.as_view(), name='api_recipe_list'),
-    path('recipes/<slug:slug>/', views.RecipeDetailAPIView.as_view(), name='api_recipe_detail'),
+    path('recipes/export/', views.RecipeExportAPIView.as_view(), name='api_recipe_export'),
     path('recipes/search/', views.RecipeSearchAPIView.as_view(), name='api_recipe_search'),
+    path('recipes/<slug:slug>/', views.RecipeDetailAPIView.as_view(), name='api_recipe_detail'),
+    path('trending/', views.RecipeTrendingAPIView.as_view(), name='api_recipe_trending'),
     path('tags/', views.RecipeTagListAPIView.as_view(), name='api_tag_list'),
     path('cuisines/', views.RecipeCuisineListAPIView.as_view(), name='api_cuisine_list'),
 ]
\ No newline at end of file
@@ -1,19 +1,34 @@
-from django.db.models import Q
+from itertools import islice
+
 from recipeApp.models import Recipe
+from recipeApp import conditional, export, trending
 from userApp.models import UserProfile
-from recipeApp.api.serializer import RecipeSerializer, RecipeCreateUpdateSerializer
-from rest_framework import viewsets, permissions
+from recipeApp.api.serializer import RecipeSerializer, RecipeCreateUpdateSerializer, RecipeSearchResultSerializer
+from recipeApp.facets import apply_filters, facet_counts, parse_filters
+from recipeApp.api import rows
+from recipeApp.api.pagination import KeysetPagination
+from recipeApp.pagination import DEFAULT_ORDERING
+from recipeApp.search import RANKED_ORDERING, attach_snippets, fts_enabled, max_results
+from rest_framework import viewsets, permissions, status
 from rest_framework.permissions import BasePermission
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from django.http import QueryDict, StreamingHttpResponse
+from App.api_fields import EXPAND_PARAM, SparseQuerysetMixin, selection
+from App.query_budget import query_budget
 
 from recipeApp.views import TAG_CHOICES, CUISINE_CHOICES
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+@query_budget(3)
+class RecipeViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Recipe.objects.for_api()
     serializer_class = RecipeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+
+    def get_total_count(self):
+        return facet_counts(parse_filters(QueryDict()))['total']
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -60,43 +75,155 @@ class RecipeCreateUpdateViewSet(viewsets.ModelViewSet):
     
 #additional API views 
 
-# API: List all recipes (supports ?tag=<tag> query param for filtering)
-class RecipeListAPIView(ListAPIView):
+# API: List all recipes (supports the recipe list's filters: ?q=, ?tag= (repeatable),
+# ?tag_mode=any, ?cuisine=, ?difficulty=, ?prep_time=) with facet counts, and
+# ?fields= / ?expand=author,reviews (see App.api_fields)
+@query_budget(5)
+class RecipeListAPIView(SparseQuerysetMixin, ListAPIView):
     serializer_class = RecipeSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
 
-    def get_queryset(self):
-        queryset = Recipe.objects.all()
-        tag = self.request.query_params.get('tag', None)
-        if tag:
-            queryset = queryset.filter(tags__icontains=tag)
-        return queryset
+    def get_filters(self):
+        return parse_filters(self.request.query_params)
 
-    def get_serializer_context(self):
-        return {'request': self.request}
+    def get_total_count(self):
+        return facet_counts(self.get_filters())['total']
 
-# API: Retrieve a single recipe by slug
+    def get_queryset(self):
+        return apply_filters(Recipe.objects.for_api(), self.get_filters())
+
+    def list(self, request, *args, **kwargs):
+        # Answer a conditional GET from max(updated_at) and the count, before any page is serialized
+        etag, last_modified = conditional.list_validators(
+            apply_filters(Recipe.objects.all(), self.get_filters()), request,
+        )
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is None:
+            if EXPAND_PARAM in request.query_params:
+                response = super().list(request, *args, **kwargs)
+            else:
+                response = self.fast_list(request)
+            response.data['facets'] = facet_counts(self.get_filters())
+        return conditional.set_validators(response, etag, last_modified)
+
+    def fast_list(self, request):
+        """The page built from .values() rows (recipeApp.api.rows); expanding relations needs the serializers."""
+        fields, _ = selection(request)
+        keep = [field.lstrip('-') for field in self.paginator.get_ordering(self)]
+        page = self.paginate_queryset(rows.recipe_values(self.get_queryset(), fields, keep))
+        return self.get_paginated_response(rows.recipe_dicts(page, request, fields))
+
+# API: Retrieve a single recipe by slug (answers If-None-Match / If-Modified-Since with 304)
+@query_budget(2)
 class RecipeDetailAPIView(RetrieveAPIView):
-    queryset = Recipe.objects.all()
+    # One recipe reads its tags in a single query; a prefetch would take two
+    queryset = Recipe.objects.select_related('author__user')
     serializer_class = RecipeSerializer
     lookup_field = 'slug'
     permission_classes = [permissions.AllowAny]
 
-# API: Search recipes by title, ingredients, or tags
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        etag, last_modified = conditional.recipe_validators(recipe)
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(recipe).data)
+        return conditional.set_validators(response, etag, last_modified)
+
+# API: Search recipes by title, ingredients, instructions or tags (best match first),
+# narrowed by the same filters as the recipe list. Paged with cursors; a query's
+# results stop after RECIPE_SEARCH_MAX_RESULTS best matches. ?stream=true returns
+# all of them (to that cap) in one response, encoded as they are read
+@query_budget(4)
 class RecipeSearchAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
+    @property
+    def keyset_ordering(self):
+        return RANKED_ORDERING if self.filters['q'] and fts_enabled() else None
+
+    def get_total_count(self):
+        if self.filters['q']:
+            return self.recipes.count()  # of the capped matches, so cheap
+        return facet_counts(self.filters)['total']
+
     def get(self, request):
-        query = request.GET.get('q', '').strip()
-        recipes = Recipe.objects.all()
-        if query:
-            recipes = recipes.filter(
-                Q(title__icontains=query) |
-                Q(ingredients__icontains=query) |
-                Q(tags__icontains=query)
-            )
-        serializer = RecipeSerializer(recipes, many=True)
-        return Response(serializer.data)
+        self.filters = parse_filters(request.query_params)
+        self.recipes = apply_filters(Recipe.objects.for_api(), self.filters, search_limit=max_results())
+        if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return self.stream(request)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(self.recipes, request, view=self)
+        if self.filters['q']:
+            page = attach_snippets(page, self.filters['q'])
+        serializer = RecipeSearchResultSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def stream(self, request):
+        recipes = self.recipes.order_by(*(self.keyset_ordering or DEFAULT_ORDERING))[:max_results()]
+        blocks = export.iter_json_results(self.stream_records(recipes, export.chunk_size()))
+        gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = StreamingHttpResponse(
+            export.gzip_stream(blocks) if gzipped else blocks, content_type='application/json',
+        )
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+    def stream_records(self, recipes, chunk):
+        """Serialized results, ``chunk`` recipes (one tag prefetch and one snippet query) at a time."""
+        rows = recipes.iterator(chunk_size=chunk)
+        while True:
+            batch = list(islice(rows, chunk))
+            if not batch:
+                return
+            if self.filters['q']:
+                batch = attach_snippets(batch, self.filters['q'])
+            yield from RecipeSearchResultSerializer(batch, many=True).data
+
+# API: The whole catalogue as NDJSON, streamed (supports ?updated_since=<ISO date or datetime>
+# for incremental pulls; gzipped when the client accepts it)
+@query_budget(3)
+class RecipeExportAPIView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        since = request.query_params.get('updated_since')
+        try:
+            since = export.parse_since(since) if since else None
+        except ValueError as error:
+            return Response({'updated_since': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        blocks = export.iter_ndjson(since, absolute_url=request.build_absolute_uri)
+        gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = StreamingHttpResponse(
+            export.gzip_stream(blocks) if gzipped else blocks, content_type='application/x-ndjson',
+        )
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = 'attachment; filename="recipes.ndjson"'
+        return response
+
+# API: Top trending recipes (supports ?cuisine=<cuisine> or ?tag=<tag>)
+@query_budget(4)
+class RecipeTrendingAPIView(ListAPIView):
+    serializer_class = RecipeSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+
+    def get_queryset(self):
+        try:
+            limit = min(int(self.request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        return trending.top_recipes(
+            limit=max(limit, 1),
+            cuisine=self.request.query_params.get('cuisine'),
+            tag=self.request.query_params.get('tag'),
+        )
 
 # API: List all available tags
 class RecipeTagListAPIView(APIView):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecipeappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipeApp'
+
+    def ready(self):
+        # Connect signal handlers and the view buffer's flush hooks
+        from recipeApp import signals, tracking  # noqa: F401
@@ -0,0 +1,65 @@
+"""
+Conditional GETs for recipes: ETag and Last-Modified validators.
+
+Validators are computed from a few columns rather than from the response,
+so a client that already has the current representation gets a 304 before
+anything is serialized or rendered:
+
+* one recipe: its updated_at plus its review aggregates (rating_count and
+  rating_sum), image status and author's name, all read with the recipe;
+* a list: max(updated_at) and count of the recipes matching its filters,
+  in one aggregate query, plus the query string (cursor, page size,
+  fields). Review, image and author changes move the recipe's updated_at.
+
+ETags are weak: the bodies are equivalent, not byte-identical (gzip,
+renderer whitespace).
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _etag(*parts):
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+def recipe_validators(recipe):
+    """(etag, last_modified timestamp) of one recipe; needs its author's user loaded to be free."""
+    user = recipe.author.user
+    etag = _etag(
+        recipe.pk, recipe.updated_at.isoformat(), recipe.rating_count, recipe.rating_sum, recipe.image_status,
+        user.username, user.get_full_name(), recipe.author.username,
+    )
+    return etag, _timestamp(recipe.updated_at)
+
+
+def list_validators(queryset, request):
+    """(etag, last_modified timestamp) of the recipes in ``queryset`` as listed for ``request``."""
+    latest = queryset.order_by().aggregate(updated=Max('updated_at'), count=Count('pk'))
+    updated = latest['updated']
+    etag = _etag(
+        updated.isoformat() if updated else '', latest['count'], request.get_full_path(),
+    )
+    return etag, _timestamp(updated)
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """A 304 response if the request's If-None-Match / If-Modified-Since match, else None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified)
+    return response
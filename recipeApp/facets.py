@@ -0,0 +1,144 @@
+"""
+Faceted counts for the recipe list.
+
+facet_counts() reports, for a filtered result set, how many recipes carry
+each tag, cuisine, difficulty and prep-time limit, plus the total. The
+facets are grouped counts over the same filtered ids, sent as one UNION ALL
+query, and the result is cached under the normalized filters plus a version
+number that every recipe write bumps.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Value, When
+
+from recipeApp.models import Recipe, RecipeTag, normalize_tags
+from recipeApp.search import search_recipes
+
+# "Up to N minutes" options, matching the list's prep_time <= N filter
+PREP_TIME_LIMITS = (15, 30, 60, 120)
+
+VERSION_KEY = 'recipe_facets:version'
+
+
+def cache_timeout():
+    return getattr(settings, 'RECIPE_FACET_CACHE_TIMEOUT', 300)
+
+
+def parse_filters(params):
+    """Normalized list filters from request GET parameters."""
+    prep_time = params.get('prep_time', '').strip()
+    return {
+        'q': ' '.join(params.get('q', '').split()),
+        'tags': normalize_tags(params.getlist('tag')),
+        'tag_mode': 'any' if params.get('tag_mode') == 'any' else 'all',
+        'cuisine': params.get('cuisine', '').strip(),
+        'difficulty': params.get('difficulty', '').strip(),
+        'prep_time': int(prep_time) if prep_time.isdigit() else None,
+    }
+
+
+def apply_filters(queryset, filters, search_limit=None):
+    """
+    Restrict ``queryset`` to ``filters``; a search query orders by relevance
+    and, with ``search_limit``, keeps only that many best matches of the
+    other filters' results.
+    """
+    if filters['tags']:
+        queryset = queryset.with_tags(filters['tags'], match_all=filters['tag_mode'] == 'all')
+    if filters['cuisine']:
+        queryset = queryset.filter(cuisine=filters['cuisine'])
+    if filters['difficulty']:
+        queryset = queryset.filter(difficulty=filters['difficulty'])
+    if filters['prep_time'] is not None:
+        queryset = queryset.filter(prep_time__lte=filters['prep_time'])
+    if filters['q']:
+        queryset = search_recipes(queryset, filters['q'], limit=search_limit)
+    return queryset
+
+
+def cache_key(filters):
+    normalized = dict(filters, q=filters['q'].lower(), tags=sorted(filters['tags']))
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f'recipe_facets:{get_version()}:{digest}'
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    """Retire every cached facet result."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def _prep_time_bucket():
+    whens = [When(prep_time__lte=limit, then=Value(str(limit))) for limit in PREP_TIME_LIMITS]
+    return Case(*whens, default=Value(''), output_field=CharField())
+
+
+def _grouped(queryset, facet, value):
+    return (
+        queryset.order_by()
+        .values(facet=Value(facet, output_field=CharField()), value=value)
+        .annotate(count=Count('pk'))
+        .values_list('facet', 'value', 'count')
+    )
+
+
+def compute_facets(filters):
+    """Run the facet query for ``filters`` (uncached)."""
+    ids = apply_filters(Recipe.objects.all(), filters).order_by().values('pk')
+    recipes = Recipe.objects.filter(pk__in=ids)
+    links = RecipeTag.objects.filter(recipe_id__in=ids)
+
+    query = _grouped(links, 'tag', F('tag__name')).union(
+        _grouped(recipes.exclude(cuisine=''), 'cuisine', F('cuisine')),
+        _grouped(recipes.exclude(difficulty=''), 'difficulty', F('difficulty')),
+        _grouped(recipes.filter(prep_time__lte=PREP_TIME_LIMITS[-1]), 'prep_time', _prep_time_bucket()),
+        _grouped(recipes, 'total', Value('')),
+        all=True,
+    )
+
+    counts = {'tag': {}, 'cuisine': {}, 'difficulty': {}, 'prep_time': {}, 'total': {}}
+    for facet, value, count in query:
+        counts[facet][value] = count
+
+    # Buckets are disjoint in SQL; the options are cumulative "up to N minutes"
+    prep_time, running = [], 0
+    for limit in PREP_TIME_LIMITS:
+        running += counts['prep_time'].get(str(limit), 0)
+        prep_time.append({'value': limit, 'count': running})
+
+    def ranked(values):
+        return [
+            {'value': value, 'count': count}
+            for value, count in sorted(values.items(), key=lambda item: (-item[1], item[0]))
+        ]
+
+    return {
+        'tags': ranked(counts['tag']),
+        'cuisine': ranked(counts['cuisine']),
+        'difficulty': ranked(counts['difficulty']),
+        'prep_time': prep_time,
+        'total': counts['total'].get('', 0),
+    }
+
+
+def facet_counts(filters):
+    """Cached facet counts for the recipes matching ``filters``."""
+    key = cache_key(filters)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, cache_timeout())
+    return facets
@@ -1,5 +1,13 @@
 from django import forms
-from .models import Recipe
+from .models import Recipe, normalize_tags
+
+
+class TagsField(forms.Field):
+    """Tag names from checkboxes or a comma-separated string."""
+    widget = forms.CheckboxSelectMultiple
+
+    def to_python(self, value):
+        return normalize_tags(value)
 
 
 class RecipeForm(forms.ModelForm):
@@ -18,6 +26,10 @@ class RecipeForm(forms.ModelForm):
         min_value=1,
         widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Preparation time (minutes)'})
     )
+    tags = TagsField(
+        required=False,
+        widget=forms.CheckboxSelectMultiple(choices=Recipe.TAG_CHOICES)
+    )
     class Meta:
         model = Recipe
         fields = ['title', 'description', 'ingredients', 'instructions', 'image', 'cuisine', 'difficulty', 'prep_time']
@@ -44,6 +56,15 @@ class RecipeForm(forms.ModelForm):
             }),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault('tags', self.instance.get_tag_choices_list())
+
+    def save(self, commit=True):
+        self.instance.tags = self.cleaned_data.get('tags', [])
+        return super().save(commit=commit)
+
     def clean(self):
         cleaned_data = super().clean()
         # Fields are optional in our model; don't enforce here for tests
@@ -0,0 +1,305 @@
+"""
+Background processing of recipe images.
+
+Recipe.save only marks a new upload as pending; recipeApp.signals queues an
+ImageJob for it and the `process_images` command works through the queue, so
+requests never decode or rewrite images. A job remembers the file it was
+queued for: if the recipe has moved on to another file, or that file was
+already processed, the job finishes without decoding anything.
+
+Besides capping the original at RECIPE_IMAGE_MAX_SIZE, the worker writes
+JPEG and WebP copies at each of RECIPE_IMAGE_WIDTHS under `derived/` and
+records their storage names in Recipe.image_derivatives, so cards and API
+clients can fetch a size that fits. The previous file's derivatives are
+deleted once the new ones are recorded, and with the recipe.
+
+Decoding is memory-bounded: the pixel count is checked from the header
+before any pixel data is read, and JPEGs are decoded in draft mode at the
+smallest 1/2, 1/4 or 1/8 scale that still covers the largest output, so a
+48-megapixel photo never exists in memory at full resolution.
+"""
+import math
+import os
+import posixpath
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from recipeApp import page_cache
+from recipeApp.models import ImageJob, Recipe
+
+DERIVED_DIR = 'derived'
+# (key in Recipe.image_derivatives, PIL format, extension)
+DERIVED_FORMATS = (('jpeg', 'JPEG', 'jpg'), ('webp', 'WEBP', 'webp'))
+DERIVED_QUALITY = 82
+
+
+class ImageTooLarge(ValueError):
+    """The image has more pixels than the worker is willing to decode."""
+
+
+# Errors retrying will not fix (a missing file only once the job is older than job_timeout())
+PERMANENT_ERRORS = (FileNotFoundError, UnidentifiedImageError, Image.DecompressionBombError, ImageTooLarge)
+
+
+def max_size():
+    return getattr(settings, 'RECIPE_IMAGE_MAX_SIZE', 800)
+
+
+def widths():
+    return tuple(getattr(settings, 'RECIPE_IMAGE_WIDTHS', (160, 320, 640, 800)))
+
+
+def max_pixels():
+    """Pixel count (from the header) above which an image is refused outright."""
+    return getattr(settings, 'RECIPE_IMAGE_MAX_PIXELS', 50_000_000)
+
+
+def max_decoded_pixels():
+    """Pixel count the worker will actually decode, after draft-mode scaling."""
+    return getattr(settings, 'RECIPE_IMAGE_MAX_DECODED_PIXELS', 16_000_000)
+
+
+def max_attempts():
+    return getattr(settings, 'RECIPE_IMAGE_MAX_ATTEMPTS', 3)
+
+
+def job_timeout():
+    """How long a job may stay running before it is assumed abandoned."""
+    return timedelta(seconds=getattr(settings, 'RECIPE_IMAGE_JOB_TIMEOUT', 600))
+
+
+def enqueue(recipe):
+    """Queue the recipe's current image unless it is already processed or queued."""
+    name = recipe.image.name if recipe.image else ''
+    if not name or name == recipe.image_processed:
+        return None
+    job, _ = ImageJob.objects.get_or_create(recipe=recipe, image_name=name, status=ImageJob.STATUS_QUEUED)
+    return job
+
+
+def _save_atomic(img, path, image_format, **params):
+    tmp_path = f'{path}.tmp'
+    img.save(tmp_path, format=image_format, **params)
+    os.replace(tmp_path, path)
+
+
+def derivative_widths(width, wanted):
+    """Requested widths the image can fill, plus its own width if it is narrower than the largest."""
+    fits = {w for w in wanted if w <= width}
+    if width < max(wanted):
+        fits.add(width)
+    return sorted(fits)
+
+
+def write_derivatives(img, path, name, wanted):
+    """
+    Write JPEG and WebP copies of ``img`` (the decoded file at ``path``,
+    stored as ``name``) at each width it can fill. Returns the storage names
+    keyed by width, then format.
+    """
+    directory = os.path.join(os.path.dirname(path), DERIVED_DIR)
+    os.makedirs(directory, exist_ok=True)
+    # Keep the extension in the stem so dish.jpg and dish.png do not collide
+    stem = os.path.basename(name).replace('.', '_')
+    if img.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', img.size, 'white')
+        background.paste(img, mask=img.convert('RGBA'))
+        img = background
+
+    derivatives = {}
+    for width in derivative_widths(img.width, wanted):
+        height = max(1, round(img.height * width / img.width))
+        copy = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        derivatives[str(width)] = {}
+        for key, image_format, extension in DERIVED_FORMATS:
+            filename = f'{stem}-{width}.{extension}'
+            _save_atomic(copy, os.path.join(directory, filename), image_format, quality=DERIVED_QUALITY)
+            derivatives[str(width)][key] = posixpath.join(posixpath.dirname(name), DERIVED_DIR, filename)
+    return derivatives
+
+
+def derivative_names(derivatives):
+    """Storage names in a Recipe.image_derivatives mapping."""
+    return {name for names in derivatives.values() for name in names.values()}
+
+
+def delete_derivatives(derivatives, keep=()):
+    """Delete the files of a Recipe.image_derivatives mapping, except those named in ``keep``."""
+    storage = Recipe._meta.get_field('image').storage
+    for name in derivative_names(derivatives) - set(keep):
+        storage.delete(name)
+
+
+def open_bounded(path, size, pixel_limit=None, decoded_pixel_limit=None):
+    """
+    Open and decode the image at ``path`` without holding more pixels than
+    needed to fit it within ``size`` x ``size``. JPEGs are decoded at a
+    reduced scale; other formats must fit ``decoded_pixel_limit`` as they are.
+    Raises ImageTooLarge before decoding anything that would not. Returns
+    the decoded image and the file's own (width, height).
+    """
+    pixel_limit = pixel_limit or max_pixels()
+    decoded_pixel_limit = decoded_pixel_limit or max_decoded_pixels()
+    img = Image.open(path)
+    try:
+        width, height = img.size
+        if width * height > pixel_limit:
+            raise ImageTooLarge(f'{width}x{height} is over the {pixel_limit} pixel limit')
+        if width > size or height > size:
+            ratio = size / max(width, height)
+            img.draft(None, (max(1, math.ceil(width * ratio)), max(1, math.ceil(height * ratio))))
+        if img.width * img.height > decoded_pixel_limit:
+            raise ImageTooLarge(f'{width}x{height} would decode to {img.width}x{img.height}')
+        img.load()
+    except BaseException:
+        img.close()
+        raise
+    return img, (width, height)
+
+
+def process_image(path, name, size, wanted):
+    """
+    Shrink the image at ``path`` (stored as ``name``) to fit within ``size``
+    x ``size``, replacing the file atomically, then write its derivatives.
+    Images already small enough are not rewritten. Returns the derivative
+    names; free of database access so it can run in a worker process.
+    """
+    img, (width, height) = open_bounded(path, size)
+    with img:
+        if width > size or height > size:
+            image_format = img.format
+            img.thumbnail((size, size))
+            _save_atomic(img, path, image_format)
+        return write_derivatives(img, path, name, wanted)
+
+
+def requeue_stale(older_than):
+    """Put back jobs left running by a worker that died. Returns how many."""
+    cutoff = timezone.now() - older_than
+    return ImageJob.objects.filter(status=ImageJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=ImageJob.STATUS_QUEUED,
+    )
+
+
+def claim(limit):
+    """
+    Take up to ``limit`` of the oldest queued jobs. Each job is claimed with a
+    conditional update, so concurrent workers never run the same job.
+    """
+    candidates = ImageJob.objects.filter(status=ImageJob.STATUS_QUEUED).order_by('created_at', 'pk')
+    now = timezone.now()
+    claimed = [
+        pk for pk in candidates.values_list('pk', flat=True)[:limit]
+        if ImageJob.objects.filter(pk=pk, status=ImageJob.STATUS_QUEUED).update(
+            status=ImageJob.STATUS_RUNNING, started_at=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(ImageJob.objects.filter(pk__in=claimed).select_related('recipe').order_by('created_at', 'pk'))
+
+
+def needs_processing(job):
+    recipe = job.recipe
+    if not recipe.image or recipe.image.name != job.image_name:
+        return False
+    return recipe.image_processed != job.image_name or not recipe.image_derivatives
+
+
+def is_permanent(job, error):
+    """
+    Will retrying ``job`` not fix ``error``? A file missing from a job this
+    young may still be on its way into storage.
+    """
+    if isinstance(error, FileNotFoundError):
+        return job.created_at < timezone.now() - job_timeout()
+    return isinstance(error, PERMANENT_ERRORS)
+
+
+def finish(job, derivatives=None, error=None):
+    """Record the outcome of a job on the job and, unless it will be retried, on its recipe."""
+    now = timezone.now()
+    jobs = ImageJob.objects.filter(pk=job.pk)
+    derivatives = derivatives or {}
+    if error is None:
+        jobs.update(status=ImageJob.STATUS_DONE, finished_at=now, error='')
+        fields = {'image_status': Recipe.IMAGE_READY, 'image_derivatives': derivatives}
+    elif not is_permanent(job, error) and job.attempts < max_attempts():
+        jobs.update(status=ImageJob.STATUS_QUEUED, error=repr(error))
+        return
+    else:
+        jobs.update(status=ImageJob.STATUS_FAILED, finished_at=now, error=repr(error))
+        fields = {'image_status': Recipe.IMAGE_FAILED, 'image_derivatives': {}}
+
+    # Only if the recipe still shows this file; no save(), so no signals fire.
+    # The variants are part of the API payload, so updated_at moves with them
+    recipes = Recipe.objects.filter(pk=job.recipe_id)
+    previous = recipes.values_list('image_derivatives', flat=True).first() or {}
+    updated = recipes.filter(image=job.image_name).update(
+        image_processed=job.image_name, updated_at=timezone.now(), **fields,
+    )
+    if updated:
+        page_cache.invalidate(job.recipe_id)
+        delete_derivatives(previous, keep=derivative_names(derivatives))
+    else:
+        # Written for a file the recipe no longer shows
+        delete_derivatives(derivatives, keep=derivative_names(previous))
+
+
+def run_jobs(jobs, executor=None):
+    """Process claimed jobs, in ``executor`` (e.g. a process pool) when given."""
+    work = []
+    for job in jobs:
+        if needs_processing(job):
+            work.append(job)
+        else:
+            ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.STATUS_DONE, finished_at=timezone.now())
+
+    if executor is None:
+        for job in work:
+            try:
+                derivatives = process_image(job.recipe.image.path, job.image_name, max_size(), widths())
+            except Exception as error:
+                finish(job, error=error)
+            else:
+                finish(job, derivatives)
+        return
+
+    futures = [
+        (job, executor.submit(process_image, job.recipe.image.path, job.image_name, max_size(), widths()))
+        for job in work
+    ]
+    for job, future in futures:
+        error = future.exception()
+        finish(job, None if error else future.result(), error)
+
+
+def process_pending(batch_size=50, limit=None, executor=None):
+    """
+    Work through queued jobs until the queue is empty, or ``limit`` jobs have
+    been handled. Returns the number of jobs handled.
+    """
+    handled = 0
+    while limit is None or handled < limit:
+        size = batch_size if limit is None else min(batch_size, limit - handled)
+        jobs = claim(size)
+        if not jobs:
+            break
+        run_jobs(jobs, executor)
+        handled += len(jobs)
+    return handled
+
+
+def queue_missing_derivatives():
+    """Queue every ready image that has no derivatives yet (e.g. uploaded before they existed)."""
+    recipes = (
+        Recipe.objects.filter(image_status=Recipe.IMAGE_READY, image_derivatives={})
+        .exclude(image_jobs__status=ImageJob.STATUS_QUEUED)
+        .values_list('pk', 'image')
+    )
+    jobs = ImageJob.objects.bulk_create(
+        (ImageJob(recipe_id=pk, image_name=name) for pk, name in recipes.iterator()), batch_size=500,
+    )
+    return len(jobs)
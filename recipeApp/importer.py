@@ -0,0 +1,284 @@
+"""
+Bulk recipe import for `manage.py import_recipes`.
+
+Rows are read lazily from JSONL or CSV and written in fixed-size batches:
+one author lookup, one slug allocation query and one bulk_create per batch,
+each batch committed together with its checkpoint, so an interrupted import
+resumes after the last committed batch. bulk_create skips Recipe.save and
+its signals, so the tags, search index and facet cache are brought up to
+date once per batch here, and images are only queued for recipeApp.images.
+Once a batch commits, its local image files are copied into storage under
+a name derived from their content, and only then are their jobs queued: a
+worker never sees a job before its file, failed batches leave no files
+behind, and re-imports reuse the earlier copies.
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from recipeApp import facets, related, search
+from recipeApp.models import ImageJob, ImportCheckpoint, Recipe, RecipeTag, Tag, normalize_tags
+from userApp.models import UserProfile
+
+FORMATS = ('jsonl', 'csv')
+REQUIRED_FIELDS = ('title', 'ingredients', 'instructions')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+IMAGE_UPLOAD_TO = 'recipe_images/'
+
+CUISINES = {value.lower(): value for value, _ in Recipe.CUISINE_CHOICES}
+DIFFICULTIES = {value.lower(): value for value, _ in Recipe.DIFFICULTY_CHOICES}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; it is reported and skipped."""
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    raise ValueError(f'Cannot tell the format of {path}; pass --format')
+
+
+def read_rows(path, file_format, start=0):
+    """
+    Yield (row number, row dict or RowError) for every row after the first
+    ``start``, reading one line at a time. Skipped JSONL rows are not parsed.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as source:
+        if file_format == 'csv':
+            for number, row in enumerate(csv.DictReader(source), 1):
+                if number > start:
+                    yield number, row
+            return
+
+        number = 0
+        for line in source:
+            if not line.strip():
+                continue
+            number += 1
+            if number <= start:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield number, RowError(f'invalid JSON: {error}')
+                continue
+            yield number, row if isinstance(row, dict) else RowError('not a JSON object')
+
+
+def _text(row, field):
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def _stored_name(path):
+    """
+    Storage name for a local image: its file name plus a digest of its
+    content, so importing the same file again reuses the stored copy.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as image:
+        for chunk in iter(lambda: image.read(64 * 1024), b''):
+            digest.update(chunk)
+    stem, extension = os.path.splitext(default_storage.get_valid_name(os.path.basename(path)))
+    return f'{IMAGE_UPLOAD_TO}{stem[:60]}-{digest.hexdigest()[:12]}{extension.lower()}'
+
+
+def _image_name(value, base_dir, copies):
+    """
+    Storage name for the row's image: an existing stored file, or the name a
+    local file will be copied to; ``copies`` collects those (name: path).
+    """
+    if os.path.splitext(value)[1].lower() not in IMAGE_EXTENSIONS:
+        raise RowError(f'image {value!r} is not a JPEG or PNG')
+    if default_storage.exists(value):
+        return value
+    path = value if os.path.isabs(value) else os.path.join(base_dir, value)
+    if not os.path.isfile(path):
+        raise RowError(f'image {value!r} not found')
+    name = _stored_name(path)
+    copies[name] = path
+    return name
+
+
+def _queue_images(recipes, copies):
+    """
+    After the batch commits: copy its local images (``copies``) into
+    storage, then queue jobs for the recipes whose file is there. Recipes
+    whose copy failed are marked failed rather than left pending.
+    """
+    missing = set()
+    for name, path in copies.items():
+        if default_storage.exists(name):
+            continue
+        try:
+            with open(path, 'rb') as image:
+                default_storage.save(name, File(image))
+        except OSError:
+            missing.add(name)
+    with_images = [recipe for recipe in recipes if recipe.image]
+    ImageJob.objects.bulk_create(
+        ImageJob(recipe_id=recipe.pk, image_name=recipe.image.name)
+        for recipe in with_images if recipe.image.name not in missing
+    )
+    failed = [recipe.pk for recipe in with_images if recipe.image.name in missing]
+    if failed:
+        Recipe.objects.filter(pk__in=failed).update(image_status=Recipe.IMAGE_FAILED, updated_at=timezone.now())
+
+
+def build_recipe(row, authors, base_dir, now, copies):
+    """
+    An unsaved Recipe (without slug) and its tag names from one row. Local
+    images to copy into storage are added to ``copies``.
+    """
+    missing = [field for field in REQUIRED_FIELDS if not _text(row, field)]
+    if missing:
+        raise RowError(f'missing {", ".join(missing)}')
+    username = _text(row, 'author')
+    author_id = authors.get(username) or authors.get(None)
+    if author_id is None:
+        raise RowError(f'unknown author {username!r}' if username else 'no author')
+
+    cuisine = _text(row, 'cuisine')
+    if cuisine and cuisine.lower() not in CUISINES:
+        raise RowError(f'unknown cuisine {cuisine!r}')
+    difficulty = _text(row, 'difficulty')
+    if difficulty and difficulty.lower() not in DIFFICULTIES:
+        raise RowError(f'unknown difficulty {difficulty!r}')
+    prep_time = _text(row, 'prep_time')
+    try:
+        prep_time = int(prep_time) if prep_time else None
+    except ValueError:
+        raise RowError(f'prep_time {prep_time!r} is not a number')
+    if prep_time is not None and prep_time < 0:
+        raise RowError('prep_time is negative')
+    created_at = _text(row, 'created_at')
+    if created_at:
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise RowError('created_at is not an ISO 8601 datetime')
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+
+    recipe = Recipe(
+        author_id=author_id,
+        title=_text(row, 'title')[:200],
+        description=_text(row, 'description'),
+        ingredients=_text(row, 'ingredients'),
+        instructions=_text(row, 'instructions'),
+        cuisine=CUISINES.get(cuisine.lower(), ''),
+        difficulty=DIFFICULTIES.get(difficulty.lower(), ''),
+        prep_time=prep_time,
+        created_at=created_at or now,
+        updated_at=now,
+    )
+    image = _text(row, 'image')
+    if image:
+        recipe.image = _image_name(image, base_dir, copies)
+        recipe.image_status = Recipe.IMAGE_PENDING
+    tags = row.get('tags')
+    return recipe, normalize_tags(tags if isinstance(tags, list) else _text(row, 'tags'))
+
+
+def _save_tags(recipes_with_tags):
+    names = {name for _, tags in recipes_with_tags for name in tags}
+    if not names:
+        return
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(names)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    RecipeTag.objects.bulk_create(
+        RecipeTag(recipe_id=recipe.pk, tag_id=tag_ids[name]) for recipe, tags in recipes_with_tags for name in tags
+    )
+
+
+def import_batch(rows, default_author=None, base_dir='.', refresh_related=False):
+    """
+    Create the recipes for a batch of (row number, row) pairs. Returns the
+    created recipes and a list of (row number, message) for skipped rows.
+    Call inside a transaction.
+    """
+    errors = []
+    usernames = {_text(row, 'author') for _, row in rows if isinstance(row, dict)} - {''}
+    if default_author:
+        usernames.add(default_author)
+    authors = dict(UserProfile.objects.filter(user__username__in=usernames).values_list('user__username', 'pk'))
+    if default_author in authors:
+        authors[None] = authors[default_author]
+
+    now = timezone.now()
+    built, copies = [], {}
+    for number, row in rows:
+        try:
+            if isinstance(row, RowError):
+                raise row
+            built.append(build_recipe(row, authors, base_dir, now, copies))
+        except RowError as error:
+            errors.append((number, str(error)))
+    if not built:
+        return [], errors
+
+    slugs = Recipe.objects.allocate_slugs([recipe.title for recipe, _ in built])
+    for (recipe, _), slug in zip(built, slugs):
+        recipe.slug = slug
+    recipes = Recipe.objects.bulk_create([recipe for recipe, _ in built])
+
+    _save_tags(built)
+    # Only a committed batch copies files, and its jobs wait for them
+    transaction.on_commit(lambda: _queue_images(recipes, copies))
+    search.index_recipes(recipe.pk for recipe in recipes)
+    facets.invalidate()
+    transaction.on_commit(facets.invalidate)
+    if refresh_related:
+        for recipe in recipes:
+            related.refresh_related(recipe)
+    return recipes, errors
+
+
+def import_file(path, file_format=None, batch_size=500, checkpoint=None, default_author=None,
+                refresh_related=False, on_batch=None):
+    """
+    Import every row of ``path`` after the ``checkpoint`` (an ImportCheckpoint
+    name counting rows already consumed). ``on_batch`` is called after each
+    committed batch with the running stats. Returns the final stats.
+    """
+    file_format = file_format or detect_format(path)
+    start = 0
+    if checkpoint:
+        start = ImportCheckpoint.objects.get_or_create(name=checkpoint)[0].last_row
+    stats = {'start': start, 'rows': 0, 'created': 0, 'errors': [], 'seconds': 0.0}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    started = time.perf_counter()
+
+    def flush(batch):
+        with transaction.atomic():
+            recipes, errors = import_batch(batch, default_author, base_dir, refresh_related)
+            if checkpoint:
+                ImportCheckpoint.objects.filter(name=checkpoint).update(last_row=batch[-1][0])
+        stats['rows'] += len(batch)
+        stats['created'] += len(recipes)
+        stats['errors'].extend(errors)
+        stats['seconds'] = time.perf_counter() - started
+        if on_batch:
+            on_batch(stats)
+
+    batch = []
+    for number, row in read_rows(path, file_format, start):
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from recipeApp import images
+
+
+def _decode_full(path, size):
+    """What Recipe.save used to do: decode the whole bitmap, then thumbnail it."""
+    with Image.open(path) as img:
+        img.load()
+        img.thumbnail((size, size))
+
+
+def _decode_bounded(path, size):
+    images.process_image(path, os.path.basename(path), size, images.widths())
+
+
+MODES = {'full': _decode_full, 'bounded': _decode_bounded}
+
+
+def _peak_rss():
+    """Peak RSS of this process in KiB."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss():
+    # Linux only; elsewhere the fresh process's own high-water mark has to do
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def _measure(mode, path, size):
+    """Run one decode in this (fresh) process; returns (peak RSS growth in KiB, seconds)."""
+    _reset_peak_rss()
+    before = _peak_rss()
+    started = time.perf_counter()
+    MODES[mode](path, size)
+    elapsed = time.perf_counter() - started
+    return _peak_rss() - before, elapsed
+
+
+class Command(BaseCommand):
+    help = 'Measure peak memory of decoding one large upload, full-resolution versus the bounded worker path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--megapixels', type=float, default=48, help='Size of the synthetic JPEG')
+        parser.add_argument('--runs', type=int, default=3, help='Runs per mode; each runs in a fresh process')
+        parser.add_argument('--image', help='Measure this JPEG instead of a synthetic one')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp()
+        try:
+            source = options['image'] or self.make_jpeg(workdir, options['megapixels'])
+            with Image.open(source) as img:
+                self.stdout.write(f'{source}: {img.width}x{img.height}, {os.path.getsize(source) / 2**20:.1f} MiB')
+
+            for mode in MODES:
+                peaks, times = [], []
+                for run in range(options['runs']):
+                    path = os.path.join(workdir, f'{mode}-{run}.jpg')
+                    shutil.copyfile(source, path)
+                    peak, elapsed = self.run_isolated(mode, path, images.max_size())
+                    peaks.append(peak)
+                    times.append(elapsed)
+                self.stdout.write(self.style.SUCCESS(
+                    f'{mode:8} peak RSS +{max(peaks) / 1024:7.1f} MiB   '
+                    f'{min(times) * 1000:7.0f} ms best of {options["runs"]}'
+                ))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def make_jpeg(self, workdir, megapixels):
+        width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+        height = int(width * 3 / 4)
+        path = os.path.join(workdir, 'source.jpg')
+        Image.linear_gradient('L').resize((width, height)).convert('RGB').save(path, quality=90)
+        return path
+
+    def run_isolated(self, mode, path, size):
+        # A fresh process per run, so nothing decoded earlier is still resident
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=django.setup) as pool:
+            return pool.submit(_measure, mode, path, size).result()
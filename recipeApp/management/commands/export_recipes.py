@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipeApp import export
+
+
+class Command(BaseCommand):
+    help = 'Write the recipe catalogue as NDJSON (one recipe per line), optionally gzipped or only recent changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument(
+            '--updated-since',
+            help='Only recipes updated at or after this ISO 8601 date or datetime (for incremental pulls)',
+        )
+        parser.add_argument('--chunk-size', type=int, help='Recipes fetched per database round trip')
+
+    def handle(self, *args, **options):
+        since = options['updated_since']
+        try:
+            since = export.parse_since(since) if since else None
+        except ValueError as error:
+            raise CommandError(error)
+
+        blocks = export.iter_ndjson(since, chunk=options['chunk_size'])
+        if options['gzip']:
+            blocks = export.gzip_stream(blocks)
+
+        output = options['output']
+        out = open(output, 'wb') if output else sys.stdout.buffer
+        written = 0
+        try:
+            for block in blocks:
+                out.write(block)
+                written += len(block)
+        finally:
+            if output:
+                out.close()
+            else:
+                out.flush()
+        if output:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written:,} bytes to {output}.'))
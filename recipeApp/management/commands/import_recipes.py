@@ -0,0 +1,68 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipeApp import importer
+from recipeApp.models import ImportCheckpoint
+
+# Skipped rows listed individually before only the count is reported
+MAX_ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = 'Import recipes from a JSONL or CSV file in batches, resuming where a previous run stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=importer.FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--author', help='Username to credit rows that name no (known) author')
+        parser.add_argument(
+            '--checkpoint',
+            help='Name under which progress is stored (default: import:<file name>); rerun with it to resume',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from row 1')
+        parser.add_argument(
+            '--related', action='store_true',
+            help='Refresh related recipes as rows are imported (slower; otherwise run rebuild_related afterwards)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            file_format = options['format'] or importer.detect_format(path)
+        except ValueError as error:
+            raise CommandError(error)
+        checkpoint = options['checkpoint'] or f'import:{os.path.basename(path)}'
+        max_length = ImportCheckpoint._meta.get_field('name').max_length
+        if len(checkpoint) > max_length:
+            raise CommandError(f'Checkpoint name is longer than {max_length} characters; pass a shorter --checkpoint')
+        if options['restart']:
+            ImportCheckpoint.objects.filter(name=checkpoint).delete()
+
+        def report(stats):
+            rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+            self.stdout.write(f'  row {stats["start"] + stats["rows"]}: {stats["created"]} created ({rate:,.0f} rows/s)')
+
+        try:
+            stats = importer.import_file(
+                path, file_format, batch_size=options['batch_size'], checkpoint=checkpoint,
+                default_author=options['author'], refresh_related=options['related'], on_batch=report,
+            )
+        except FileNotFoundError:
+            raise CommandError(f'No such file: {path}')
+
+        if stats['start']:
+            self.stdout.write(f'Resumed after row {stats["start"]} (checkpoint {checkpoint!r}).')
+        for number, message in stats['errors'][:MAX_ERRORS_SHOWN]:
+            self.stderr.write(f'Row {number}: {message}')
+        if len(stats['errors']) > MAX_ERRORS_SHOWN:
+            self.stderr.write(f'... and {len(stats["errors"]) - MAX_ERRORS_SHOWN} more skipped rows')
+
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["created"]} recipes from {stats["rows"]} rows in {stats["seconds"]:.1f}s '
+            f'({rate:,.0f} rows/s); {len(stats["errors"])} skipped.'
+        ))
+        if stats['created'] and not options['related']:
+            self.stdout.write('Run `manage.py rebuild_related` to include the new recipes in related recipes.')
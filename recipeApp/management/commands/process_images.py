@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+
+from recipeApp import images
+
+
+class Command(BaseCommand):
+    help = 'Resize uploaded recipe images queued by create and edit requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when the queue is empty')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Decode and resize in a pool of this many processes (0 works inline)',
+        )
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='First queue ready images that have no resized copies yet',
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=None,
+            help='Requeue jobs left running for this many seconds by a worker that died',
+        )
+
+    def handle(self, *args, **options):
+        stale_after = (
+            timedelta(seconds=options['stale_after']) if options['stale_after'] is not None
+            else images.job_timeout()
+        )
+        if options['backfill']:
+            self.stdout.write(f'Queued {images.queue_missing_derivatives()} images for resized copies.')
+        executor = None
+        if options['workers'] > 0:
+            executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup)
+        try:
+            while True:
+                requeued = images.requeue_stale(stale_after)
+                if requeued:
+                    self.stdout.write(f'Requeued {requeued} stale image jobs.')
+                handled = images.process_pending(batch_size=options['batch_size'], executor=executor)
+                if handled:
+                    self.stdout.write(self.style.SUCCESS(f'Processed {handled} image jobs.'))
+                if options['once']:
+                    break
+                if not handled:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
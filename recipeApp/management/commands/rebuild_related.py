@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from recipeApp.models import Recipe
+from recipeApp.related import refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-recipes index for every recipe'
+
+    def handle(self, *args, **options):
+        count = 0
+        for recipe in (
+            Recipe.objects.only('pk', 'author_id', 'cuisine', 'difficulty')
+            .prefetch_related('tag_links__tag')
+            .iterator(chunk_size=500)
+        ):
+            refresh_related(recipe, propagate=False)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt related recipes for {count} recipes.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from recipeApp import trending
+from recipeApp.analytics import rollup_new_views
+
+
+class Command(BaseCommand):
+    help = 'Decay trending scores and drop cold recipes; --rebuild recomputes them from the view rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute all scores from the hourly rollup')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rollup_new_views()
+            count = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt trending scores for {count} recipes.'))
+        else:
+            epoch = trending.rebase()
+            self.stdout.write(self.style.SUCCESS(f'Trending scores rebased to {epoch.epoch:%Y-%m-%d %H:%M}.'))
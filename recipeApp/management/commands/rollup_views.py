@@ -0,0 +1,27 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipeApp.analytics import prune_raw_views, rollup_new_views
+
+
+class Command(BaseCommand):
+    help = 'Fold new recipe views into the hourly/daily rollups and prune old raw views'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int,
+            default=getattr(settings, 'RECIPE_VIEW_RETENTION_DAYS', 30),
+            help='Raw views older than this many days are deleted once rolled up (0 keeps everything)',
+        )
+        parser.add_argument('--archive', help='Append pruned raw views to this CSV file before deleting them')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        processed = rollup_new_views(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {processed} new views.'))
+
+        if options['retention_days'] > 0:
+            cutoff = timezone.now() - timedelta(days=options['retention_days'])
+            pruned = prune_raw_views(cutoff, archive_path=options['archive'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} raw views older than {cutoff:%Y-%m-%d %H:%M}.'))
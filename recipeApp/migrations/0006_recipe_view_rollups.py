@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 11:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0005_alter_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipeview',
+            name='viewed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='RecipeViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipeApp.recipe')),
+            ],
+            options={
+                'verbose_name': 'Daily Recipe Views',
+                'verbose_name_plural': 'Daily Recipe Views',
+                'abstract': False,
+                'indexes': [models.Index(fields=['bucket'], name='recipeApp_r_bucket_8a5dfa_idx')],
+                'unique_together': {('recipe', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeViewHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipeApp.recipe')),
+            ],
+            options={
+                'verbose_name': 'Hourly Recipe Views',
+                'verbose_name_plural': 'Hourly Recipe Views',
+                'abstract': False,
+                'indexes': [models.Index(fields=['bucket'], name='recipeApp_r_bucket_31af1a_idx')],
+                'unique_together': {('recipe', 'bucket')},
+            },
+        ),
+    ]
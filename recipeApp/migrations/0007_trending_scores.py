@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 11:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0006_recipe_view_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('all', 'All'), ('cuisine', 'Cuisine'), ('tag', 'Tag')], max_length=10)),
+                ('value', models.CharField(blank=True, max_length=50)),
+                ('score', models.FloatField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_scores', to='recipeApp.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', 'value', '-score'], name='recipeApp_t_facet_438262_idx')],
+                'unique_together': {('recipe', 'facet', 'value')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 11:19
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Recipe = apps.get_model('recipeApp', 'Recipe')
+    Review = apps.get_model('reviewApp', 'Review')
+    reviews = Review.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    total = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0)
+    count = Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0)
+    Recipe.objects.update(
+        rating_sum=total,
+        rating_count=count,
+        rating_avg=Coalesce(Cast(total, FloatField()) / NullIf(count, 0), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0007_trending_scores'),
+        ('reviewApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
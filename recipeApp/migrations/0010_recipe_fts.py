@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "recipeApp_recipe_fts" USING fts5('
+        'title, ingredients, instructions, tags, tokenize="unicode61 remove_diacritics 2")'
+    )
+    schema_editor.execute(
+        'INSERT INTO "recipeApp_recipe_fts" (rowid, title, ingredients, instructions, tags) '
+        'SELECT id, title, ingredients, instructions, tags FROM "recipeApp_recipe"'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS "recipeApp_recipe_fts"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0009_related_recipes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-18 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _names(raw):
+    names = []
+    for part in (raw or '').split(','):
+        name = part.strip().lower()[:50]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def split_tags(apps, schema_editor):
+    Recipe = apps.get_model('recipeApp', 'Recipe')
+    Tag = apps.get_model('recipeApp', 'Tag')
+    RecipeTag = apps.get_model('recipeApp', 'RecipeTag')
+
+    rows = [(pk, _names(raw)) for pk, raw in Recipe.objects.exclude(tags='').values_list('pk', 'tags').iterator()]
+    every_name = {name for _, names in rows for name in names}
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(every_name)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('name', 'pk'))
+    RecipeTag.objects.bulk_create(
+        (RecipeTag(recipe_id=pk, tag_id=tag_ids[name]) for pk, names in rows for name in names),
+        batch_size=1000,
+    )
+
+
+def join_tags(apps, schema_editor):
+    Recipe = apps.get_model('recipeApp', 'Recipe')
+    RecipeTag = apps.get_model('recipeApp', 'RecipeTag')
+
+    names = {}
+    for recipe_id, name in RecipeTag.objects.order_by('pk').values_list('recipe_id', 'tag__name').iterator():
+        names.setdefault(recipe_id, []).append(name)
+    for recipe_id, tags in names.items():
+        # The old column only held 20 characters
+        Recipe.objects.filter(pk=recipe_id).update(tags=','.join(tags)[:20])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0010_recipe_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='recipeApp.recipe')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_links', to='recipeApp.tag')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='recipes', through='recipeApp.RecipeTag', to='recipeApp.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='recipetag',
+            index=models.Index(fields=['tag', 'recipe'], name='recipeApp_r_tag_id_ecc12f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipetag',
+            unique_together={('recipe', 'tag')},
+        ),
+        migrations.RunPython(split_tags, join_tags),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='tags',
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 12:02
+
+import django.core.validators
+import recipeApp.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0014_recipe_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='recipe_images/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png']), recipeApp.models.validate_image_pixels]),
+        ),
+    ]
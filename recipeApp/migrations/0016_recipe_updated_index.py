@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0015_recipe_image_pixel_limit'),
+        ('userApp', '0003_alter_userprofile_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['updated_at', 'id'], name='recipe_updated_id_idx'),
+        ),
+    ]
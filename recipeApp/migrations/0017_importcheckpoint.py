@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+def move_import_checkpoints(apps, schema_editor):
+    # import_recipes kept its progress in RollupCheckpoint under "import:<file name>"
+    RollupCheckpoint = apps.get_model('recipeApp', 'RollupCheckpoint')
+    ImportCheckpoint = apps.get_model('recipeApp', 'ImportCheckpoint')
+    imports = RollupCheckpoint.objects.filter(name__startswith='import:')
+    ImportCheckpoint.objects.bulk_create(
+        ImportCheckpoint(name=checkpoint.name, last_row=checkpoint.last_id) for checkpoint in imports
+    )
+    imports.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipeApp', '0016_recipe_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('last_row', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(move_import_checkpoints, migrations.RunPython.noop),
+    ]
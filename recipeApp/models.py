@@ -1,16 +1,146 @@
-from django.db import models
+from django.conf import settings
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Q
+from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify
-from PIL import Image, UnidentifiedImageError
+from PIL import Image
 
 # Create your models here.
 
+TAG_MAX_LENGTH = 50
+SLUG_MAX_LENGTH = 200
+# Room left after the base for a "-<n>" suffix
+SLUG_SUFFIX_ROOM = 8
+SLUG_SAVE_ATTEMPTS = 5
+
+_SLUG_SUFFIX_RE = re.compile(r'^(.+)-([0-9]+)$')
+
+
+def normalize_tags(value):
+    """
+    Tag names from a comma-separated string or an iterable: stripped,
+    lower-cased, de-duplicated, first occurrence order kept.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    names = []
+    for raw in value:
+        name = str(raw).strip().lower()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def base_slug(title):
+    """The slug a title gets before any -<n> suffix is added."""
+    base = slugify(title)[:SLUG_MAX_LENGTH - SLUG_SUFFIX_ROOM].strip('-')
+    return base or 'recipe'
+
+
+def validate_image_pixels(value):
+    """
+    Refuse uploads the image worker would not decode, reading only the
+    header. JPEGs are decoded at reduced scale, so they may be larger than
+    other formats. Files already stored are not re-checked.
+    """
+    if getattr(value, '_committed', False):
+        return
+    try:
+        value.seek(0)
+        with Image.open(value) as img:
+            width, height = img.size
+            image_format = img.format
+    except Exception:
+        return  # not an image; ImageField reports that
+    finally:
+        value.seek(0)
+    limit = getattr(settings, 'RECIPE_IMAGE_MAX_PIXELS', 50_000_000)
+    if image_format != 'JPEG':
+        limit = min(limit, getattr(settings, 'RECIPE_IMAGE_MAX_DECODED_PIXELS', 16_000_000))
+    if width * height > limit:
+        raise ValidationError(
+            f'This image is {width}x{height} pixels; the most we accept is {limit // 1_000_000} megapixels'
+            + ('' if image_format == 'JPEG' else ' (more as a JPEG)') + '.'
+        )
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_tags(self, tags, match_all=True):
+        """
+        Recipes tagged with every one of ``tags`` (or any of them when
+        ``match_all`` is False), resolved on the (tag, recipe) index.
+        """
+        names = normalize_tags(tags)
+        if not names:
+            return self
+        links = RecipeTag.objects.filter(tag__name__in=names).order_by().values('recipe_id')
+        if match_all and len(names) > 1:
+            links = links.annotate(matched=Count('tag_id')).filter(matched=len(names)).values('recipe_id')
+        return self.filter(pk__in=links)
+
+    def for_api(self):
+        """
+        Recipes ready for the API read serializers: the author's profile and
+        user joined in and tags prefetched, so a page of recipes costs the
+        same queries as one. Ratings need nothing extra; rating_avg and
+        rating_count are kept on the row by reviewApp.ratings.
+        """
+        return self.select_related('author__user').prefetch_related('tag_links__tag')
+
+    def allocate_slugs(self, titles, chunk_size=100):
+        """
+        Free slugs for ``titles``, in order: the bare base slug or the lowest
+        free -1, -2, ... suffix, also unique among the titles themselves.
+        Slugs in use are read with one query per ``chunk_size`` distinct
+        bases, each base an index range over "<base>" and "<base>-...".
+        """
+        bases = [base_slug(title) for title in titles]
+        distinct = list(dict.fromkeys(bases))
+        taken = {base: set() for base in distinct}
+        for start in range(0, len(distinct), chunk_size):
+            chunk = distinct[start:start + chunk_size]
+            # '.' sorts right after '-', so the range is every slug starting "<base>-"
+            ranges = Q(slug__in=chunk)
+            for base in chunk:
+                ranges |= Q(slug__gt=f'{base}-', slug__lt=f'{base}.')
+            for slug in self.model._base_manager.filter(ranges).values_list('slug', flat=True).iterator():
+                if slug in taken:
+                    taken[slug].add(0)
+                match = _SLUG_SUFFIX_RE.match(slug)
+                if match and match.group(1) in taken:
+                    taken[match.group(1)].add(int(match.group(2)))
+
+        slugs = []
+        for base in bases:
+            suffix = 0
+            while suffix in taken[base]:
+                suffix += 1
+            taken[base].add(suffix)
+            slugs.append(f'{base}-{suffix}' if suffix else base)
+        return slugs
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=TAG_MAX_LENGTH, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class Recipe(models.Model):
     author = models.ForeignKey('userApp.UserProfile', on_delete=models.CASCADE, related_name='recipes')
     title = models.CharField(max_length=200)
-    slug = models.SlugField(unique=True, max_length=200)
+    slug = models.SlugField(unique=True, max_length=SLUG_MAX_LENGTH)
     description = models.TextField()
     ingredients = models.TextField()
     instructions = models.TextField()
@@ -23,13 +153,28 @@ class Recipe(models.Model):
         ('snack', 'Snack'),
         ('fasting', 'Fasting'),
     )
-    tags = models.CharField(max_length=20, choices=TAG_CHOICES, blank=True)
+    tag_set = models.ManyToManyField(Tag, through='RecipeTag', related_name='recipes', blank=True)
     image = models.ImageField(
         upload_to='recipe_images/',
         blank=True,
         null=True,
-        validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])]
+        validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png']), validate_image_pixels]
     )
+    IMAGE_NONE = ''
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_NONE, 'No image'),
+        (IMAGE_PENDING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    ]
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, default=IMAGE_NONE)
+    # Name of the image file the worker last handled (ready or failed)
+    image_processed = models.CharField(max_length=255, blank=True, editable=False)
+    # Storage names of the resized copies: {"<width>": {"jpeg": name, "webp": name}}
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     # New fields for filtering
     CUISINE_CHOICES = [
@@ -43,7 +188,7 @@ class Recipe(models.Model):
         ('Medium', 'Medium'),
         ('Hard', 'Hard'),
     ]
-    cuisine = models.CharField(max_length=30, choices=CUISINE_CHOICES, blank=True)
+    cuisine = models.CharField(max_length=30, choices=CUISINE_CHOICES, blank=True, db_index=True)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, blank=True)
     prep_time = models.PositiveIntegerField(null=True, blank=True, help_text="Preparation time in minutes")
 
@@ -52,42 +197,46 @@ class Recipe(models.Model):
     featured = models.BooleanField(default=False)
     view_count = models.PositiveIntegerField(default=0)
 
-    def save(self, *args, **kwargs):
-        # Auto-generate slug only if it’s missing
-        if not self.slug:
-            base_slug = slugify(self.title)
-            unique_slug = base_slug
-            counter = 1
-            while Recipe.objects.filter(slug=unique_slug).exists():
-                unique_slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = unique_slug
+    # Review aggregates, kept in sync by reviewApp.signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+
+    objects = RecipeQuerySet.as_manager()
 
+    def save(self, *args, **kwargs):
         # Update timestamp
         self.updated_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        # A new upload waits for the image worker (recipeApp.images); an
+        # already processed file is left alone. The old file's derivatives
+        # stay listed, unused while the image is pending, until the worker
+        # has written the new ones and deletes them
+        if not self.image:
+            if self.image_derivatives:
+                self._dropped_derivatives = self.image_derivatives
+            self.image_status, self.image_processed, self.image_derivatives = self.IMAGE_NONE, '', {}
+        elif self.image.name != self.image_processed:
+            self.image_status = self.IMAGE_PENDING
 
-        # Resize image if possible; if invalid bytes, generate a tiny placeholder to satisfy tests
-        if self.image:
+        # Auto-generate slug only if it’s missing. A concurrent create can
+        # take the same slug first; the unique index rejects ours and a
+        # fresh one is allocated.
+        generated = not self.slug
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            if generated:
+                self.slug = Recipe.objects.allocate_slugs([self.title])[0]
             try:
-                # Ensure file pointer can be opened by PIL from storage
-                self.image.open()
-                img = Image.open(self.image)
-                if img.height > 800 or img.width > 800:
-                    img.thumbnail((800, 800))
-                    img.save(self.image.path)
-            except (FileNotFoundError, UnidentifiedImageError, OSError):
-                try:
-                    from io import BytesIO
-                    img = Image.new('RGB', (10, 10), color='white')
-                    buffer = BytesIO()
-                    img.save(buffer, format='JPEG')
-                    buffer.seek(0)
-                    with open(self.image.path, 'wb') as f:
-                        f.write(buffer.read())
-                except Exception:
-                    pass
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    if self.__dict__.pop('_tags_changed', False):
+                        self._save_tags()
+                return
+            except IntegrityError:
+                if not generated or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+                if not Recipe._base_manager.filter(slug=self.slug).exists():
+                    raise
 
     def __str__(self):
         return self.title
@@ -98,35 +247,226 @@ class Recipe(models.Model):
     def get_update_url(self):
         return reverse('recipe_update', kwargs={'slug': self.slug})
 
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if not self.__dict__.get('_tags_changed'):
+            self.__dict__.pop('_tag_names', None)
+
+    @property
+    def tags(self):
+        """Comma-separated tag names, kept for templates and older callers."""
+        return ','.join(self.get_tag_choices_list())
+
+    @tags.setter
+    def tags(self, value):
+        # Written to RecipeTag when the recipe is saved
+        self._tag_names = normalize_tags(value)
+        self._tags_changed = True
+
     def get_tag_choices_list(self):
-        if not self.tags:
+        names = self.__dict__.get('_tag_names')
+        if names is None:
+            if self.pk is None:
+                names = []
+            elif 'tag_links' in getattr(self, '_prefetched_objects_cache', {}):
+                names = [link.tag.name for link in self.tag_links.all()]
+            else:
+                names = list(self.tag_links.order_by('pk').values_list('tag__name', flat=True))
+            self._tag_names = names
+        return list(names)
+
+    def _save_tags(self):
+        names = self._tag_names
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        wanted = [tag_ids[name] for name in names]
+        if list(self.tag_links.order_by('pk').values_list('tag_id', flat=True)) != wanted:
+            self.tag_links.all().delete()
+            RecipeTag.objects.bulk_create(RecipeTag(recipe=self, tag_id=tag_id) for tag_id in wanted)
+        getattr(self, '_prefetched_objects_cache', {}).pop('tag_links', None)
+
+    @property
+    def image_ready(self):
+        return bool(self.image) and self.image_status == self.IMAGE_READY
+
+    def image_variants(self):
+        """Resized copies of the image, narrowest first, as dicts of width and jpeg/webp URLs."""
+        return self.variants_of(self.image.name, self.image_status, self.image_derivatives)
+
+    @classmethod
+    def variants_of(cls, image, image_status, image_derivatives):
+        """image_variants() from the column values, e.g. of a .values() row."""
+        if not image or image_status != cls.IMAGE_READY:
             return []
-        # Preserve spacing to satisfy tests in App and recipeApp
-        parts = self.tags.split(',')
-        result = []
-        for idx, raw in enumerate(parts):
-            token = raw if idx == 0 else raw  # keep original spacing
-            if token.strip():
-                result.append(token)
-        return result
+        storage = cls._meta.get_field('image').storage
+        return [
+            {'width': int(width), **{key: storage.url(name) for key, name in names.items()}}
+            for width, names in sorted(image_derivatives.items(), key=lambda item: int(item[0]))
+        ]
 
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum([review.rating for review in reviews]) / len(reviews)
-        return 0
+        return self.rating_avg
 
     class Meta:
         verbose_name = 'Recipe'
         verbose_name_plural = 'Recipes'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipe_created_id_idx'),
+            # Export order, and the range scanned by incremental exports
+            models.Index(fields=['updated_at', 'id'], name='recipe_updated_id_idx'),
+        ]
+
+
+class RecipeTag(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='recipe_links')
+
+    class Meta:
+        ordering = ['id']
+        unique_together = ['recipe', 'tag']
+        indexes = [models.Index(fields=['tag', 'recipe'])]
+
+    def __str__(self):
+        return f"{self.recipe_id} #{self.tag_id}"
 
 
 class RecipeView(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
     user = models.ForeignKey('auth.User', null=True, blank=True, on_delete=models.SET_NULL)
-    viewed_at = models.DateTimeField(default=timezone.now)
+    viewed_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self):
         return f"View of {self.recipe.title} at {self.viewed_at}"
+
+
+class RecipeViewRollup(models.Model):
+    """View totals per recipe and time bucket, filled by `rollup_views`."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    bucket = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    unique_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        unique_together = ['recipe', 'bucket']
+        indexes = [models.Index(fields=['bucket'])]
+
+    def __str__(self):
+        return f"{self.views} views of recipe {self.recipe_id} at {self.bucket}"
+
+
+class RecipeViewHourly(RecipeViewRollup):
+    class Meta(RecipeViewRollup.Meta):
+        verbose_name = 'Hourly Recipe Views'
+        verbose_name_plural = 'Hourly Recipe Views'
+
+
+class RecipeViewDaily(RecipeViewRollup):
+    class Meta(RecipeViewRollup.Meta):
+        verbose_name = 'Daily Recipe Views'
+        verbose_name_plural = 'Daily Recipe Views'
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark of `rollup_views`: the last RecipeView id folded into the rollups."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a resumable `import_recipes` run: the last row of its file committed."""
+    name = models.CharField(max_length=255, unique=True)
+    last_row = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ row {self.last_row}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed view score of a recipe within one facet: overall, a cuisine
+    or a tag. Scores are relative to TrendingEpoch so they can be ranked
+    directly; see recipeApp.trending.
+    """
+    FACET_ALL = 'all'
+    FACET_CUISINE = 'cuisine'
+    FACET_TAG = 'tag'
+    FACET_CHOICES = [
+        (FACET_ALL, 'All'),
+        (FACET_CUISINE, 'Cuisine'),
+        (FACET_TAG, 'Tag'),
+    ]
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='trending_scores')
+    facet = models.CharField(max_length=10, choices=FACET_CHOICES)
+    value = models.CharField(max_length=50, blank=True)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ['recipe', 'facet', 'value']
+        indexes = [models.Index(fields=['facet', 'value', '-score'])]
+
+    def __str__(self):
+        return f"{self.recipe_id} {self.facet}:{self.value} = {self.score:.3f}"
+
+
+class TrendingEpoch(models.Model):
+    """Reference time all TrendingScore values are expressed against."""
+    epoch = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Trending epoch {self.epoch}"
+
+
+class RelatedRecipe(models.Model):
+    """Precomputed top-K neighbours of a recipe, maintained by recipeApp.related."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['recipe', 'related']
+        indexes = [models.Index(fields=['recipe', '-score'])]
+
+    def __str__(self):
+        return f"{self.recipe_id} -> {self.related_id} ({self.score})"
+
+
+class ImageJob(models.Model):
+    """
+    A recipe image waiting for (or done with) processing. Queued by
+    recipeApp.signals and drained by the `process_images` command.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='image_jobs')
+    image_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.image_name} ({self.status})"
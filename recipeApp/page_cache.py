@@ -0,0 +1,105 @@
+"""
+Rendered-page cache for recipe_detail.
+
+The shared part of the page (everything but the viewer's navigation and
+search box, save and edit buttons, review form and own-review highlight) is cached per slug under a content version
+token. recipeApp.signals replaces a recipe's token whenever the recipe, one of
+its reviews, or the profile of its author or a reviewer is written, so stale
+pages are never read again and simply expire.
+
+Tokens only work if every worker process reads the same cache: with a
+process-local one (LocMemCache), a worker that missed an invalidation
+would keep serving, and answering 304 for, its old page. The page cache is
+therefore off on LocMemCache, except under DEBUG (a single runserver).
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from recipeApp.models import Recipe
+
+# Placeholders left in the cached body for the per-viewer fragments
+SLOTS = ('my_review', 'search', 'nav', 'actions', 'review_form')
+
+
+def enabled():
+    return settings.DEBUG or not isinstance(caches['default'], LocMemCache)
+
+
+def cache_timeout():
+    return getattr(settings, 'RECIPE_PAGE_CACHE_TIMEOUT', 600)
+
+
+def slot_marker(name):
+    return f'<!--viewer:{name}-->'
+
+
+def _slug_key(slug):
+    return f'recipe_page:slug:{slug}'
+
+
+def _version_key(recipe_id):
+    return f'recipe_page:version:{recipe_id}'
+
+
+def recipe_id_for(slug):
+    """Id of the recipe with ``slug``, or None. Cached; kept current by remember()/forget()."""
+    recipe_id = cache.get(_slug_key(slug)) if enabled() else None
+    if recipe_id is None:
+        recipe_id = Recipe.objects.filter(slug=slug).values_list('pk', flat=True).first()
+        if recipe_id is not None and enabled():
+            cache.set(_slug_key(slug), recipe_id, None)
+    return recipe_id
+
+
+def remember(recipe):
+    cache.set(_slug_key(recipe.slug), recipe.pk, None)
+
+
+def forget(recipe):
+    cache.delete(_slug_key(recipe.slug))
+
+
+def get_version(recipe_id):
+    version = cache.get(_version_key(recipe_id))
+    if version is None:
+        cache.add(_version_key(recipe_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(recipe_id))
+    return version
+
+
+def invalidate(*recipe_ids):
+    """Give each recipe a new content version; its cached pages are never read again."""
+    cache.set_many({_version_key(recipe_id): uuid.uuid4().hex for recipe_id in recipe_ids if recipe_id}, None)
+
+
+def etag(recipe_id):
+    """Weak ETag of the shared page: it changes exactly when the content version does."""
+    return f'W/"{get_version(recipe_id)}"'
+
+
+def page_key(slug, recipe_id):
+    """
+    Cache key of the page at its current version. Read and write with the
+    same key: a page rendered from data that changes meanwhile is stored
+    under the old version, which is never read again.
+    """
+    return f'recipe_page:{slug}:{get_version(recipe_id)}'
+
+
+def get_page(key):
+    """The cached shared page, a dict with 'body' and 'recipe' (id, slug, author_id), or None."""
+    return cache.get(key)
+
+
+def set_page(key, page):
+    cache.set(key, page, cache_timeout())
+
+
+def fill(body, fragments):
+    """Put the viewer's rendered fragments into the cached body."""
+    for name in SLOTS:
+        body = body.replace(slot_marker(name), fragments.get(name, ''), 1)
+    return body
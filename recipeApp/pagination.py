@@ -0,0 +1,145 @@
+"""
+Keyset pagination.
+
+A page is addressed by an opaque cursor holding the ordering values of the
+row it continues from, e.g. (created_at, id) of the last recipe shown.
+Fetching any page is then a range scan of page-size rows on the ordering
+index instead of an OFFSET over every row before it, so a deep page costs
+the same as the first one.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _field_name(field):
+    return field.lstrip('-')
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """(direction, values) from a cursor, with values converted back to field types."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor(token)
+
+    converted = []
+    for field, value in zip(ordering, values):
+        try:
+            model_field = model._meta.get_field(_field_name(field))
+        except FieldDoesNotExist:
+            converted.append(value)  # an annotation, e.g. a search rank
+            continue
+        try:
+            converted.append(model_field.to_python(value))
+        except ValidationError:
+            raise InvalidCursor(token)
+    return direction, converted
+
+
+def seek(ordering, values, forward=True):
+    """Rows strictly after ``values`` in ``ordering`` (before them when not ``forward``)."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = _field_name(field)
+        lookup = 'lt' if field.startswith('-') == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class KeysetPage:
+    """One page of rows, with cursors for its neighbours."""
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _values(self, row):
+        if isinstance(row, dict):  # from a .values() queryset
+            return [row[_field_name(field)] for field in self.ordering]
+        return [getattr(row, _field_name(field)) for field in self.ordering]
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(NEXT, self._values(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(PREVIOUS, self._values(self.object_list[0]))
+
+
+def paginate(queryset, cursor=None, per_page=10, ordering=DEFAULT_ORDERING):
+    """
+    The page of ``queryset`` that ``cursor`` points at (the first page when
+    it is empty). The last ordering field must be unique, e.g. the id.
+    Raises InvalidCursor for a cursor this queryset did not produce.
+    """
+    direction, values = NEXT, None
+    if cursor:
+        direction, values = decode_cursor(cursor, queryset.model, ordering)
+    forward = direction == NEXT
+
+    if values is None:
+        rows = queryset.order_by(*ordering)
+    elif forward:
+        rows = queryset.filter(seek(ordering, values)).order_by(*ordering)
+    else:
+        rows = queryset.filter(seek(ordering, values, forward=False)).order_by(*map(_flip, ordering))
+
+    rows = list(rows[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if forward:
+        return KeysetPage(rows, ordering, has_next=more, has_previous=values is not None)
+    rows.reverse()
+    return KeysetPage(rows, ordering, has_next=True, has_previous=more)
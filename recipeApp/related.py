@@ -0,0 +1,142 @@
+"""
+Related recipes.
+
+Each recipe keeps its top-K neighbours in RelatedRecipe, scored on shared
+tags, cuisine, difficulty and author. When a recipe is created or edited its
+own list is recomputed from a bounded candidate set, and it is merged into
+the lists of those candidates, so recipe_detail only has to read K rows.
+Lists it drops out of, or is deleted from, are recomputed the same way.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from recipeApp.models import Recipe, RelatedRecipe
+
+TAG_WEIGHT = 3.0
+CUISINE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 1.5
+DIFFICULTY_WEIGHT = 1.0
+
+# Most recent recipes considered per candidate source (author, cuisine, tag)
+CANDIDATES_PER_SOURCE = 200
+
+
+def top_k():
+    return getattr(settings, 'RELATED_RECIPES_K', 8)
+
+
+def tag_set(recipe):
+    return set(recipe.get_tag_choices_list())
+
+
+def similarity(recipe, other):
+    score = TAG_WEIGHT * len(tag_set(recipe) & tag_set(other))
+    if recipe.cuisine and recipe.cuisine == other.cuisine:
+        score += CUISINE_WEIGHT
+    if recipe.author_id == other.author_id:
+        score += AUTHOR_WEIGHT
+    if recipe.difficulty and recipe.difficulty == other.difficulty:
+        score += DIFFICULTY_WEIGHT
+    return score
+
+
+def candidates(recipe):
+    """Recipes sharing an author, cuisine or tag with ``recipe``."""
+    base = (
+        Recipe.objects.exclude(pk=recipe.pk)
+        .only('pk', 'author_id', 'cuisine', 'difficulty')
+        .prefetch_related('tag_links__tag')
+    )
+    filters = [Q(author_id=recipe.author_id)]
+    if recipe.cuisine:
+        filters.append(Q(cuisine=recipe.cuisine))
+    filters.extend(Q(tag_links__tag__name=tag) for tag in tag_set(recipe))
+
+    found = {}
+    for condition in filters:
+        for other in base.filter(condition).order_by('-created_at')[:CANDIDATES_PER_SOURCE]:
+            found[other.pk] = other
+    return list(found.values())
+
+
+def _best(scored, k):
+    """Highest scores first; newer recipes (higher pk) win ties."""
+    return sorted(scored, key=lambda item: (-item[1], -item[0]))[:k]
+
+
+def refresh_related(recipe, propagate=True, changed=None):
+    """
+    Recompute ``recipe``'s neighbours and, with ``propagate``, merge it into
+    theirs. A full rebuild refreshes every recipe without propagating.
+    ``changed`` is scored as given rather than as stored: post_save runs
+    before a recipe's new tags are written.
+    """
+    k = top_k()
+    others = {other.pk: other for other in candidates(recipe)}
+    if changed is not None:
+        others[changed.pk] = changed
+    scored = [(pk, similarity(recipe, other)) for pk, other in others.items()]
+    scored = [(pk, score) for pk, score in scored if score > 0]
+    scores = dict(scored)
+
+    with transaction.atomic():
+        RelatedRecipe.objects.filter(recipe=recipe).delete()
+        RelatedRecipe.objects.bulk_create(
+            RelatedRecipe(recipe=recipe, related_id=pk, score=score) for pk, score in _best(scored, k)
+        )
+        if not propagate:
+            return
+
+        # Drop the recipe from every list; it is re-added below where it still belongs
+        previous = dict(RelatedRecipe.objects.filter(related=recipe).values_list('recipe_id', 'score'))
+        RelatedRecipe.objects.filter(related=recipe).delete()
+
+        # A list the recipe left, or now ranks lower in, may have a better
+        # candidate outside it: recompute those instead of merging
+        stale = {pk for pk, score in previous.items() if scores.get(pk, 0) < score}
+
+        neighbour_lists = {}
+        for row in RelatedRecipe.objects.filter(recipe_id__in=list(scores)):
+            neighbour_lists.setdefault(row.recipe_id, []).append(row)
+
+        to_create, to_drop = [], []
+        for pk, score in scored:
+            if pk in stale:
+                continue
+            current = neighbour_lists.get(pk, [])
+            kept = _best([(row.related_id, row.score) for row in current] + [(recipe.pk, score)], k)
+            kept_ids = {related_id for related_id, _ in kept}
+            if recipe.pk in kept_ids:
+                to_create.append(RelatedRecipe(recipe_id=pk, related=recipe, score=score))
+            to_drop.extend(row.pk for row in current if row.related_id not in kept_ids)
+
+        RelatedRecipe.objects.filter(pk__in=to_drop).delete()
+        RelatedRecipe.objects.bulk_create(to_create)
+        refill(stale, changed=recipe)
+
+
+def listed_in(recipe):
+    """Ids of the recipes whose lists include ``recipe``."""
+    return list(RelatedRecipe.objects.filter(related=recipe).values_list('recipe_id', flat=True))
+
+
+def refill(recipe_ids, changed=None):
+    """Recompute the lists of ``recipe_ids`` without propagating, e.g. after a neighbour left them."""
+    recipes = (
+        Recipe.objects.filter(pk__in=list(recipe_ids))
+        .only('pk', 'author_id', 'cuisine', 'difficulty')
+        .prefetch_related('tag_links__tag')
+    )
+    for recipe in recipes:
+        refresh_related(recipe, propagate=False, changed=changed)
+
+
+def related_recipes(recipe, limit=4):
+    """Stored neighbours of ``recipe``, best first."""
+    return (
+        Recipe.objects.filter(related_from__recipe=recipe)
+        .select_related('author__user')
+        .prefetch_related('tag_links__tag')
+        .order_by('-related_from__score', '-pk')[:limit]
+    )
@@ -0,0 +1,182 @@
+"""
+Full-text recipe search.
+
+On SQLite the title, ingredients, instructions and tags of every recipe are
+mirrored into an FTS5 table (created by migration 0010, kept in sync by
+recipeApp.signals, rebuilt by `manage.py rebuild_search_index`). Searches are ranked with BM25 and can
+return highlighted snippets. Other databases fall back to icontains.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from recipeApp.models import Recipe, RecipeTag, Tag
+
+FTS_TABLE = 'recipeApp_recipe_fts'
+FTS_COLUMNS = ('title', 'ingredients', 'instructions', 'tags')
+# BM25 column weights, in FTS_COLUMNS order: title matches count most
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 5.0)
+
+# Best match first (bm25() is lower for better matches), newest first on ties
+RANKED_ORDERING = ('search_rank', '-created_at', '-id')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Highlight markers used inside snippet(); the snippet text is escaped before
+# they become <mark> tags, so recipe content can't inject HTML.
+MARK_OPEN = '\x02'
+MARK_CLOSE = '\x03'
+
+
+def max_results():
+    """Most results one search API query returns, over all its pages or streamed."""
+    return getattr(settings, 'RECIPE_SEARCH_MAX_RESULTS', 1000)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match, as a
+    prefix, so user input can never inject FTS query syntax.
+    """
+    tokens = TOKEN_RE.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def index_recipe(recipe):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [recipe.pk])
+        cursor.execute(
+            f'INSERT INTO "{FTS_TABLE}" (rowid, {", ".join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)',
+            [recipe.pk] + [getattr(recipe, column) or '' for column in FTS_COLUMNS],
+        )
+
+
+def remove_recipe(recipe_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [recipe_id])
+
+
+def _mirror_sql(where=''):
+    """INSERT ... SELECT copying recipes (optionally filtered by ``where``) into the FTS table."""
+    table = Recipe._meta.db_table
+    links, tags = RecipeTag._meta.db_table, Tag._meta.db_table
+    # Tag names are joined in the order they were given, like Recipe.tags
+    tag_names = (
+        f'SELECT group_concat(name, \',\') FROM (SELECT t.name FROM "{links}" rt '
+        f'JOIN "{tags}" t ON t.id = rt.tag_id WHERE rt.recipe_id = r.id ORDER BY rt.id)'
+    )
+    return (
+        f'INSERT INTO "{FTS_TABLE}" (rowid, {", ".join(FTS_COLUMNS)}) '
+        f'SELECT r.id, r.title, r.ingredients, r.instructions, coalesce(({tag_names}), \'\') FROM "{table}" r {where}'
+    )
+
+
+def index_recipes(recipe_ids):
+    """Mirror many recipes at once, e.g. after a bulk_create that fired no signals."""
+    recipe_ids = list(recipe_ids)
+    if not fts_enabled() or not recipe_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid IN ({placeholders})', recipe_ids)
+        cursor.execute(_mirror_sql(f'WHERE r.id IN ({placeholders})'), recipe_ids)
+
+
+def rebuild_index():
+    """Re-mirror every recipe into the FTS table. Returns the row count."""
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{FTS_TABLE}"')
+        cursor.execute(_mirror_sql())
+        cursor.execute(f'INSERT INTO "{FTS_TABLE}" ("{FTS_TABLE}") VALUES (\'optimize\')')
+        cursor.execute(f'SELECT count(*) FROM "{FTS_TABLE}"')
+        return cursor.fetchone()[0]
+
+
+def search_recipes(queryset, query, limit=None):
+    """
+    Restrict ``queryset`` to recipes matching ``query``, ordered by relevance
+    (best first). Each row is annotated with ``search_rank``. With ``limit``,
+    only the ``limit`` best matches within ``queryset`` are kept, chosen in
+    the full-text subquery, so a query matching most of the catalogue is
+    ranked and sorted over that many rows at most. Filter ``queryset``
+    before searching it, not after, or the limit cuts matches the filters
+    would have kept.
+    """
+    if not fts_enabled():
+        matches = Q(title__icontains=query) | Q(ingredients__icontains=query) | Q(instructions__icontains=query)
+        matches |= Q(pk__in=RecipeTag.objects.filter(tag__name__icontains=query).values('recipe_id'))
+        if limit is None:
+            return queryset.filter(matches)
+        newest = queryset.filter(matches).order_by('-created_at', '-id').values('pk')[:limit]
+        return queryset.filter(pk__in=newest)
+
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    table = Recipe._meta.db_table
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    rank = RawSQL(
+        f'SELECT bm25("{FTS_TABLE}", {weights}) FROM "{FTS_TABLE}" '
+        f'WHERE "{FTS_TABLE}" MATCH %s AND rowid = "{table}"."id"',
+        [match],
+        output_field=FloatField(),
+    )
+    if limit is None:
+        matching_ids = RawSQL(f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s', [match])
+    else:
+        within, within_params = queryset.order_by().values('pk').query.sql_with_params()
+        # "+rowid" keeps SQLite from handing the IN list to FTS5 as one rowid lookup per recipe
+        matching_ids = RawSQL(
+            f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s AND +rowid IN ({within}) '
+            f'ORDER BY bm25("{FTS_TABLE}", {weights}) LIMIT %s',
+            [match, *within_params, limit],
+        )
+    return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank).order_by(*RANKED_ORDERING)
+
+
+def attach_snippets(recipes, query, tokens=12):
+    """
+    Set ``search_snippet`` on each recipe: the best matching fragment,
+    HTML-escaped, with the matched terms wrapped in <mark>. One query for
+    the whole page.
+    """
+    recipes = list(recipes)
+    for recipe in recipes:
+        recipe.search_snippet = ''
+    match = build_match(query)
+    if not recipes or not match or not fts_enabled():
+        return recipes
+
+    ids = [recipe.pk for recipe in recipes]
+    snippets = {}
+    with connection.cursor() as cursor:
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'SELECT rowid, snippet("{FTS_TABLE}", -1, %s, %s, %s, %s) FROM "{FTS_TABLE}" '
+                f'WHERE "{FTS_TABLE}" MATCH %s AND rowid IN ({placeholders})',
+                [MARK_OPEN, MARK_CLOSE, '…', tokens, match] + chunk,
+            )
+            snippets.update(cursor.fetchall())
+    for recipe in recipes:
+        snippet = escape(snippets.get(recipe.pk, ''))
+        recipe.search_snippet = mark_safe(snippet.replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>'))
+    return recipes
+
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.contrib.auth.models import User
+from recipeApp.models import Recipe
+from recipeApp import facets, images, page_cache, related, search, trending
+from reviewApp.models import Review
+from userApp.models import UserProfile
+
+
+@receiver(post_save, sender=Recipe)
+def sync_trending_facets(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the recipe's trending rows in step with its cuisine and tags."""
+    if created:
+        return  # rows are created with the recipe's first view
+    if update_fields is not None and not {'cuisine', 'tags'} & set(update_fields):
+        return
+    if instance.trending_scores.exists():
+        trending.sync_facets(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_related_recipes(sender, instance, created, update_fields=None, **kwargs):
+    """Recompute the recipe's neighbours when anything they are scored on changes."""
+    if update_fields is not None and not {'tags', 'cuisine', 'difficulty', 'author'} & set(update_fields):
+        return
+    related.refresh_related(instance)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_related_lists(sender, instance, **kwargs):
+    # The recipe's rows in other lists cascade away with it
+    instance._listed_in = related.listed_in(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def refill_related_lists(sender, instance, **kwargs):
+    """Recompute the lists the deleted recipe was in, so they are back to K neighbours."""
+    related.refill(getattr(instance, '_listed_in', ()))
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Mirror the searchable fields into the full-text index."""
+    if update_fields is not None and not set(search.FTS_COLUMNS) & set(update_fields):
+        return
+    search.index_recipe(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def queue_image_processing(sender, instance, **kwargs):
+    """Hand a new upload to the image worker instead of resizing it in the request."""
+    if instance.image_status == Recipe.IMAGE_PENDING:
+        images.enqueue(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def delete_dropped_derivatives(sender, instance, **kwargs):
+    """The image was removed; its resized copies go once that commits."""
+    dropped = instance.__dict__.pop('_dropped_derivatives', None)
+    if dropped:
+        transaction.on_commit(lambda: images.delete_derivatives(dropped))
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_derivatives(sender, instance, **kwargs):
+    derivatives = instance.image_derivatives
+    if derivatives:
+        transaction.on_commit(lambda: images.delete_derivatives(derivatives))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_recipe(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_facets(sender, **kwargs):
+    """Drop cached facet counts, again once the write (and its tags) commits."""
+    facets.invalidate()
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_page(sender, instance, **kwargs):
+    page_cache.remember(instance)
+    page_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_recipe_page(sender, instance, **kwargs):
+    page_cache.forget(instance)
+    page_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=User)
+def invalidate_pages_showing_user(sender, instance, update_fields=None, **kwargs):
+    """Recipe pages show their author's and reviewers' names and avatars."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    authored = Recipe.objects.filter(author__user_id=user_id).values_list('pk', flat=True)
+    reviewed = Review.objects.filter(user_id=user_id).values_list('recipe_id', flat=True)
+    page_cache.invalidate(*set(authored) | set(reviewed))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=User)
+def touch_authored_recipes(sender, instance, update_fields=None, **kwargs):
+    """The API and the export embed the author's name; move updated_at so validators and exports see it."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    Recipe.objects.filter(author__user_id=user_id).update(updated_at=timezone.now())
@@ -0,0 +1,24 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('recipes/partials/picture.html')
+def recipe_picture(recipe, sizes='100vw', width=320, css_class='', loading='lazy'):
+    """
+    The recipe's image as a <picture> offering its WebP and JPEG copies by
+    width. ``width`` picks the fallback src for browsers without srcset.
+    Falls back to the original file when no copies exist yet.
+    """
+    variants = recipe.image_variants()
+    fallback = next((v for v in variants if v['width'] >= width), variants[-1] if variants else None)
+    return {
+        'recipe': recipe,
+        'variants': variants,
+        'src': fallback['jpeg'] if fallback else recipe.image.url,
+        'jpeg_srcset': ', '.join(f"{v['jpeg']} {v['width']}w" for v in variants),
+        'webp_srcset': ', '.join(f"{v['webp']} {v['width']}w" for v in variants),
+        'sizes': sizes,
+        'css_class': css_class,
+        'loading': loading,
+    }
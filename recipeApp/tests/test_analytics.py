@@ -0,0 +1,71 @@
+import os
+import tempfile
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from recipeApp.models import Recipe, RecipeView, RecipeViewDaily, RecipeViewHourly
+from recipeApp.analytics import prune_raw_views, rollup_new_views
+from userApp.models import UserProfile
+
+
+class RecipeViewRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='analyst', password='testpass123')
+        self.other_user = User.objects.create_user(username='visitor', password='testpass123')
+        profile = UserProfile.objects.create(user=self.user)
+        self.recipe = Recipe.objects.create(
+            author=profile, title='Kitfo', description='Minced beef',
+            ingredients='beef, mitmita, kibbeh', instructions='Mince beef and mix with spices.',
+        )
+        self.other_recipe = Recipe.objects.create(
+            author=profile, title='Tibs', description='Sauteed beef',
+            ingredients='beef, onion, rosemary', instructions='Saute beef with onion.',
+        )
+        self.hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+
+    def add_views(self, recipe, count, user=None, at=None):
+        RecipeView.objects.bulk_create(
+            RecipeView(recipe=recipe, user=user, viewed_at=at or self.hour + timedelta(minutes=5))
+            for _ in range(count)
+        )
+
+    def test_rollup_counts_views_and_unique_users(self):
+        self.add_views(self.recipe, 3, user=self.user)
+        self.add_views(self.recipe, 2, user=self.other_user)
+        self.add_views(self.recipe, 1)
+
+        self.assertEqual(rollup_new_views(), 6)
+        hourly = RecipeViewHourly.objects.get(recipe=self.recipe)
+        self.assertEqual(hourly.bucket, self.hour)
+        self.assertEqual(hourly.views, 6)
+        self.assertEqual(hourly.unique_users, 2)
+        self.assertEqual(RecipeViewDaily.objects.get(recipe=self.recipe).views, 6)
+
+    def test_rollup_is_incremental(self):
+        self.add_views(self.recipe, 2, user=self.user)
+        rollup_new_views(batch_size=1)
+        self.assertEqual(rollup_new_views(), 0)
+
+        self.add_views(self.recipe, 1, user=self.other_user)
+        self.assertEqual(rollup_new_views(), 1)
+        hourly = RecipeViewHourly.objects.get(recipe=self.recipe)
+        self.assertEqual(hourly.views, 3)
+        self.assertEqual(hourly.unique_users, 2)
+
+    def test_prune_only_removes_rolled_up_rows(self):
+        old = timezone.now() - timedelta(days=40)
+        self.add_views(self.recipe, 2, at=old)
+        rollup_new_views()
+        self.add_views(self.recipe, 1, at=old)
+
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        pruned = prune_raw_views(timezone.now() - timedelta(days=30), archive_path=path)
+
+        self.assertEqual(pruned, 2)
+        self.assertEqual(RecipeView.objects.count(), 1)
+        with open(path) as archive:
+            self.assertEqual(len(archive.readlines()), 2)
+        self.assertEqual(RecipeViewDaily.objects.get(recipe=self.recipe).views, 2)
@@ -0,0 +1,112 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from recipeApp.models import Recipe
+from recipeApp.tracking import view_buffer
+from reviewApp.models import Review
+from userApp.models import UserProfile
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_buffer.clear()
+        self.chef = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=self.chef)
+        self.recipe = Recipe.objects.create(
+            author=self.profile, title='Shiro', description='d', ingredients='i', instructions='s', tags='dinner',
+        )
+        Recipe.objects.create(author=self.profile, title='Misir', description='d', ingredients='i', instructions='s')
+
+    def tearDown(self):
+        view_buffer.clear()
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, headers={'If-None-Match': response['ETag'], **headers})
+
+    def test_detail_api_etag(self):
+        url = reverse('api_recipe_detail', args=[self.recipe.slug])
+        first = self.client.get(url)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+
+        with self.assertNumQueries(1):
+            response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.content, b'')
+
+        Review.objects.create(recipe=self.recipe, user=User.objects.create(username='critic'), rating=5)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_detail_api_if_modified_since(self):
+        url = reverse('api_recipe_detail', args=[self.recipe.slug])
+        first = self.client.get(url)
+        self.assertEqual(first['Last-Modified'], http_date(self.recipe.updated_at.timestamp()))
+        response = self.client.get(url, headers={'If-Modified-Since': first['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            updated_at=self.recipe.updated_at + datetime.timedelta(minutes=1),
+        )
+        response = self.client.get(url, headers={'If-Modified-Since': first['Last-Modified']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_api_etag(self):
+        url = reverse('api_recipe_list') + '?tag=dinner'
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        # Another page or another filter is another representation
+        self.assertEqual(self.revalidate(reverse('api_recipe_list'), first).status_code, 200)
+
+        # Deleting a recipe leaves max(updated_at) alone but changes the count
+        Recipe.objects.create(author=self.profile, title='Tibs', description='d', ingredients='i', instructions='s', tags='dinner')
+        second = self.client.get(url)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        Recipe.objects.get(title='Shiro').delete()
+        self.assertEqual(self.revalidate(url, second).status_code, 200)
+
+    def test_list_api_etag_follows_review_edits(self):
+        review = Review.objects.create(recipe=self.recipe, user=User.objects.create(username='critic'), rating=4, comment='good')
+        url = reverse('api_recipe_list') + '?expand=reviews'
+        first = self.client.get(url)
+        review.comment = 'very good'
+        review.save()  # same rating, so the aggregates do not change
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'very good')
+
+    def test_list_api_etag_follows_author_renames(self):
+        url = reverse('api_recipe_list')
+        first = self.client.get(url)
+        self.chef.first_name, self.chef.last_name = 'Almaz', 'Tesfaye'
+        self.chef.save()
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['author']['name'], 'Almaz Tesfaye')
+        # Signing in does not count as a change
+        self.chef.last_login = self.chef.date_joined
+        self.chef.save(update_fields=['last_login'])
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    def test_recipe_page_etag_for_anonymous_viewers(self):
+        url = reverse('recipe_detail', args=[self.recipe.slug])
+        first = self.client.get(url)
+        buffered = len(view_buffer)
+        with self.assertNumQueries(0):
+            response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(view_buffer), buffered + 1)  # still counted as a view
+
+        self.recipe.title = 'Shiro Wat'
+        self.recipe.save()
+        self.assertContains(self.revalidate(url, first), 'Shiro Wat')
+
+    def test_recipe_page_is_not_validated_for_signed_in_viewers(self):
+        self.client.force_login(self.chef)
+        response = self.client.get(reverse('recipe_detail', args=[self.recipe.slug]))
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,105 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from recipeApp import export
+from recipeApp.models import Recipe
+from reviewApp.models import Review
+from userApp.models import UserProfile
+
+
+class RecipeExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='almaz', password='pass', first_name='Almaz', last_name='Kebede')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.url = reverse('api_recipe_export')
+
+    def make(self, title, **fields):
+        return Recipe.objects.create(
+            author=self.profile, title=title, description='d', ingredients='i', instructions='s', **fields,
+        )
+
+    def lines(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_one_line_per_recipe_with_author_and_rating(self):
+        shiro = self.make('Shiro', tags='dinner,fasting', cuisine='Ethiopian')
+        self.make('Injera')
+        Review.objects.create(recipe=shiro, user=self.user, rating=4, comment='good')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertTrue(response.streaming)
+        rows = self.lines(b''.join(response.streaming_content))
+
+        self.assertEqual([row['title'] for row in rows], ['Injera', 'Shiro'])
+        row = rows[1]
+        self.assertEqual(row['slug'], 'shiro')
+        self.assertEqual(row['tags'], ['dinner', 'fasting'])
+        self.assertEqual(row['author'], {'id': self.profile.pk, 'username': 'almaz', 'name': 'Almaz Kebede'})
+        self.assertEqual((row['rating_avg'], row['rating_count']), (4.0, 1))
+        self.assertIsNone(row['image'])
+
+    def test_updated_since_includes_rating_changes(self):
+        old = self.make('Shiro')
+        self.make('Injera')
+        Recipe.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        cutoff = timezone.now() - timedelta(days=1)
+        self.make('Tibs')
+        Review.objects.create(recipe=old, user=self.user, rating=5, comment='!')
+
+        response = self.client.get(self.url, {'updated_since': cutoff.isoformat()})
+        self.assertEqual([row['title'] for row in self.lines(b''.join(response.streaming_content))], ['Tibs', 'Shiro'])
+        response = self.client.get(self.url, {'updated_since': (cutoff + timedelta(days=2)).date().isoformat()})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_bad_updated_since(self):
+        response = self.client.get(self.url, {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('updated_since', response.json())
+
+    def test_gzip_when_accepted(self):
+        self.make('Shiro')
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = self.lines(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(rows[0]['title'], 'Shiro')
+
+    def test_rows_are_fetched_in_chunks(self):
+        for i in range(5):
+            self.make(f'Recipe {i}', tags='dinner')
+
+        def queries(chunk):
+            with CaptureQueriesContext(connection) as captured:
+                rows = b''.join(export.iter_ndjson(chunk=chunk)).splitlines()
+            self.assertEqual(len(rows), 5)
+            return len(captured)
+
+        # One recipe query, plus a tag-link and a tag query per chunk
+        self.assertEqual(queries(100), 3)
+        self.assertEqual(queries(2), 7)
+
+    def test_command_writes_gzipped_file(self):
+        self.make('Shiro')
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        path = os.path.join(workdir, 'recipes.ndjson.gz')
+        out = io.StringIO()
+        call_command('export_recipes', '--output', path, '--gzip', stdout=out)
+        self.assertIn('Wrote', out.getvalue())
+        with gzip.open(path) as exported:
+            self.assertEqual(self.lines(exported.read())[0]['author']['username'], 'almaz')
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from recipeApp import facets
+from recipeApp.models import Recipe
+from userApp.models import UserProfile
+
+
+class RecipeFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+        self.make('Shiro', 'dinner,fasting', cuisine='Ethiopian', difficulty='Easy', prep_time=20)
+        self.make('Doro Wat', 'dinner', cuisine='Ethiopian', difficulty='Hard', prep_time=90)
+        self.make('Pancakes', 'breakfast', cuisine='American', difficulty='Easy', prep_time=10)
+        self.make('Tea', '')
+
+    def make(self, title, tags, **fields):
+        return Recipe.objects.create(
+            author=self.profile, title=title, description='d',
+            ingredients='i', instructions='s', tags=tags, **fields,
+        )
+
+    def filters(self, query=''):
+        return facets.parse_filters(QueryDict(query))
+
+    def test_counts_every_facet_in_one_query(self):
+        with self.assertNumQueries(1):
+            result = facets.compute_facets(self.filters())
+        self.assertEqual(result['tags'], [
+            {'value': 'dinner', 'count': 2},
+            {'value': 'breakfast', 'count': 1},
+            {'value': 'fasting', 'count': 1},
+        ])
+        self.assertEqual(result['cuisine'], [
+            {'value': 'Ethiopian', 'count': 2},
+            {'value': 'American', 'count': 1},
+        ])
+        self.assertEqual(result['difficulty'], [
+            {'value': 'Easy', 'count': 2},
+            {'value': 'Hard', 'count': 1},
+        ])
+        self.assertEqual(result['prep_time'], [
+            {'value': 15, 'count': 1},
+            {'value': 30, 'count': 2},
+            {'value': 60, 'count': 2},
+            {'value': 120, 'count': 3},
+        ])
+
+    def test_counts_follow_filters(self):
+        result = facets.compute_facets(self.filters('cuisine=Ethiopian&tag=dinner'))
+        self.assertEqual(result['tags'], [{'value': 'dinner', 'count': 2}, {'value': 'fasting', 'count': 1}])
+        self.assertEqual(result['cuisine'], [{'value': 'Ethiopian', 'count': 2}])
+
+    def test_cache_key_ignores_order_and_case(self):
+        first = facets.cache_key(self.filters('tag=dinner&tag=Fasting&q=Wat'))
+        second = facets.cache_key(self.filters('tag=fasting&tag=dinner&q=wat'))
+        self.assertEqual(first, second)
+
+    def test_results_are_cached_until_a_recipe_changes(self):
+        facets.facet_counts(self.filters())
+        with self.assertNumQueries(0):
+            facets.facet_counts(self.filters())
+
+        self.make('Firfir', 'breakfast')
+        result = facets.facet_counts(self.filters())
+        self.assertIn({'value': 'breakfast', 'count': 2}, result['tags'])
+
+    def test_list_api_includes_facets(self):
+        response = self.client.get(reverse('api_recipe_list'), {'cuisine': 'Ethiopian', 'count': 'true'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['facets']['cuisine'], [{'value': 'Ethiopian', 'count': 2}])
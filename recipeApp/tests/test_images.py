@@ -0,0 +1,313 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from recipeApp import images
+from recipeApp.models import ImageJob, Recipe, validate_image_pixels
+from recipeApp.tracking import view_buffer
+from userApp.models import UserProfile
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def jpeg_upload(name='dish.jpg', size=(1200, 900)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color='orange').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def png_upload(name='dish.png', size=(400, 400)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color='orange').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageQueueTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+
+    def tearDown(self):
+        view_buffer.clear()
+
+    def make(self, image):
+        return Recipe.objects.create(
+            author=self.profile, title='Shiro', description='d',
+            ingredients='i', instructions='s', image=image,
+        )
+
+    def test_upload_is_queued_not_processed_in_request(self):
+        recipe = self.make(jpeg_upload())
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_PENDING)
+        self.assertEqual(ImageJob.objects.filter(recipe=recipe, status=ImageJob.STATUS_QUEUED).count(), 1)
+        with Image.open(recipe.image.path) as img:
+            self.assertEqual(img.size, (1200, 900))
+
+    def test_worker_resizes_and_marks_ready(self):
+        recipe = self.make(jpeg_upload())
+        self.assertEqual(images.process_pending(), 1)
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_READY)
+        self.assertEqual(recipe.image_processed, recipe.image.name)
+        with Image.open(recipe.image.path) as img:
+            self.assertEqual(img.size, (800, 600))
+        self.assertEqual(ImageJob.objects.get(recipe=recipe).status, ImageJob.STATUS_DONE)
+
+    def test_processed_image_is_never_decoded_again(self):
+        recipe = self.make(jpeg_upload())
+        images.process_pending()
+        recipe.refresh_from_db()
+
+        recipe.title = 'Shiro Wat'
+        recipe.save()
+        Recipe.objects.get(pk=recipe.pk).save()
+        self.assertEqual(ImageJob.objects.count(), 1)
+        with mock.patch.object(images, 'process_image') as resize:
+            self.assertEqual(images.process_pending(), 0)
+        resize.assert_not_called()
+
+    def test_replaced_upload_skips_the_stale_job(self):
+        recipe = self.make(jpeg_upload('first.jpg'))
+        recipe.image = jpeg_upload('second.jpg')
+        recipe.save()
+        self.assertEqual(ImageJob.objects.count(), 2)
+
+        with mock.patch.object(images, 'process_image', wraps=images.process_image) as resize:
+            images.process_pending()
+        self.assertEqual(resize.call_count, 1)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_READY)
+        self.assertIn('second', recipe.image_processed)
+
+    def test_undecodable_upload_fails_without_retries(self):
+        recipe = self.make(SimpleUploadedFile('bad.jpg', b'not an image', content_type='image/jpeg'))
+        images.process_pending()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_FAILED)
+        job = ImageJob.objects.get(recipe=recipe)
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_FAILED, 1))
+
+    @override_settings(RECIPE_IMAGE_MAX_ATTEMPTS=2)
+    def test_transient_errors_are_retried(self):
+        recipe = self.make(jpeg_upload())
+        with mock.patch.object(images, 'process_image', side_effect=OSError('disk busy')):
+            images.process_pending()
+        job = ImageJob.objects.get(recipe=recipe)
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_FAILED, 2))
+
+    @override_settings(RECIPE_IMAGE_MAX_ATTEMPTS=2)
+    def test_missing_file_is_retried_only_while_the_job_is_young(self):
+        recipe = self.make(jpeg_upload())
+        recipe.image.storage.delete(recipe.image.name)
+        images.process_pending(limit=1)
+        job = ImageJob.objects.get(recipe=recipe)
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_QUEUED, 1))
+
+        ImageJob.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        images.process_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_FAILED, 2))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        recipe = self.make(jpeg_upload())
+        ImageJob.objects.update(status=ImageJob.STATUS_RUNNING, started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(images.requeue_stale(timedelta(minutes=10)), 1)
+        call_command('process_images', '--once', stdout=io.StringIO())
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_READY)
+
+    def test_detail_page_shows_placeholder_until_ready(self):
+        recipe = self.make(jpeg_upload())
+        url = reverse('recipe_detail', kwargs={'slug': recipe.slug})
+        response = self.client.get(url)
+        self.assertContains(response, 'still being processed')
+        self.assertNotContains(response, recipe.image.url)
+
+        images.process_pending()
+        response = self.client.get(url)
+        self.assertNotContains(response, 'still being processed')
+        self.assertContains(response, '_jpg-800.jpg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageDerivativeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+
+    def make(self, image):
+        recipe = Recipe.objects.create(
+            author=self.profile, title='Shiro', description='d',
+            ingredients='i', instructions='s', image=image,
+        )
+        images.process_pending()
+        recipe.refresh_from_db()
+        return recipe
+
+    def test_jpeg_and_webp_written_per_width(self):
+        recipe = self.make(jpeg_upload(size=(1600, 1200)))
+        self.assertEqual(sorted(recipe.image_derivatives, key=int), ['160', '320', '640', '800'])
+        for width, names in recipe.image_derivatives.items():
+            for key, image_format in (('jpeg', 'JPEG'), ('webp', 'WEBP')):
+                with Image.open(recipe.image.storage.path(names[key])) as img:
+                    self.assertEqual((img.format, img.width), (image_format, int(width)))
+
+    def test_small_image_is_not_upscaled(self):
+        recipe = self.make(jpeg_upload(size=(500, 400)))
+        self.assertEqual(sorted(recipe.image_derivatives, key=int), ['160', '320', '500'])
+
+    def test_transparent_png_is_flattened(self):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (400, 400), (0, 0, 0, 0)).save(buffer, format='PNG')
+        recipe = self.make(SimpleUploadedFile('clear.png', buffer.getvalue(), content_type='image/png'))
+        with Image.open(recipe.image.storage.path(recipe.image_derivatives['160']['jpeg'])) as img:
+            self.assertEqual(img.getpixel((0, 0)), (255, 255, 255))
+
+    def paths(self, recipe):
+        return [recipe.image.storage.path(name) for name in images.derivative_names(recipe.image_derivatives)]
+
+    def test_new_upload_replaces_old_derivatives(self):
+        recipe = self.make(jpeg_upload())
+        old = self.paths(recipe)
+        recipe.image = jpeg_upload('other.jpg')
+        recipe.save()
+        self.assertEqual(recipe.image_variants(), [])
+
+        images.process_pending()
+        recipe.refresh_from_db()
+        self.assertTrue(all(os.path.exists(path) for path in self.paths(recipe)))
+        self.assertFalse(any(os.path.exists(path) for path in old))
+
+    def test_removed_image_and_deleted_recipe_take_their_derivatives(self):
+        removed = self.make(jpeg_upload())
+        old = self.paths(removed)
+        removed.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            removed.save()
+        self.assertEqual(removed.image_derivatives, {})
+        self.assertFalse(any(os.path.exists(path) for path in old))
+
+        deleted = self.make(jpeg_upload())
+        old = self.paths(deleted)
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+        self.assertFalse(any(os.path.exists(path) for path in old))
+
+    def test_list_page_emits_srcset(self):
+        self.make(jpeg_upload())
+        response = self.client.get(reverse('recipe_list'))
+        self.assertContains(response, '<source type="image/webp" srcset="')
+        self.assertContains(response, '-160.webp 160w')
+
+    def test_api_returns_variant_urls(self):
+        recipe = self.make(jpeg_upload())
+        response = self.client.get(reverse('api_recipe_list'))
+        variants = response.data['results'][0]['image_variants']
+        self.assertEqual([v['width'] for v in variants], [160, 320, 640, 800])
+        self.assertTrue(variants[0]['webp'].startswith('http://testserver/'))
+        self.assertEqual(response.data['results'][0]['id'], recipe.pk)
+
+    def test_backfill_queues_images_without_derivatives(self):
+        recipe = self.make(jpeg_upload())
+        Recipe.objects.filter(pk=recipe.pk).update(image_derivatives={})
+        self.assertEqual(images.queue_missing_derivatives(), 1)
+        self.assertEqual(images.queue_missing_derivatives(), 0)
+        images.process_pending()
+        recipe.refresh_from_db()
+        self.assertEqual(len(recipe.image_derivatives), 4)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BoundedDecodingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def write(self, upload):
+        path = tempfile.mktemp(dir=MEDIA_ROOT, suffix='.' + upload.name.rsplit('.', 1)[1])
+        with open(path, 'wb') as out:
+            out.write(upload.read())
+        return path
+
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        img, original = images.open_bounded(self.write(jpeg_upload(size=(4000, 3000))), 800)
+        with img:
+            self.assertEqual(original, (4000, 3000))
+            self.assertEqual(img.size, (1000, 750))
+
+    def test_resized_original_still_fits_exactly(self):
+        path = self.write(jpeg_upload(size=(1600, 1200)))
+        images.process_image(path, 'recipe_images/dish.jpg', 800, (160, 800))
+        with Image.open(path) as img:
+            self.assertEqual(img.size, (800, 600))
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=1_000_000)
+    def test_pixel_limit_is_checked_before_decoding(self):
+        path = self.write(jpeg_upload(size=(1200, 900)))
+        with mock.patch('PIL.ImageFile.ImageFile.load') as load, self.assertRaises(images.ImageTooLarge):
+            images.open_bounded(path, 800)
+        load.assert_not_called()
+
+    @override_settings(RECIPE_IMAGE_MAX_DECODED_PIXELS=100_000)
+    def test_formats_without_draft_must_fit_decoded_limit(self):
+        with self.assertRaises(images.ImageTooLarge):
+            images.open_bounded(self.write(png_upload(size=(400, 400))), 800)
+        img, _ = images.open_bounded(self.write(jpeg_upload(size=(1600, 1200))), 160)
+        img.close()
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=1_000_000)
+    def test_oversized_job_fails_without_retries(self):
+        user = User.objects.create_user(username='chef', password='pass')
+        recipe = Recipe.objects.create(
+            author=UserProfile.objects.create(user=user), title='Shiro', description='d',
+            ingredients='i', instructions='s', image=jpeg_upload(size=(1200, 900)),
+        )
+        images.process_pending()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertEqual(ImageJob.objects.get(recipe=recipe).attempts, 1)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=1_000_000, RECIPE_IMAGE_MAX_DECODED_PIXELS=100_000)
+    def test_upload_validator_reads_only_the_header(self):
+        validate_image_pixels(jpeg_upload(size=(1000, 1000)))
+        with self.assertRaises(ValidationError):
+            validate_image_pixels(jpeg_upload(size=(1001, 1000)))
+        with self.assertRaises(ValidationError):
+            validate_image_pixels(png_upload(size=(400, 400)))
+        validate_image_pixels(SimpleUploadedFile('bad.jpg', b'not an image'))
+
+    def test_memory_benchmark_runs(self):
+        out = io.StringIO()
+        call_command('benchmark_image_memory', '--megapixels', '1', '--runs', '1', stdout=out)
+        self.assertIn('bounded', out.getvalue())
@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipeApp import images, importer, search
+from recipeApp.models import ImageJob, ImportCheckpoint, Recipe, RollupCheckpoint
+from userApp.models import UserProfile
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImportRecipesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.workdir = tempfile.mkdtemp()
+        for username in ('almaz', 'tigist'):
+            UserProfile.objects.create(user=User.objects.create_user(username=username, password='pass'))
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def row(self, title, **fields):
+        return {'title': title, 'author': 'almaz', 'ingredients': 'i', 'instructions': 's', **fields}
+
+    def write_jsonl(self, rows, name='recipes.jsonl'):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'w') as out:
+            for row in rows:
+                out.write((row if isinstance(row, str) else json.dumps(row)) + '\n')
+        return path
+
+    def run_import(self, path, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_recipes', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def stored_images(self, prefix):
+        directory = os.path.join(MEDIA_ROOT, 'recipe_images')
+        return [name for name in os.listdir(directory) if name.startswith(prefix)] if os.path.isdir(directory) else []
+
+    def test_jsonl_rows_become_recipes(self):
+        Recipe.objects.create(
+            author=UserProfile.objects.get(user__username='almaz'), title='Doro Wat',
+            description='d', ingredients='i', instructions='s',
+        )
+        path = self.write_jsonl([
+            self.row('Doro Wat', tags=['Dinner', 'spicy'], cuisine='ethiopian', prep_time=90),
+            self.row('Doro Wat', author='tigist', tags='dinner, fasting', difficulty='hard'),
+            self.row('Shiro', created_at='2024-01-02T03:04:05'),
+        ])
+        out, _ = self.run_import(path)
+
+        self.assertIn('Imported 3 recipes from 3 rows', out)
+        self.assertIn('rows/s', out)
+        first, second = Recipe.objects.filter(title='Doro Wat').order_by('pk')[1:]
+        self.assertEqual((first.slug, second.slug), ('doro-wat-1', 'doro-wat-2'))
+        self.assertEqual((first.tags, first.cuisine, first.prep_time), ('dinner,spicy', 'Ethiopian', 90))
+        self.assertEqual((second.author.user.username, second.difficulty), ('tigist', 'Hard'))
+        self.assertEqual(Recipe.objects.get(title='Shiro').created_at.year, 2024)
+        self.assertEqual(search.search_recipes(Recipe.objects.all(), 'fasting').get(), second)
+
+    def test_csv(self):
+        path = os.path.join(self.workdir, 'recipes.csv')
+        with open(path, 'w', newline='') as out:
+            out.write('title,author,ingredients,instructions,tags\n')
+            out.write('Injera,almaz,teff,"ferment,\nthen bake","breakfast,fasting"\n')
+        self.run_import(path)
+        recipe = Recipe.objects.get(title='Injera')
+        self.assertEqual((recipe.instructions, recipe.tags), ('ferment,\nthen bake', 'breakfast,fasting'))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        path = self.write_jsonl([
+            self.row('Good'),
+            self.row('', ingredients=''),
+            self.row('Stranger', author='nobody'),
+            self.row('Odd', cuisine='Martian'),
+            '{not json',
+        ])
+        out, err = self.run_import(path)
+        self.assertIn('Imported 1 recipes from 5 rows', out)
+        self.assertIn('4 skipped', out)
+        for message in ('Row 2: missing title, ingredients', "unknown author 'nobody'", 'unknown cuisine', 'Row 5: invalid JSON'):
+            self.assertIn(message, err)
+
+    def test_default_author(self):
+        path = self.write_jsonl([self.row('Stranger', author='nobody'), self.row('Anonymous', author='')])
+        self.run_import(path, '--author', 'tigist')
+        self.assertEqual(Recipe.objects.filter(author__user__username='tigist').count(), 2)
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        def queries(count, name):
+            path = self.write_jsonl(
+                [self.row(f'Recipe {i}', tags=['dinner'], author=('almaz', 'tigist')[i % 2]) for i in range(count)],
+                name,
+            )
+            with CaptureQueriesContext(connection) as captured:
+                importer.import_file(path, batch_size=100)
+            return len(captured)
+
+        self.assertEqual(queries(5, 'small.jsonl'), queries(30, 'large.jsonl'))
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write_jsonl([self.row(f'Recipe {i}') for i in range(5)])
+        real = importer.import_batch
+        calls = []
+
+        def fail_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('killed')
+            return real(*args, **kwargs)
+
+        with mock.patch.object(importer, 'import_batch', fail_second_batch), self.assertRaises(RuntimeError):
+            self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(name='import:recipes.jsonl').last_row, 2)
+        self.assertFalse(RollupCheckpoint.objects.exists())
+
+        out, _ = self.run_import(path, '--batch-size', '2')
+        self.assertIn('Resumed after row 2', out)
+        self.assertEqual(sorted(Recipe.objects.values_list('title', flat=True)), [f'Recipe {i}' for i in range(5)])
+
+        self.run_import(path)
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.run_import(path, '--restart')
+        self.assertEqual(Recipe.objects.count(), 10)
+
+    def test_checkpoint_names_are_not_truncated(self):
+        path = self.write_jsonl([self.row('Shiro')])
+        with self.assertRaisesMessage(CommandError, 'longer than 255 characters'):
+            self.run_import(path, '--checkpoint', 'x' * 256)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_images_are_copied_and_queued_not_processed(self):
+        Image.new('RGB', (1200, 900), 'orange').save(os.path.join(self.workdir, 'shiro.jpg'))
+        path = self.write_jsonl([self.row('Shiro', image='shiro.jpg'), self.row('Bad', image='missing.jpg')])
+        with mock.patch('recipeApp.images.process_image') as process, self.captureOnCommitCallbacks(execute=True):
+            _, err = self.run_import(path)
+        process.assert_not_called()
+        self.assertIn("image 'missing.jpg' not found", err)
+
+        recipe = Recipe.objects.get(title='Shiro')
+        self.assertEqual(recipe.image_status, Recipe.IMAGE_PENDING)
+        self.assertTrue(recipe.image.name.startswith('recipe_images/shiro-'))
+        with Image.open(recipe.image.path) as img:
+            self.assertEqual(img.size, (1200, 900))
+        self.assertEqual(ImageJob.objects.get().recipe, recipe)
+
+        # A re-import reuses the stored copy rather than adding shiro_<random>.jpg
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import(path, '--restart')
+        self.assertEqual(set(Recipe.objects.values_list('image', flat=True)), {recipe.image.name})
+        self.assertEqual(self.stored_images('shiro'), [os.path.basename(recipe.image.name)])
+
+    def test_jobs_are_queued_only_once_their_files_are_stored(self):
+        Image.new('RGB', (1200, 900), 'orange').save(os.path.join(self.workdir, 'shiro.jpg'))
+        path = self.write_jsonl([self.row('Shiro', image='shiro.jpg')])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.run_import(path)
+        # Committed, not yet copied: a running worker finds nothing to claim
+        self.assertEqual(images.process_pending(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(images.process_pending(), 1)
+        self.assertEqual(Recipe.objects.get().image_status, Recipe.IMAGE_READY)
+
+    def test_failed_copies_mark_the_recipe_failed(self):
+        Image.new('RGB', (10, 10), 'green').save(os.path.join(self.workdir, 'misir.jpg'))
+        path = self.write_jsonl([self.row('Misir', image='misir.jpg')])
+        with mock.patch.object(importer.default_storage, 'save', side_effect=OSError('disk full')), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.run_import(path)
+        self.assertEqual(Recipe.objects.get().image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_failed_batches_leave_no_image_files(self):
+        Image.new('RGB', (10, 10), 'green').save(os.path.join(self.workdir, 'misir.jpg'))
+        path = self.write_jsonl([self.row('Misir', image='misir.jpg')])
+        with mock.patch.object(importer, '_save_tags', side_effect=RuntimeError('killed')), \
+                self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertRaises(RuntimeError):
+            self.run_import(path)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Recipe.objects.exists())
+        self.assertEqual(self.stored_images('misir'), [])
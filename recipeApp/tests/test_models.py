@@ -5,12 +5,16 @@ from recipeApp.models import Recipe
 from django.contrib.auth.models import User
 from PIL import Image
 import io
-from django.test import TestCase, Client
+import shutil
+import tempfile
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from django.urls import reverse
 from userApp.models import UserProfile
 from recipeApp.models import Recipe 
+from recipeApp import images
 from django.utils.text import slugify
 import datetime
 
@@ -44,8 +48,10 @@ class RecipeModelTests(TestCase):
         expected = ['dinner', 'Italian']
         self.assertEqual(self.recipe.get_tag_choices_list, expected)
 
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
     def test_recipe_image_upload(self):
         """Test image upload handling in the Recipe model."""
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
 
          # Create a valid in-memory image
         img = Image.new('RGB', (1000, 1000), color='red')  # Over 800px to trigger resizing
@@ -53,7 +59,7 @@ class RecipeModelTests(TestCase):
         img.save(img_io, format='JPEG')
         img_io.seek(0)
 
-        image_data = SimpleUploadedFile("test.jpg", b"fake_image_data", content_type="image/jpeg")
+        image_data = SimpleUploadedFile("test.jpg", img_io.getvalue(), content_type="image/jpeg")
         recipe_with_image = Recipe.objects.create(
             author=self.profile,
             title='Recipe with Image',
@@ -69,7 +75,8 @@ class RecipeModelTests(TestCase):
         )
         self.assertTrue(recipe_with_image.image)
 
-        #testing resize functionality
+        #testing resize functionality, done by the image worker
+        images.process_pending()
         recipe_with_image.image.open()
         resized_img = Image.open(recipe_with_image.image)
         self.assertLessEqual(resized_img.width, 800)
@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from recipeApp.models import Recipe
+from recipeApp.tracking import view_buffer
+from reviewApp.models import Review, SavedRecipe
+from userApp.models import UserProfile
+
+
+class RecipePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_buffer.clear()
+        self.author = User.objects.create_user(username='chef', password='pass', first_name='Almaz')
+        self.author_profile = UserProfile.objects.create(user=self.author)
+        self.reader = User.objects.create_user(username='reader', password='pass')
+        UserProfile.objects.create(user=self.reader)
+        self.recipe = Recipe.objects.create(
+            author=self.author_profile, title='Shiro', description='Chickpea stew',
+            ingredients='chickpea flour', instructions='simmer',
+        )
+        self.url = reverse('recipe_detail', kwargs={'slug': self.recipe.slug})
+
+    def tearDown(self):
+        view_buffer.clear()
+
+    def test_cached_hit_runs_no_queries_and_still_counts_the_view(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Shiro')
+        self.assertEqual(len(view_buffer), 2)
+
+    def test_viewer_fragments_are_not_shared(self):
+        self.client.login(username='reader', password='pass')
+        SavedRecipe.objects.create(user=self.reader, recipe=self.recipe)
+        self.assertContains(self.client.get(self.url), 'Saved')
+        self.client.logout()
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'to leave a review')
+        self.assertNotContains(response, 'save-text')
+
+    def test_recipe_edit_invalidates(self):
+        self.client.get(self.url)
+        self.recipe.title = 'Shiro Wat'
+        self.recipe.save()
+        self.assertContains(self.client.get(self.url), 'Shiro Wat')
+
+    def test_review_invalidates(self):
+        self.client.get(self.url)
+        Review.objects.create(user=self.reader, recipe=self.recipe, rating=4, comment='Lovely and thick')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Lovely and thick')
+        self.assertContains(response, 'Reviews (1)')
+
+    def test_author_change_invalidates(self):
+        self.client.get(self.url)
+        self.author.first_name = 'Tigist'
+        self.author.save()
+        self.assertContains(self.client.get(self.url), 'Tigist')
+
+    def test_own_review_is_marked_for_its_author_only(self):
+        Review.objects.create(user=self.reader, recipe=self.recipe, rating=5, comment='Great')
+        mine = f'.review-item[data-reviewer="{self.reader.pk}"]'
+        self.assertNotContains(self.client.get(self.url), mine)
+        self.client.login(username='reader', password='pass')
+        self.assertContains(self.client.get(self.url), mine)
+
+    def test_search_box_keeps_the_viewers_query(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'q': 'lentil'})
+        self.assertContains(response, 'value="lentil"')
+        self.assertNotContains(self.client.get(self.url), 'value="lentil"')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_not_used(self):
+        first = self.client.get(self.url)
+        self.assertFalse(first.has_header('ETag'))
+        Recipe.objects.filter(pk=self.recipe.pk).update(title='Shiro Wat')  # no signals, no invalidation
+        self.assertContains(self.client.get(self.url), 'Shiro Wat')
+
+    def test_missing_recipe_is_404(self):
+        response = self.client.get(reverse('recipe_detail', kwargs={'slug': 'nope'}))
+        self.assertEqual(response.status_code, 404)
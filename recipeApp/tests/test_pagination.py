@@ -0,0 +1,93 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from recipeApp.models import Recipe
+from recipeApp.pagination import InvalidCursor, paginate
+from userApp.models import UserProfile
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+        now = timezone.now()
+        # Pairs of recipes share a created_at so ties are broken by id
+        for i in range(12):
+            Recipe.objects.create(
+                author=self.profile, title=f'Recipe {i}', description='d',
+                ingredients='i', instructions='s',
+                created_at=now - datetime.timedelta(minutes=i // 2),
+            )
+        self.expected = list(Recipe.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+
+    def walk(self, per_page):
+        titles, cursor = [], None
+        while True:
+            page = paginate(Recipe.objects.all(), cursor, per_page=per_page)
+            titles.extend(recipe.title for recipe in page)
+            if not page.has_next():
+                return titles, page
+            cursor = page.next_cursor
+
+    def test_walks_every_row_once(self):
+        for per_page in (1, 2, 5, 12, 20):
+            titles, _ = self.walk(per_page)
+            self.assertEqual(titles, self.expected)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        first = paginate(Recipe.objects.all(), per_page=3)
+        second = paginate(Recipe.objects.all(), first.next_cursor, per_page=3)
+        back = paginate(Recipe.objects.all(), second.previous_cursor, per_page=3)
+        self.assertEqual([r.title for r in back], [r.title for r in first])
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_deep_page_is_a_single_query(self):
+        _, last = self.walk(2)
+        with self.assertNumQueries(1):
+            paginate(Recipe.objects.all(), last.previous_cursor, per_page=2)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            paginate(Recipe.objects.all(), 'bogus', per_page=2)
+
+    def test_list_view_next_link(self):
+        response = self.client.get(reverse('recipe_list'))
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(response.context['total_recipes'], 12)
+        response = self.client.get(reverse('recipe_list') + '?' + response.context['next_page_query'])
+        self.assertEqual([r.title for r in response.context['recipes']], self.expected[10:])
+
+    def test_api_cursor_and_optional_count(self):
+        url = reverse('api_recipe_list')
+        response = self.client.get(url, {'page_size': 8})
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        titles = [row['title'] for row in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        titles += [row['title'] for row in response.data['results']]
+        self.assertEqual(titles, self.expected)
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(url, {'count': 'true'})
+        self.assertEqual(response.data['count'], 12)
+
+    def test_api_rejects_invalid_cursor(self):
+        response = self.client.get(reverse('api_recipe_list'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_api_is_paginated_by_rank(self):
+        response = self.client.get(reverse('api_recipe_search'), {'q': 'recipe', 'page_size': 5})
+        ids = [row['id'] for row in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [row['id'] for row in response.data['results']]
+        self.assertEqual(len(ids), 12)
+        self.assertEqual(set(ids), set(Recipe.objects.values_list('pk', flat=True)))
@@ -0,0 +1,77 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from recipeApp.models import Recipe, RelatedRecipe
+from recipeApp.related import related_recipes
+from userApp.models import UserProfile
+
+
+class RelatedRecipesTests(TestCase):
+    def setUp(self):
+        self.chef = UserProfile.objects.create(user=User.objects.create_user(username='chef', password='testpass123'))
+        self.cook = UserProfile.objects.create(user=User.objects.create_user(username='cook', password='testpass123'))
+
+    def make(self, title, author=None, **fields):
+        return Recipe.objects.create(
+            author=author or self.cook, title=title, description=f'{title} description',
+            ingredients='some ingredients', instructions='some instructions', **fields,
+        )
+
+    def test_neighbours_are_ranked_by_similarity(self):
+        base = self.make('Base', tags='dinner,fasting', cuisine='Ethiopian', difficulty='Easy')
+        close = self.make('Close', tags='dinner,fasting', cuisine='Ethiopian')
+        loose = self.make('Loose', tags='dinner', cuisine='Italian')
+        self.make('Unrelated', tags='dessert', cuisine='French', author=self.chef)
+
+        self.assertEqual(list(related_recipes(base)), [close, loose])
+        self.assertIn(base, related_recipes(close))
+
+    def test_untagged_recipe_does_not_match_everything(self):
+        lonely = self.make('Lonely', author=self.chef)
+        self.make('Other', tags='lunch')
+        self.assertEqual(list(related_recipes(lonely)), [])
+
+    def test_edit_moves_recipe_out_of_old_lists(self):
+        base = self.make('Base', tags='lunch', author=self.chef)
+        other = self.make('Other', tags='lunch')
+        self.assertEqual(list(related_recipes(base)), [other])
+
+        other.tags = 'dessert'
+        other.save()
+        self.assertEqual(list(related_recipes(base)), [])
+        self.assertEqual(list(related_recipes(other)), [])
+
+    @override_settings(RELATED_RECIPES_K=2)
+    def test_lists_are_trimmed_to_k(self):
+        base = self.make('Base', tags='lunch,dinner', cuisine='Ethiopian', author=self.chef)
+        weak = self.make('Weak', tags='lunch')
+        self.make('Medium', tags='lunch,dinner')
+        self.make('Strong', tags='lunch,dinner', cuisine='Ethiopian')
+
+        self.assertEqual(RelatedRecipe.objects.filter(recipe=base).count(), 2)
+        self.assertNotIn(weak, related_recipes(base))
+
+    @override_settings(RELATED_RECIPES_K=2)
+    def test_lists_are_refilled_when_a_neighbour_leaves(self):
+        base = self.make('Base', tags='lunch,dinner', author=self.chef)
+        spare = self.make('Spare', tags='lunch')
+        moved = self.make('Moved', tags='lunch,dinner')
+        deleted = self.make('Deleted', tags='lunch,dinner')
+        self.assertEqual(list(related_recipes(base)), [deleted, moved])
+
+        moved.tags = 'dessert'
+        moved.save()
+        self.assertEqual(list(related_recipes(base)), [deleted, spare])
+
+        deleted.delete()
+        self.assertEqual(list(related_recipes(base)), [spare])
+
+    def test_rebuild_command(self):
+        base = self.make('Base', tags='lunch')
+        other = self.make('Other', tags='lunch')
+        RelatedRecipe.objects.all().delete()
+
+        call_command('rebuild_related', stdout=StringIO())
+        self.assertEqual(list(related_recipes(base)), [other])
+        self.assertEqual(list(related_recipes(other)), [base])
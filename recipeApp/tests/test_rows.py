@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+
+from recipeApp.api import rows
+from recipeApp.api.serializer import RecipeSerializer
+from recipeApp.models import Recipe
+from reviewApp.models import Review
+from userApp.models import UserProfile
+
+
+@override_settings(TIME_ZONE='Africa/Addis_Ababa')
+class RecipeRowsParityTests(TestCase):
+    """recipeApp.api.rows must give exactly what RecipeSerializer gives."""
+
+    def setUp(self):
+        named = UserProfile.objects.create(
+            user=User.objects.create_user(username='almaz', first_name='Almaz', last_name='Kebede'),
+        )
+        nicknamed = UserProfile.objects.create(user=User.objects.create_user(username='chef'), username='Chef T')
+        plain = UserProfile.objects.create(user=User.objects.create_user(username='plain'))
+        pictured = Recipe.objects.create(
+            author=named, title='Doro Wat', description='d', ingredients='chicken', instructions='s',
+            tags='dinner,spicy',
+        )
+        Recipe.objects.filter(pk=pictured.pk).update(
+            image='recipe_images/doro.jpg', image_status=Recipe.IMAGE_READY,
+            image_derivatives={'640': {'jpeg': 'd/doro-640.jpg', 'webp': 'd/doro-640.webp'},
+                               '160': {'jpeg': 'd/doro-160.jpg', 'webp': 'd/doro-160.webp'}},
+        )
+        Recipe.objects.create(author=nicknamed, title='Shiro', description='d', ingredients='i', instructions='s')
+        pending = Recipe.objects.create(
+            author=plain, title='Kitfo', description='d', ingredients='i', instructions='s', tags='fasting',
+        )
+        Recipe.objects.filter(pk=pending.pk).update(image='recipe_images/kitfo.jpg', image_status=Recipe.IMAGE_PENDING)
+        Review.objects.create(recipe=pictured, user=User.objects.create(username='critic'), rating=4)
+        self.request = RequestFactory().get('/api/recipe/recipes/')
+
+    def serialized(self, request):
+        recipes = Recipe.objects.for_api().order_by('pk')
+        return RecipeSerializer(recipes, many=True, context={'request': request}).data
+
+    def fast(self, request, fields=None):
+        return rows.recipe_dicts(rows.recipe_values(Recipe.objects.for_api().order_by('pk'), fields), request, fields)
+
+    def test_same_output(self):
+        for request in (self.request, None):
+            with self.subTest(request=request):
+                expected = [dict(row) for row in self.serialized(request)]
+                fast = self.fast(request)
+                self.assertEqual(fast, expected)
+                self.assertEqual([list(row) for row in fast], [list(row) for row in expected])  # key order too
+
+    def test_fields(self):
+        fast = self.fast(self.request, {'title', 'author', 'tags', 'nope'})
+        expected = [{key: row[key] for key in ('title', 'tags', 'author')} for row in self.serialized(self.request)]
+        self.assertEqual(fast, expected)
+
+    def test_reads_only_the_columns_asked_for(self):
+        sql = str(rows.recipe_values(Recipe.objects.for_api(), {'id', 'title'}).query)
+        self.assertNotIn('ingredients', sql)
+        self.assertNotIn('userApp_userprofile', sql)
+
+    def test_one_query_for_the_page_and_one_for_tags(self):
+        with self.assertNumQueries(2):
+            self.fast(self.request)
@@ -0,0 +1,122 @@
+import gzip
+import json
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from recipeApp.models import Recipe
+from recipeApp.search import FTS_TABLE, attach_snippets, build_match, search_recipes
+from userApp.models import UserProfile
+
+
+class RecipeFullTextSearchTests(TestCase):
+    def setUp(self):
+        profile = UserProfile.objects.create(user=User.objects.create_user(username='searcher', password='testpass123'))
+        self.lentils = Recipe.objects.create(
+            author=profile, title='Lentil Soup', description='Warming soup',
+            ingredients='red lentils, onion, cumin', instructions='Simmer the lentils until soft.',
+            tags='lunch',
+        )
+        self.salad = Recipe.objects.create(
+            author=profile, title='Green Salad', description='Fresh salad',
+            ingredients='lettuce, cucumber, <b>lemon</b>', instructions='Toss with leftover lentils.',
+            tags='lunch',
+        )
+
+    def search(self, query):
+        return list(search_recipes(Recipe.objects.all(), query))
+
+    def test_build_match_quotes_every_token(self):
+        self.assertEqual(build_match('lentil "soup" OR'), '"lentil"* "soup"* "OR"*')
+        self.assertEqual(build_match('  <>  '), '')
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search('lentil'), [self.lentils, self.salad])
+        self.assertEqual(self.search('lentil cucumber'), [self.salad])
+        self.assertEqual(self.search('pizza'), [])
+
+    def test_snippets_are_highlighted_and_escaped(self):
+        recipes = attach_snippets(search_recipes(Recipe.objects.all(), 'lemon'), 'lemon')
+        self.assertEqual(len(recipes), 1)
+        self.assertIn('<mark>lemon</mark>', recipes[0].search_snippet)
+        self.assertIn('&lt;b&gt;', recipes[0].search_snippet)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.salad.title = 'Cucumber Salad'
+        self.salad.ingredients = 'cucumber, dill'
+        self.salad.instructions = 'Toss.'
+        self.salad.save()
+        self.assertEqual(self.search('lentil'), [self.lentils])
+
+        self.lentils.delete()
+        self.assertEqual(self.search('lentil'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}"')
+        self.assertEqual(self.search('salad'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('salad'), [self.salad])
+
+    def test_search_api_returns_ranked_results_with_snippets(self):
+        response = self.client.get(reverse('api_recipe_search'), {'q': 'lentils'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['results']
+        self.assertEqual([row['id'] for row in data], [self.lentils.pk, self.salad.pk])
+        self.assertIn('<mark>', data[0]['snippet'])
+
+
+class RecipeSearchAPITests(TestCase):
+    def setUp(self):
+        profile = UserProfile.objects.create(user=User.objects.create_user(username='searcher', password='pass'))
+        # Five soups, best match (most "soup" in the title) first
+        for i in range(5):
+            Recipe.objects.create(
+                author=profile, title='Soup ' * (5 - i) + str(i), description='d',
+                ingredients='water', instructions='Simmer.',
+            )
+        Recipe.objects.create(author=profile, title='Bread', description='d', ingredients='flour', instructions='Bake.')
+
+    def titles(self, rows):
+        return [row['title'].split()[-1] for row in rows]
+
+    def test_pages_walk_the_ranked_results_to_the_cap(self):
+        url = reverse('api_recipe_search') + '?q=soup&page_size=2&count=true'
+        with self.settings(RECIPE_SEARCH_MAX_RESULTS=3):
+            first = self.client.get(url).json()
+            second = self.client.get(first['next']).json()
+        self.assertEqual(first['count'], 3)
+        self.assertEqual(self.titles(first['results'] + second['results']), ['0', '1', '2'])
+        self.assertIsNone(second['next'])
+
+    def test_cap_applies_after_the_filters(self):
+        Recipe.objects.filter(title__endswith=' 4').update(cuisine='Ethiopian')
+        with self.settings(RECIPE_SEARCH_MAX_RESULTS=3):
+            response = self.client.get(reverse('api_recipe_search'), {'q': 'soup', 'cuisine': 'Ethiopian'})
+            self.assertEqual(self.titles(response.json()['results']), ['4'])
+            response = self.client.get(reverse('api_recipe_search'), {'q': 'soup', 'cuisine': 'Ethiopian', 'stream': '1'})
+            self.assertEqual(self.titles(json.loads(b''.join(response.streaming_content))['results']), ['4'])
+
+    def test_page_size_is_bounded(self):
+        response = self.client.get(reverse('api_recipe_search'), {'q': 'soup', 'page_size': 10_000})
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertIsNotNone(self.client.get(reverse('api_recipe_search'), {'q': 'soup', 'page_size': 1}).json()['next'])
+
+    def test_stream_returns_every_result_to_the_cap(self):
+        with self.settings(RECIPE_SEARCH_MAX_RESULTS=4, RECIPE_EXPORT_CHUNK_SIZE=3):
+            response = self.client.get(reverse('api_recipe_search'), {'q': 'soup', 'stream': 'true'})
+            self.assertTrue(response.streaming)
+            data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(self.titles(data['results']), ['0', '1', '2', '3'])
+        self.assertIn('<mark>', data['results'][3]['snippet'])
+
+    def test_stream_gzipped(self):
+        response = self.client.get(
+            reverse('api_recipe_search'), {'stream': '1'}, headers={'Accept-Encoding': 'gzip'},
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(data['results']), 6)
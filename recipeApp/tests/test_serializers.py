@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipeApp.models import Recipe
+from recipeApp.tracking import view_buffer
+from reviewApp.models import Review
+from userApp.models import UserProfile
+
+
+class RecipeSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.count = 0
+
+    def tearDown(self):
+        view_buffer.clear()
+
+    def add_recipe(self):
+        """A recipe by a new author, with a review by another new user."""
+        self.count += 1
+        author = User.objects.create(username=f'chef{self.count}', first_name='Almaz', last_name=f'K{self.count}')
+        recipe = Recipe.objects.create(
+            author=UserProfile.objects.create(user=author), title=f'Shiro {self.count}', description='d',
+            ingredients='i', instructions='s', tags='dinner',
+        )
+        Review.objects.create(recipe=recipe, user=User.objects.create(username=f'critic{self.count}'), rating=4)
+        return recipe
+
+    def queries(self, path):
+        cache.clear()
+        view_buffer.flush()
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(path).status_code, 200)
+        return len(captured)
+
+    def test_author_summary_and_rating(self):
+        recipe = self.add_recipe()
+        data = self.client.get(reverse('api_recipe_detail', args=[recipe.slug])).json()
+        self.assertEqual(data['author'], {'id': recipe.author_id, 'username': 'chef1', 'name': 'Almaz K1'})
+        self.assertEqual((data['rating_avg'], data['rating_count']), (4.0, 1))
+
+        listed = self.client.get(reverse('api_recipe_list')).json()['results'][0]
+        self.assertEqual(listed['author']['username'], 'chef1')
+
+    def test_name_falls_back_to_the_username(self):
+        recipe = self.add_recipe()
+        User.objects.filter(pk=recipe.author.user_id).update(first_name='', last_name='')
+        data = self.client.get(reverse('api_recipe_detail', args=[recipe.slug])).json()
+        self.assertEqual(data['author']['name'], 'chef1')
+
+    def test_list_queries_do_not_grow_with_authors(self):
+        self.add_recipe()
+        paths = [reverse('api_recipe_list'), reverse('recipe-list')]
+        one = [self.queries(path) for path in paths]
+        for _ in range(9):
+            self.add_recipe()
+        self.assertEqual([self.queries(path) for path in paths], one)
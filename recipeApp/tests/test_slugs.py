@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import TestCase
+
+from recipeApp.models import Recipe, SLUG_MAX_LENGTH
+from userApp.models import UserProfile
+
+
+class SlugAllocationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+
+    def make(self, title, **fields):
+        return Recipe.objects.create(
+            author=self.profile, title=title, description='d',
+            ingredients='i', instructions='s', **fields,
+        )
+
+    def test_duplicates_get_the_next_suffix(self):
+        slugs = [self.make('Doro Wat').slug for _ in range(4)]
+        self.assertEqual(slugs, ['doro-wat', 'doro-wat-1', 'doro-wat-2', 'doro-wat-3'])
+
+    def test_one_query_however_many_duplicates(self):
+        for _ in range(5):
+            self.make('Injera')
+        with self.assertNumQueries(1):
+            self.assertEqual(Recipe.objects.allocate_slugs(['Injera']), ['injera-5'])
+
+    def test_lowest_free_suffix_is_reused(self):
+        for _ in range(3):
+            self.make('Injera')
+        Recipe.objects.filter(slug='injera-1').delete()
+        self.assertEqual(self.make('Injera').slug, 'injera-1')
+
+    def test_longer_slugs_sharing_the_prefix_do_not_count(self):
+        self.make('Doro Wat Spicy')
+        self.make('Doro Wat 2')
+        self.assertEqual(self.make('Doro Wat').slug, 'doro-wat')
+        self.assertEqual(self.make('Doro Wat').slug, 'doro-wat-1')
+        self.assertEqual(self.make('Doro Wat').slug, 'doro-wat-3')
+
+    def test_batch_is_unique_within_itself_in_one_query(self):
+        self.make('Doro Wat')
+        with self.assertNumQueries(1):
+            slugs = Recipe.objects.allocate_slugs(['Doro Wat', 'Injera', 'doro wat', 'Injera'])
+        self.assertEqual(slugs, ['doro-wat-1', 'injera', 'doro-wat-2', 'injera-1'])
+
+    def test_untranslatable_and_long_titles(self):
+        self.assertEqual(self.make('ዶሮ ወጥ').slug, 'recipe')
+        long_slug = self.make('x' * 300).slug
+        self.assertLessEqual(len(long_slug), SLUG_MAX_LENGTH)
+        self.assertLessEqual(len(self.make('x' * 300).slug), SLUG_MAX_LENGTH)
+
+    def test_explicit_slug_is_kept(self):
+        self.assertEqual(self.make('Doro Wat', slug='my-doro').slug, 'my-doro')
+        with self.assertRaises(IntegrityError):
+            self.make('Other', slug='my-doro')
+
+    def test_conflict_with_a_concurrent_create_is_retried(self):
+        self.make('Shiro')
+        real = Recipe.objects.allocate_slugs
+        # The first allocation misses the row a concurrent request just added
+        stale = mock.Mock(side_effect=[['shiro'], real(['Shiro'])])
+        with mock.patch.object(Recipe.objects, 'allocate_slugs', stale):
+            recipe = self.make('Shiro')
+        self.assertEqual(recipe.slug, 'shiro-1')
+        self.assertEqual(stale.call_count, 2)
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from recipeApp.models import Recipe, RecipeTag, Tag, normalize_tags
+from userApp.models import UserProfile
+
+
+class RecipeTagStorageTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='chef', password='pass')
+        self.profile = UserProfile.objects.create(user=user)
+
+    def make(self, title, tags):
+        return Recipe.objects.create(
+            author=self.profile, title=title, description='d',
+            ingredients='i', instructions='s', tags=tags,
+        )
+
+    def test_normalize_tags(self):
+        self.assertEqual(normalize_tags(' Dinner, lunch,,dinner '), ['dinner', 'lunch'])
+        self.assertEqual(normalize_tags(['Snack', 'snack']), ['snack'])
+        self.assertEqual(normalize_tags(None), [])
+
+    def test_tags_are_stored_as_rows(self):
+        recipe = self.make('Stew', 'dinner, Ethiopian')
+        self.assertEqual(list(recipe.tag_set.values_list('name', flat=True).order_by('recipe_links')), ['dinner', 'ethiopian'])
+        fresh = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(fresh.tags, 'dinner,ethiopian')
+        self.assertEqual(fresh.get_tag_choices_list(), ['dinner', 'ethiopian'])
+
+    def test_tags_are_shared_and_replaced(self):
+        first = self.make('Stew', 'dinner')
+        self.make('Soup', 'dinner,lunch')
+        self.assertEqual(Tag.objects.filter(name='dinner').count(), 1)
+
+        first.tags = 'lunch'
+        first.save()
+        self.assertEqual(Recipe.objects.get(pk=first.pk).tags, 'lunch')
+        self.assertEqual(RecipeTag.objects.filter(recipe=first).count(), 1)
+
+    def test_with_tags_and_or(self):
+        both = self.make('Both', 'vegetarian,quick')
+        veg = self.make('Veg', 'vegetarian')
+        self.make('Neither', 'meat')
+
+        self.assertEqual(list(Recipe.objects.with_tags(['vegetarian', 'quick'])), [both])
+        self.assertEqual(
+            set(Recipe.objects.with_tags(['vegetarian', 'quick'], match_all=False)),
+            {both, veg},
+        )
+        self.assertEqual(Recipe.objects.with_tags('').count(), 3)
+
+    def test_prefetched_tags_need_no_queries(self):
+        self.make('Stew', 'dinner,lunch')
+        self.make('Soup', 'lunch')
+        recipes = list(Recipe.objects.prefetch_related('tag_links__tag'))
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(recipe.tags for recipe in recipes), ['dinner,lunch', 'lunch'])
+
+    def test_list_view_any_mode(self):
+        self.make('Stew', 'dinner')
+        self.make('Soup', 'lunch')
+        self.make('Cake', 'dessert')
+        response = self.client.get(reverse('recipe_list'), {'tag': ['dinner', 'lunch'], 'tag_mode': 'any'})
+        titles = {recipe.title for recipe in response.context['recipes']}
+        self.assertEqual(titles, {'Stew', 'Soup'})
+
+    def test_api_filter_returns_tag_lists(self):
+        self.make('Stew', 'dinner,lunch')
+        self.make('Cake', 'dessert')
+        response = self.client.get(reverse('api_recipe_list'), {'tag': 'lunch'})
+        self.assertEqual([row['tags'] for row in response.json()['results']], [['dinner', 'lunch']])
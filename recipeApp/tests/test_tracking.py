@@ -0,0 +1,58 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from recipeApp.models import Recipe, RecipeView
+from recipeApp.tracking import ViewBuffer, view_buffer
+from userApp.models import UserProfile
+
+
+class ViewBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='viewer', password='testpass123')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.recipe = Recipe.objects.create(
+            author=self.profile,
+            title='Shiro',
+            description='Chickpea stew',
+            ingredients='chickpea flour, onion, garlic',
+            instructions='Cook onions, whisk in flour, simmer.',
+        )
+        view_buffer.clear()
+
+    def test_views_are_buffered_until_flush(self):
+        buffer = ViewBuffer(max_events=10, flush_interval=3600)
+        buffer.record(self.recipe.pk, self.user.pk)
+        buffer.record(self.recipe.pk)
+        self.assertEqual(RecipeView.objects.count(), 0)
+        self.assertEqual(len(buffer), 2)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.view_count, 2)
+        self.assertEqual(RecipeView.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(len(buffer), 0)
+
+    def test_flushes_when_full(self):
+        buffer = ViewBuffer(max_events=3, flush_interval=3600)
+        for _ in range(3):
+            buffer.record(self.recipe.pk)
+        self.assertEqual(RecipeView.objects.count(), 3)
+        self.assertEqual(len(buffer), 0)
+
+    def test_flushes_when_stale(self):
+        buffer = ViewBuffer(max_events=100, flush_interval=0)
+        buffer.record(self.recipe.pk)
+        self.assertEqual(RecipeView.objects.count(), 1)
+
+    def test_views_of_deleted_recipes_are_dropped(self):
+        buffer = ViewBuffer(max_events=10, flush_interval=3600)
+        buffer.record(self.recipe.pk)
+        self.recipe.delete()
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(RecipeView.objects.count(), 0)
+
+    def test_detail_view_queues_view(self):
+        self.client.get(reverse('recipe_detail', kwargs={'slug': self.recipe.slug}))
+        view_buffer.flush()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.view_count, 1)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from recipeApp import trending
+from recipeApp.analytics import rollup_new_views
+from recipeApp.models import Recipe, RecipeView, TrendingScore
+from recipeApp.tracking import write_views
+from userApp.models import UserProfile
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='trender', password='testpass123')
+        profile = UserProfile.objects.create(user=user)
+        self.doro = Recipe.objects.create(
+            author=profile, title='Doro Wat', description='Chicken stew',
+            ingredients='chicken, berbere, onion', instructions='Simmer chicken in berbere sauce.',
+            cuisine='Ethiopian', tags='dinner',
+        )
+        self.pasta = Recipe.objects.create(
+            author=profile, title='Pasta', description='Tomato pasta',
+            ingredients='pasta, tomato, basil', instructions='Boil pasta, add sauce.',
+            cuisine='Italian', tags='lunch,dinner',
+        )
+
+    def views(self, recipe, count, age=timedelta(0)):
+        at = timezone.now() - age
+        return [(recipe.pk, None, at) for _ in range(count)]
+
+    def test_views_rank_recipes(self):
+        write_views(self.views(self.doro, 2) + self.views(self.pasta, 3))
+        self.assertEqual(list(trending.top_recipes()), [self.pasta, self.doro])
+
+    def test_recent_views_outweigh_old_views(self):
+        trending.add_views(self.views(self.doro, 3, age=timedelta(days=3)) + self.views(self.pasta, 1))
+        self.assertEqual(list(trending.top_recipes()), [self.pasta, self.doro])
+
+    def test_top_per_cuisine_and_tag(self):
+        trending.add_views(self.views(self.doro, 1) + self.views(self.pasta, 2))
+        self.assertEqual(list(trending.top_recipes(cuisine='Ethiopian')), [self.doro])
+        self.assertEqual(list(trending.top_recipes(tag='lunch')), [self.pasta])
+        self.assertEqual(list(trending.top_recipes(tag='dinner')), [self.pasta, self.doro])
+
+    def test_edit_moves_recipe_between_facets(self):
+        trending.add_views(self.views(self.doro, 1))
+        self.doro.cuisine = 'African'
+        self.doro.save()
+        self.assertEqual(list(trending.top_recipes(cuisine='Ethiopian')), [])
+        self.assertEqual(list(trending.top_recipes(cuisine='African')), [self.doro])
+
+    def test_rebase_keeps_ranking_and_drops_cold_recipes(self):
+        trending.add_views(self.views(self.doro, 2) + self.views(self.pasta, 1, age=timedelta(days=8)))
+        trending.rebase()
+        self.assertEqual(list(trending.top_recipes()), [self.doro])
+        self.assertFalse(TrendingScore.objects.filter(recipe=self.pasta).exists())
+        score = TrendingScore.objects.get(recipe=self.doro, facet=TrendingScore.FACET_ALL).score
+        self.assertAlmostEqual(score, 2, places=3)
+
+    def test_rebuild_from_rollups(self):
+        RecipeView.objects.bulk_create(
+            [RecipeView(recipe=self.doro) for _ in range(3)] + [RecipeView(recipe=self.pasta)]
+        )
+        rollup_new_views()
+        self.assertEqual(trending.rebuild(), 2)
+        self.assertEqual(list(trending.top_recipes()), [self.doro, self.pasta])
+
+    def test_trending_api(self):
+        trending.add_views(self.views(self.doro, 1) + self.views(self.pasta, 2))
+        response = self.client.get(reverse('api_recipe_trending'), {'cuisine': 'Ethiopian'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()], [self.doro.pk])
@@ -6,6 +6,7 @@ from django.contrib.messages import get_messages
 from django.core.paginator import Paginator
 from unittest.mock import patch, MagicMock
 from recipeApp.models import Recipe, RecipeView
+from recipeApp.tracking import view_buffer
 from userApp.models import UserProfile
 from reviewApp.models import Review, SavedRecipe
 from recipeApp.forms import RecipeForm
@@ -245,12 +246,16 @@ class RecipeAppViewsTestCase(TestCase):
     def test_recipe_detail_view_tracking(self):
         """Test recipe detail view tracking"""
         initial_views = self.recipe.view_count
+        view_buffer.clear()
         
         # Test authenticated user view
         self.client.login(username='testuser', password='testpass123')
         response = self.client.get(reverse('recipe_detail', kwargs={'slug': self.recipe.slug}))
         self.assertEqual(response.status_code, 200)
         
+        # Views are buffered; write them out before checking
+        view_buffer.flush()
+        
         # Check view count increased
         self.recipe.refresh_from_db()
         self.assertEqual(self.recipe.view_count, initial_views + 1)
@@ -261,10 +266,14 @@ class RecipeAppViewsTestCase(TestCase):
     def test_recipe_detail_view_tracking_unauthenticated(self):
         """Test recipe detail view tracking for unauthenticated user"""
         initial_views = self.recipe.view_count
+        view_buffer.clear()
         
         response = self.client.get(reverse('recipe_detail', kwargs={'slug': self.recipe.slug}))
         self.assertEqual(response.status_code, 200)
         
+        # Views are buffered; write them out before checking
+        view_buffer.flush()
+        
         # Check view count increased
         self.recipe.refresh_from_db()
         self.assertEqual(self.recipe.view_count, initial_views + 1)
@@ -387,12 +396,13 @@ class RecipeAppViewsTestCase(TestCase):
         self.assertIn('page_obj', response.context)
 
     def test_recipe_list_view_invalid_page(self):
-        """Test recipe list view with invalid page number"""
-        response = self.client.get(reverse('recipe_list'), {'page': '999'})
+        """Test recipe list view with invalid page cursor"""
+        response = self.client.get(reverse('recipe_list'), {'cursor': 'not-a-cursor'})
         
         self.assertEqual(response.status_code, 200)
-        # Should redirect to page 1
-        self.assertEqual(response.context['page_obj'].number, 1)
+        # Should fall back to the first page
+        self.assertFalse(response.context['page_obj'].has_previous())
+        self.assertContains(response, self.recipe.title)
 
     def test_recipe_list_view_combined_filters(self):
         """Test recipe list view with combined filters"""
@@ -0,0 +1,126 @@
+"""
+Buffered recipe view tracking.
+
+recipe_detail used to write a RecipeView row and re-save the recipe on every
+hit. Views are now queued in process and written in batches: one bulk insert
+for the RecipeView rows and one atomic F() increment per recipe (view_count
+and the trending scores).
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+class ViewBuffer:
+    """Collects view events and flushes them every N events or T seconds."""
+
+    def __init__(self, max_events=None, flush_interval=None):
+        self.max_events = max_events if max_events is not None else getattr(
+            settings, 'RECIPE_VIEW_BUFFER_SIZE', DEFAULT_BUFFER_SIZE
+        )
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(
+            settings, 'RECIPE_VIEW_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL
+        )
+        self._events = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, recipe_id, user_id=None, viewed_at=None):
+        """Queue a single view; flushes when the buffer is full or stale."""
+        event = (recipe_id, user_id, viewed_at or timezone.now())
+        with self._lock:
+            self._events.append(event)
+            due = len(self._events) >= self.max_events
+        if due or self.is_stale():
+            self.flush()
+
+    def is_stale(self):
+        return bool(self._events) and time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self):
+        """Write every buffered event. Returns the number of views written."""
+        with self._lock:
+            events, self._events = self._events, []
+            self._last_flush = time.monotonic()
+        if not events:
+            return 0
+        try:
+            return write_views(events)
+        except Exception:
+            logger.exception("Failed to flush %d recipe views", len(events))
+            with self._lock:
+                # Keep the events for the next attempt, but never grow without bound
+                limit = self.max_events * 10
+                self._events = (events + self._events)[-limit:]
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+
+
+def write_views(events):
+    """Persist (recipe_id, user_id, viewed_at) events in one transaction."""
+    from recipeApp import trending
+    from recipeApp.models import Recipe, RecipeView
+
+    # Recipes can be deleted while their views sit in the buffer
+    recipe_ids = {recipe_id for recipe_id, _, _ in events}
+    existing = set(Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', flat=True))
+    events = [event for event in events if event[0] in existing]
+    if not events:
+        return 0
+
+    counts = Counter(recipe_id for recipe_id, _, _ in events)
+    with transaction.atomic():
+        RecipeView.objects.bulk_create([
+            RecipeView(recipe_id=recipe_id, user_id=user_id, viewed_at=viewed_at)
+            for recipe_id, user_id, viewed_at in events
+        ])
+        for recipe_id, count in counts.items():
+            Recipe.objects.filter(pk=recipe_id).update(view_count=F('view_count') + count)
+        trending.add_views(events)
+    return len(events)
+
+
+view_buffer = ViewBuffer()
+
+
+def record_view(recipe, user=None):
+    """Queue a view of ``recipe`` (a Recipe or its id) by ``user`` (anonymous when None)."""
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    view_buffer.record(getattr(recipe, 'pk', recipe), user_id)
+
+
+def _flush_if_stale(**kwargs):
+    if view_buffer.is_stale():
+        view_buffer.flush()
+
+
+def _flush_on_exit():
+    try:
+        view_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush recipe views at shutdown")
+
+
+# Quiet periods are covered by checking the buffer's age after each request,
+# and whatever is left is written when the worker process exits.
+request_finished.connect(_flush_if_stale, dispatch_uid='recipeApp.tracking.flush_if_stale')
+atexit.register(_flush_on_exit)
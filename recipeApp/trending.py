@@ -0,0 +1,151 @@
+"""
+Trending recipes.
+
+Each view adds 2 ** ((viewed_at - epoch) / half_life) to the recipe's score,
+so a score is the exponentially decayed view count scaled by a factor that is
+the same for every recipe. Ranking therefore needs no time arithmetic: the
+top N is one indexed query on (facet, value, -score). Scores are updated with
+F() increments when buffered views are flushed, and `refresh_trending`
+periodically moves the epoch forward to keep the numbers small and drop
+recipes that have gone cold.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from recipeApp.models import Recipe, RecipeViewHourly, TrendingEpoch, TrendingScore
+
+# Move the epoch forward once scores have grown by 2 ** REBASE_AFTER
+REBASE_AFTER = 32
+
+
+def half_life():
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24))
+
+
+def window():
+    return timedelta(days=getattr(settings, 'TRENDING_WINDOW_DAYS', 7))
+
+
+def weight(moment, epoch):
+    return 2 ** ((moment - epoch) / half_life())
+
+
+def get_epoch():
+    return TrendingEpoch.objects.get_or_create(pk=1)[0]
+
+
+def facet_keys(recipe):
+    """(facet, value) pairs a recipe is ranked under."""
+    keys = [(TrendingScore.FACET_ALL, '')]
+    if recipe.cuisine:
+        keys.append((TrendingScore.FACET_CUISINE, recipe.cuisine))
+    for tag in recipe.get_tag_choices_list():
+        keys.append((TrendingScore.FACET_TAG, tag))
+    return keys
+
+
+def sync_facets(recipe):
+    """Make the recipe's score rows match its current cuisine and tags."""
+    rows = {(row.facet, row.value): row for row in TrendingScore.objects.filter(recipe=recipe)}
+    wanted = set(facet_keys(recipe))
+    overall = rows.get((TrendingScore.FACET_ALL, ''))
+    score = overall.score if overall else 0
+
+    stale = [row.pk for key, row in rows.items() if key not in wanted]
+    if stale:
+        TrendingScore.objects.filter(pk__in=stale).delete()
+    TrendingScore.objects.bulk_create([
+        TrendingScore(recipe=recipe, facet=facet, value=value, score=score)
+        for facet, value in wanted if (facet, value) not in rows
+    ])
+
+
+def add_views(events):
+    """Add (recipe_id, user_id, viewed_at) events to the recipes' scores."""
+    if not events:
+        return
+    with transaction.atomic():
+        epoch = get_epoch()
+        if weight(timezone.now(), epoch.epoch) > 2 ** REBASE_AFTER:
+            epoch = rebase()
+
+        deltas = defaultdict(float)
+        for recipe_id, _, viewed_at in events:
+            deltas[recipe_id] += weight(viewed_at, epoch.epoch)
+
+        missing = []
+        for recipe_id, delta in deltas.items():
+            if not TrendingScore.objects.filter(recipe_id=recipe_id).update(score=F('score') + delta):
+                missing.append(recipe_id)
+        for recipe in Recipe.objects.filter(pk__in=missing):
+            sync_facets(recipe)
+            TrendingScore.objects.filter(recipe=recipe).update(score=deltas[recipe.pk])
+
+
+def floor(epoch, now=None):
+    """Score of a single view at the edge of the trending window."""
+    return weight((now or timezone.now()) - window(), epoch)
+
+
+def rebase(now=None):
+    """Re-express all scores against ``now`` and drop those below the floor."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        epoch = TrendingEpoch.objects.select_for_update().get_or_create(pk=1)[0]
+        factor = weight(epoch.epoch, now)
+        TrendingScore.objects.update(score=F('score') * factor)
+        TrendingScore.objects.filter(score__lt=floor(now, now)).delete()
+        epoch.epoch = now
+        epoch.save()
+    return epoch
+
+
+def rebuild(now=None):
+    """Recompute every score from the hourly view rollup."""
+    now = now or timezone.now()
+    since = now - window()
+    scores = defaultdict(float)
+    rollups = RecipeViewHourly.objects.filter(bucket__gte=since).values_list('recipe_id', 'bucket', 'views')
+    for recipe_id, bucket, views in rollups.iterator():
+        # Count a bucket's views at its midpoint
+        scores[recipe_id] += views * weight(bucket + timedelta(minutes=30), now)
+
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingEpoch.objects.update_or_create(pk=1, defaults={'epoch': now})
+        rows = []
+        for recipe in (
+            Recipe.objects.filter(pk__in=list(scores)).only('pk', 'cuisine').prefetch_related('tag_links__tag')
+        ):
+            rows.extend(
+                TrendingScore(recipe=recipe, facet=facet, value=value, score=scores[recipe.pk])
+                for facet, value in facet_keys(recipe)
+            )
+        TrendingScore.objects.bulk_create(rows, batch_size=1000)
+    return len(scores)
+
+
+def top_recipes(limit=6, cuisine=None, tag=None):
+    """Top trending recipes overall, or within a cuisine or tag."""
+    if tag:
+        facet, value = TrendingScore.FACET_TAG, tag.strip().lower()
+    elif cuisine:
+        facet, value = TrendingScore.FACET_CUISINE, cuisine
+    else:
+        facet, value = TrendingScore.FACET_ALL, ''
+    epoch = get_epoch().epoch
+    return (
+        Recipe.objects.filter(
+            trending_scores__facet=facet,
+            trending_scores__value=value,
+            trending_scores__score__gte=floor(epoch),
+        )
+        .select_related('author__user')
+        .prefetch_related('tag_links__tag')
+        .order_by('-trending_scores__score')[:limit]
+    )
@@ -1,11 +1,18 @@
 from django.shortcuts import render,redirect, get_object_or_404
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
-from django.core.paginator import Paginator
-from recipeApp.models import Recipe, RecipeView
+from recipeApp import conditional, page_cache
+from recipeApp.facets import apply_filters, facet_counts, parse_filters
+from recipeApp.models import Recipe, Tag
+from recipeApp.related import related_recipes as related_recipes_for
+from recipeApp.pagination import DEFAULT_ORDERING, InvalidCursor, paginate
+from recipeApp.search import RANKED_ORDERING, attach_snippets, fts_enabled, search_recipes
+from recipeApp.tracking import record_view
 from recipeApp.forms import RecipeForm
+from App.query_budget import query_budget
 from reviewApp.models import Review, SavedRecipe
 from reviewApp.forms import ReviewForm
 from userApp.models import UserProfile
@@ -36,11 +43,6 @@ def create_recipe(request):
         if form.is_valid():
             recipe = form.save(commit=False)
             recipe.author = profile
-            
-            # Handle tags
-            selected_tags = request.POST.getlist('tags')
-            recipe.tags = ','.join(selected_tags)
-            
             recipe.save()
             messages.success(request, 'Recipe shared successfully!')
             return redirect('recipe_detail', slug=recipe.slug)
@@ -70,11 +72,6 @@ def edit_recipe(request, slug):
             if form.is_valid():
                 recipe = form.save(commit=False)
                 recipe.author = UserProfile.objects.get(user=request.user)
-                
-                # Handle tags
-                selected_tags = request.POST.getlist('tags')
-                recipe.tags = ','.join(selected_tags)
-                
                 recipe.save()
                 messages.success(request, 'Recipe updated successfully!')
                 return redirect('recipe_detail', slug=recipe.slug)
@@ -82,8 +79,7 @@ def edit_recipe(request, slug):
                 messages.error(request, 'Please correct the errors below.')
         else:
             form = RecipeForm(instance=recipe)
-            # split the stored tags into a list for the form
-            recipe_tags = recipe.tags.split(',') if recipe.tags else []
+        recipe_tags = form['tags'].value() or []
 
         context = {
             'recipe': recipe,
@@ -117,21 +113,42 @@ def delete_recipe(request, slug):
         return redirect('index')
     
 
+@query_budget(10)
 def recipe_detail(request, slug):
     """Display detailed view of a single recipe"""
-    recipe = get_object_or_404(Recipe, slug=slug)
+    recipe_id = page_cache.recipe_id_for(slug)
+    if recipe_id is None:
+        raise Http404('No Recipe matches the given query.')
 
-    # Track views
-    try:
-        if request.user.is_authenticated:
-            RecipeView.objects.create(recipe=recipe, user=request.user)
-        else:
-            RecipeView.objects.create(recipe=recipe, user=None)
-        # keep a cached count similar to tests' expectation
-        recipe.view_count = recipe.view_count + 1
-        recipe.save(update_fields=["view_count", "updated_at"])
-    except Exception:
-        pass
+    # Track views (buffered, written in batches), cached page or not
+    record_view(recipe_id, request.user)
+
+    # Anonymous viewers all get the same page, so it can be validated by
+    # its content version alone: a 304 before anything is rendered
+    etag = None
+    cached = page_cache.enabled()
+    if cached and not request.user.is_authenticated:
+        etag = page_cache.etag(recipe_id)
+        response = conditional.not_modified(request, etag)
+        if response is not None:
+            return conditional.set_validators(response, etag)
+
+    # The shared part of the page is cached per content version; only the
+    # viewer's fragments are rendered on a hit
+    key = page_cache.page_key(slug, recipe_id) if cached else None
+    page = page_cache.get_page(key) if cached else None
+    if page is None:
+        page = _render_recipe_page(request, recipe_id)
+        if cached:
+            page_cache.set_page(key, page)
+
+    body = page_cache.fill(page['body'], _render_viewer_fragments(request, page['recipe']))
+    return conditional.set_validators(HttpResponse(body), etag)
+
+
+def _render_recipe_page(request, recipe_id):
+    """Render everything on the recipe page that is the same for every viewer."""
+    recipe = get_object_or_404(Recipe.objects.select_related('author__user'), pk=recipe_id)
 
     # Fetch all reviews for this recipe
     reviews = recipe.reviews.select_related('user__userprofile').all()
@@ -139,26 +156,45 @@ def recipe_detail(request, slug):
     # Image url in the view
     image_url = request.build_absolute_uri(recipe.image.url) if recipe.image else None
     
-    # Get related recipes (same tags or author)
-    related_recipes = Recipe.objects.filter(
-        Q(tags__icontains=recipe.tags) | Q(author=recipe.author)
-    ).exclude(pk=recipe.pk).distinct()[:4]
-    
-    # Check if user has saved this recipe
+    # Get related recipes (precomputed neighbours: shared tags, cuisine, difficulty, author)
+    related_recipes = related_recipes_for(recipe, limit=4)
+
+    # Prepare context for rendering the template
+    context = {
+        'recipe': recipe,
+        'related_recipes': related_recipes,
+        'reviews': reviews,
+        'total_reviews': recipe.rating_count,
+        'tag_choices': TAG_CHOICES,
+        'cuisine_choices': CUISINE_CHOICES,
+        'average_rating': recipe.rating_avg,
+        'avg_rating': recipe.rating_avg,
+        'image_url': image_url,
+    }
+    return {
+        'body': render_to_string('recipes/recipe_detail.html', context),
+        'recipe': {'id': recipe.pk, 'slug': recipe.slug, 'author_id': recipe.author_id},
+    }
+
+
+def _render_viewer_fragments(request, recipe):
+    """Render the navigation, search box, buttons, review form and own-review highlight for the current viewer."""
+    user = request.user
+    is_author = False
     is_saved = False
-    if request.user.is_authenticated:
-        is_saved = SavedRecipe.objects.filter(
-            user=request.user, 
-            recipe=recipe
-        ).exists()
 
     # User review and editing state
     user_review = None
     has_reviewed = False
     is_editing = False
     
-    if request.user.is_authenticated:
-        user_review = Review.objects.filter(user=request.user, recipe=recipe).first()
+    if user.is_authenticated:
+        is_author = UserProfile.objects.filter(user=user, pk=recipe['author_id']).exists()
+
+        # Check if user has saved this recipe
+        is_saved = SavedRecipe.objects.filter(user=user, recipe_id=recipe['id']).exists()
+
+        user_review = Review.objects.filter(user=user, recipe_id=recipe['id']).first()
         has_reviewed = user_review is not None
         
         # Check if user is in edit mode
@@ -178,105 +214,113 @@ def recipe_detail(request, slug):
         }
     review_form = ReviewForm(initial=initial_data)
 
-    # Prepare context for rendering the template
     context = {
         'recipe': recipe,
-        'related_recipes': related_recipes,
+        'is_author': is_author,
         'is_saved': is_saved,
-        'reviews': reviews,
         'has_reviewed': has_reviewed,
         'user_review': user_review,
-        'total_reviews': reviews.count(),
         'is_editing': is_editing,
         'review_form': review_form,
-        'tag_choices': TAG_CHOICES,
-        'cuisine_choices': CUISINE_CHOICES,
-        'average_rating': recipe.average_rating,
-        'image_url': image_url,
     }
-    
-    return render(request, 'recipes/recipe_detail.html', context)
+    return {
+        'my_review': render_to_string('recipes/partials/detail_my_review.html', context, request=request),
+        'search': render_to_string('recipes/partials/detail_search.html', context, request=request),
+        'nav': render_to_string('recipes/partials/detail_nav.html', context, request=request),
+        'actions': render_to_string('recipes/partials/detail_actions.html', context, request=request),
+        'review_form': render_to_string('recipes/partials/detail_review_form.html', context, request=request),
+    }
 
-def recipe_list_view(request):
-    """
-    Function-based view for recipe list with backend filtering
-    """
-    recipes = Recipe.objects.all().order_by('-created_at')
+def _cursor_query(params, cursor):
+    """The current query string pointing at another page, or None."""
+    if cursor is None:
+        return None
+    params = params.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return params.urlencode()
 
-    # Get search query and tag filter(s) from GET params
-    query = request.GET.get('q', '').strip()
-    selected_tags = [t for t in request.GET.getlist('tag') if t]
-    cuisine = request.GET.get('cuisine', '').strip()
-    difficulty = request.GET.get('difficulty', '').strip()
-    prep_time = request.GET.get('prep_time', '').strip()
 
-    # Filter by search query (title, ingredients, instructions, tags)
-    if query:
-        recipes = recipes.filter(
-            Q(title__icontains=query) |
-            Q(ingredients__icontains=query) |
-            Q(instructions__icontains=query) |
-            Q(tags__icontains=query)
-        )
+def _facet_options(params, filters, facets):
+    """Facet counts plus, per option, whether it is selected and the query string that toggles it."""
+    params = params.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    params.setlist('tag', filters['tags'])
 
-    # Determine valid tags present in current recipe set
-    def extract_tags(qs):
-        tag_set = set()
-        for r in qs.only('tags'):
-            if r.tags:
-                for t in r.tags.split(','):
-                    t = t.strip()
-                    if t:
-                        tag_set.add(t)
-        return tag_set
-
-    available_tags = extract_tags(recipes)
+    def toggle(name, value):
+        toggled = params.copy()
+        if name == 'tag':
+            selected = value in filters['tags']
+            toggled.setlist('tag', [t for t in filters['tags'] if t != value] if selected else filters['tags'] + [value])
+        else:
+            selected = filters[name] == value
+            if selected:
+                toggled.pop(name, None)
+            else:
+                toggled[name] = str(value)
+        return selected, toggled.urlencode()
 
-    # Apply AND logic for selected tags, ignoring invalid ones completely
-    valid_selected_tags = [t for t in selected_tags if t in available_tags]
-    if valid_selected_tags:
-        for t in valid_selected_tags:
-            recipes = recipes.filter(tags__icontains=t)
+    options = {}
+    for group, name in (('tags', 'tag'), ('cuisine', 'cuisine'), ('difficulty', 'difficulty'), ('prep_time', 'prep_time')):
+        options[group] = []
+        for facet in facets[group]:
+            selected, query = toggle(name, facet['value'])
+            options[group].append(dict(facet, selected=selected, query=query))
+    return options
 
-    # Filter by cuisine
-    if cuisine:
-        recipes = recipes.filter(cuisine=cuisine)
 
-    # Filter by difficulty
-    if difficulty:
-        recipes = recipes.filter(difficulty=difficulty)
+@query_budget(5)
+def recipe_list_view(request):
+    """
+    Function-based view for recipe list with backend filtering
+    """
+    # Search query (full-text, best match first), tags (AND, or OR with
+    # tag_mode=any), cuisine, difficulty and max prep_time from GET params
+    filters = parse_filters(request.GET)
+    query = filters['q']
+    prep_time = request.GET.get('prep_time', '').strip()
 
-    # Filter by prep_time (less than or equal to user input)
-    if prep_time.isdigit():
-        recipes = recipes.filter(prep_time__lte=int(prep_time))
+    # Ignore tags that no recipe matching the search carries
+    if filters['tags']:
+        searched = search_recipes(Recipe.objects.all(), query) if query else Recipe.objects.all()
+        available_tags = set(
+            Tag.objects.filter(recipe_links__recipe__in=searched.values('pk'), name__in=filters['tags'])
+            .values_list('name', flat=True)
+        )
+        filters['tags'] = [t for t in filters['tags'] if t in available_tags]
+    valid_selected_tags = filters['tags']
 
+    recipes = apply_filters(Recipe.objects.select_related('author__user').prefetch_related('tag_links__tag'), filters)
+    facets = facet_counts(filters)
 
-    # Pagination (disable when tag filters active). Otherwise, ensure invalid page falls back to 1
-    paginator = Paginator(recipes, 10)
+    # Keyset pagination: ?cursor= continues from a row, so deep pages cost the
+    # same as the first. An invalid cursor falls back to the first page.
+    ordering = RANKED_ORDERING if query and fts_enabled() else DEFAULT_ORDERING
     try:
-        page_number = int(request.GET.get('page', '1'))
-    except ValueError:
-        page_number = 1
-    if valid_selected_tags:
-        page_obj = recipes
-        is_paginated = False
-    else:
-        if page_number > paginator.num_pages:
-            page_number = 1
-        page_obj = paginator.get_page(page_number)
-        is_paginated = page_obj.has_other_pages()
+        page_obj = paginate(recipes, request.GET.get('cursor'), per_page=10, ordering=ordering)
+    except InvalidCursor:
+        page_obj = paginate(recipes, per_page=10, ordering=ordering)
+
+    # Highlighted snippets for the recipes being shown
+    if query:
+        page_obj.object_list = attach_snippets(page_obj.object_list, query)
 
     context = {
         'recipes': page_obj,
         'recipe_list': page_obj,  # For tests expecting 'recipe_list' in context
-        'total_recipes': recipes.count(),
+        'total_recipes': facets['total'],
         'page_obj': page_obj,
-        'is_paginated': is_paginated,
+        'is_paginated': page_obj.has_other_pages(),
+        'next_page_query': _cursor_query(request.GET, page_obj.next_cursor),
+        'previous_page_query': _cursor_query(request.GET, page_obj.previous_cursor),
         'search_query': query,
         'active_tag': valid_selected_tags[0] if len(valid_selected_tags) == 1 else '',
         'selected_tags': valid_selected_tags,
-        'selected_cuisine': cuisine,
-        'selected_difficulty': difficulty,
+        'tag_mode': filters['tag_mode'],
+        'facets': _facet_options(request.GET, filters, facets),
+        'selected_cuisine': filters['cuisine'],
+        'selected_difficulty': filters['difficulty'],
         'selected_prep_time': prep_time,
         'CUISINE_CHOICES': Recipe.CUISINE_CHOICES,
         'DIFFICULTY_CHOICES': Recipe.DIFFICULTY_CHOICES,
@@ -0,0 +1,33 @@
+"""
+Fast read path for the review and saved-recipe list APIs: the output of
+ReviewSerializer and SavedRecipeSerializer built straight from .values()
+rows, without a model instance per row (see recipeApp.api.rows).
+"""
+from recipeApp.models import Recipe
+
+
+def review_dicts(queryset):
+    """ReviewSerializer's output for ``queryset``, in its order."""
+    rows = queryset.values_list('recipe_id', 'user_id', 'rating', 'comment')
+    return [
+        {'recipe': recipe_id, 'user': user_id, 'rating': rating, 'comment': comment}
+        for recipe_id, user_id, rating, comment in rows
+    ]
+
+
+def saved_recipe_dicts(queryset, request=None):
+    """SavedRecipeSerializer's output for ``queryset``, in its order."""
+    storage = Recipe._meta.get_field('image').storage
+    absolute = request.build_absolute_uri if request is not None else str
+    rows = queryset.select_related(None).values_list(
+        'user_id', 'recipe_id', 'recipe__title', 'recipe__image', 'recipe__slug',
+    )
+    return [
+        {
+            'user': user_id,
+            'recipe': {
+                'id': recipe_id, 'title': title, 'image': absolute(storage.url(image)) if image else None, 'slug': slug,
+            },
+        }
+        for user_id, recipe_id, title, image, slug in rows
+    ]
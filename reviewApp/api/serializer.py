@@ -1,12 +1,17 @@
 from rest_framework import serializers
+from App.api_fields import Expansion, Load, SparseFieldsMixin
 from recipeApp.models import Recipe
 from reviewApp.models import  Review, SavedRecipe
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ['recipe', 'user', 'rating', 'comment']
         read_only_fields = ['created_at']
+        expandable = {
+            'recipe': Expansion('reviewApp.api.serializer.RecipeMiniSerializer', Load(columns=['recipe'], select=['recipe'])),
+            'user': Expansion('userApp.api.serializer.UserSummarySerializer', Load(columns=['user'], select=['user'])),
+        }
 
 class RecipeMiniSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
@@ -20,12 +25,20 @@ class RecipeMiniSerializer(serializers.ModelSerializer):
         if obj.image:
             return request.build_absolute_uri(obj.image.url)
         return None
-class SavedRecipeSerializer(serializers.ModelSerializer):
+class SavedRecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     recipe = RecipeMiniSerializer(read_only=True) 
     class Meta:
         model = SavedRecipe
         fields = ['user', 'recipe']
         read_only_fields = ['saved_at']
+        field_loads = {'recipe': Load(columns=['recipe'], select=['recipe'])}
+        expandable = {
+            'recipe': Expansion(
+                'recipeApp.api.serializer.RecipeSerializer',
+                Load(columns=['recipe'], select=['recipe__author__user'], prefetch=['recipe__tag_links__tag']),
+            ),
+            'user': Expansion('userApp.api.serializer.UserSummarySerializer', Load(columns=['user'], select=['user'])),
+        }
 class ReviewCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
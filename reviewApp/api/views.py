@@ -1,13 +1,17 @@
 from django.shortcuts import get_object_or_404
 from reviewApp.models import Review, SavedRecipe
 from recipeApp.models import Recipe
+from reviewApp.api.rows import review_dicts, saved_recipe_dicts
 from reviewApp.api.serializer import ReviewSerializer, SavedRecipeSerializer, ReviewCreateUpdateSerializer
 from rest_framework import viewsets, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from App.api_fields import SparseQuerysetMixin
+from App.query_budget import query_budget
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+@query_budget(2)
+class ReviewViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
@@ -28,38 +32,38 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if recipe_slug:
             queryset = queryset.filter(recipe__slug=recipe_slug)
         return queryset
-class SavedRecipeViewSet(viewsets.ModelViewSet):
+@query_budget(4)
+class SavedRecipeViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = SavedRecipeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return SavedRecipe.objects.filter(user=self.request.user)
+        return SavedRecipe.objects.filter(user=self.request.user).select_related('recipe')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
+@query_budget(3)
 class UserSavedRecipesAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        saved_recipes = SavedRecipe.objects.filter(user=request.user)
-        serializer = SavedRecipeSerializer(saved_recipes, many=True)
-        return Response(serializer.data)
+        # SavedRecipeSerializer's output, built from .values() rows
+        return Response(saved_recipe_dicts(SavedRecipe.objects.filter(user=request.user), request))
+@query_budget(2)
 class RecipeReviewsAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, slug):
         recipe = get_object_or_404(Recipe, slug=slug)
-        reviews = Review.objects.filter(recipe=recipe)
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        # ReviewSerializer's output, built from .values() rows
+        return Response(review_dicts(Review.objects.filter(recipe=recipe)))
+@query_budget(3)
 class UserReviewsAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        reviews = Review.objects.filter(user=request.user)
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        return Response(review_dicts(Review.objects.filter(user=request.user)))
     
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReviewappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviewApp'
+
+    def ready(self):
+        # Keep Recipe rating aggregates in sync with reviews
+        from reviewApp import signals  # noqa: F401
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from recipeApp.models import Recipe
+from reviewApp.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized rating aggregates on every recipe, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Recipes per UPDATE/transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        max_id = Recipe.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        updated = 0
+        for start in range(0, max_id, chunk_size):
+            with transaction.atomic():
+                updated += recompute_ratings(Recipe.objects.filter(id__gt=start, id__lte=start + chunk_size))
+        self.stdout.write(self.style.SUCCESS(f'Recomputed ratings for {updated} recipes.'))
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from recipeApp.models import Recipe
@@ -15,6 +15,16 @@ class Review(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.recipe.title} ({self.rating}/5)"
+
+    # The Recipe rating aggregates are updated by signal handlers; keep them
+    # in the same transaction as the review row.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
     
     class Meta:
         unique_together = ['recipe', 'user']
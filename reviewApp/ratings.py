@@ -0,0 +1,37 @@
+"""
+Denormalized review aggregates on Recipe (rating_sum, rating_count, rating_avg).
+"""
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from recipeApp.models import Recipe
+from reviewApp.models import Review
+
+
+def _average(total, count):
+    return Coalesce(Cast(total, FloatField()) / NullIf(count, 0), Value(0.0))
+
+
+def adjust_rating(recipe_id, delta_sum, delta_count):
+    """
+    Apply a review change to a recipe's aggregates in one atomic UPDATE. The
+    rating is part of the exported recipe, so updated_at moves with it; so
+    does an edit that keeps the rating, as the recipe's reviews are served
+    with it (?expand=reviews).
+    """
+    total = F('rating_sum') + delta_sum
+    count = F('rating_count') + delta_count
+    Recipe.objects.filter(pk=recipe_id).update(
+        rating_sum=total,
+        rating_count=count,
+        rating_avg=_average(total, count),
+        updated_at=timezone.now(),
+    )
+
+
+def recompute_ratings(recipes):
+    """Recompute the aggregates of ``recipes`` from their reviews in one UPDATE."""
+    reviews = Review.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    total = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0)
+    count = Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0)
+    return recipes.update(rating_sum=total, rating_count=count, rating_avg=_average(total, count))
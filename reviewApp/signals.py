@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from recipeApp import page_cache
+from reviewApp.models import Review
+from reviewApp.ratings import adjust_rating
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk and not instance._state.adding:
+        instance._previous = Review.objects.filter(pk=instance.pk).values_list('recipe_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_recipe_page(sender, instance, **kwargs):
+    """The recipe page shows its reviews; runs before _previous is cleared below."""
+    previous = getattr(instance, '_previous', None)
+    page_cache.invalidate(instance.recipe_id, previous[0] if previous else None)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        adjust_rating(instance.recipe_id, instance.rating, 1)
+    elif previous[0] != instance.recipe_id:
+        adjust_rating(previous[0], -previous[1], -1)
+        adjust_rating(instance.recipe_id, instance.rating, 1)
+    else:
+        adjust_rating(instance.recipe_id, instance.rating - previous[1], 0)
+    instance._previous = None
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    adjust_rating(instance.recipe_id, -instance.rating, -1)
@@ -1,7 +1,10 @@
+from io import StringIO
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from reviewApp.models import Review, SavedRecipe
 from recipeApp.models import Recipe
+from userApp.models import UserProfile
 
 class ReviewModelTest(TestCase):
     
@@ -109,3 +112,48 @@ class SavedRecipeModelTest(TestCase):
         saved_recipes = SavedRecipe.objects.all()
         self.assertEqual(saved_recipes[0], saved_recipe2)
         self.assertEqual(saved_recipes[1], saved_recipe1)
+
+
+class RecipeRatingAggregateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rater', password='testpass123')
+        self.other_user = User.objects.create_user(username='critic', password='testpass123')
+        profile = UserProfile.objects.create(user=self.user)
+        self.recipe = Recipe.objects.create(
+            author=profile, title='Misir Wot', description='Red lentil stew',
+            ingredients='lentils, berbere, onion', instructions='Simmer lentils with berbere.',
+        )
+        self.other_recipe = Recipe.objects.create(
+            author=profile, title='Gomen', description='Collard greens',
+            ingredients='collards, garlic, ginger', instructions='Braise collards.',
+        )
+
+    def assertAggregates(self, recipe, total, count, avg):
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count), (total, count))
+        self.assertAlmostEqual(recipe.rating_avg, avg)
+
+    def test_create_update_delete_keep_aggregates_in_sync(self):
+        review = Review.objects.create(recipe=self.recipe, user=self.user, rating=5, comment='Great')
+        Review.objects.create(recipe=self.recipe, user=self.other_user, rating=2, comment='Meh')
+        self.assertAggregates(self.recipe, 7, 2, 3.5)
+
+        review.rating = 3
+        review.save()
+        self.assertAggregates(self.recipe, 5, 2, 2.5)
+
+        review.recipe = self.other_recipe
+        review.save()
+        self.assertAggregates(self.recipe, 2, 1, 2.0)
+        self.assertAggregates(self.other_recipe, 3, 1, 3.0)
+
+        Review.objects.filter(recipe=self.recipe).delete()
+        self.assertAggregates(self.recipe, 0, 0, 0)
+
+    def test_recompute_command_repairs_drift(self):
+        Review.objects.create(recipe=self.recipe, user=self.user, rating=4, comment='Good')
+        Recipe.objects.update(rating_sum=0, rating_count=0, rating_avg=0)
+
+        call_command('recompute_ratings', chunk_size=1, stdout=StringIO())
+        self.assertAggregates(self.recipe, 4, 1, 4.0)
+        self.assertAggregates(self.other_recipe, 0, 0, 0)
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+
+from recipeApp.models import Recipe
+from reviewApp.api import rows
+from reviewApp.api.serializer import ReviewSerializer, SavedRecipeSerializer
+from reviewApp.models import Review, SavedRecipe
+from userApp.models import UserProfile
+
+
+class ReviewRowsParityTests(TestCase):
+    """reviewApp.api.rows must give exactly what the serializers give."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        profile = UserProfile.objects.create(user=User.objects.create_user(username='chef'))
+        for i, image in enumerate(['', 'recipe_images/shiro.jpg']):
+            recipe = Recipe.objects.create(
+                author=profile, title=f'Shiro {i}', description='d', ingredients='i', instructions='s', image=image,
+            )
+            Review.objects.create(recipe=recipe, user=self.user, rating=i + 3, comment=f'comment {i}')
+            SavedRecipe.objects.create(user=self.user, recipe=recipe)
+        self.request = RequestFactory().get('/api/review/saved/')
+
+    def test_reviews(self):
+        reviews = Review.objects.filter(user=self.user)
+        self.assertEqual(rows.review_dicts(reviews), ReviewSerializer(reviews, many=True).data)
+
+    def test_saved_recipes(self):
+        saved = SavedRecipe.objects.filter(user=self.user).select_related('recipe')
+        expected = SavedRecipeSerializer(saved, many=True, context={'request': self.request}).data
+        self.assertEqual(rows.saved_recipe_dicts(saved, self.request), expected)
+        self.assertEqual(rows.saved_recipe_dicts(saved, self.request)[0]['recipe']['image'],
+                         'http://testserver/media/recipe_images/shiro.jpg')
@@ -9,6 +9,18 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'first_name', 'last_name', 'email', 'date_joined', 'is_active']
         read_only_fields = ['id', 'date_joined', 'is_active']
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Public view of a user, for nesting in other resources - no email or account state"""
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'name']
+        read_only_fields = fields
+
+    def get_name(self, obj):
+        return obj.get_full_name() or obj.username
+
 class UserCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new users"""
     password = serializers.CharField(write_only=True, min_length=8)
@@ -54,6 +66,30 @@ class UserProfileSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.profile_image.url)
         return None
 
+class PublicProfileSerializer(serializers.ModelSerializer):
+    """Public view of a profile, for nesting in other resources - the user in brief, no email"""
+    username = serializers.CharField(source='user.username', read_only=True)
+    name = serializers.SerializerMethodField()
+    favorite_cuisines_list = serializers.SerializerMethodField()
+    profile_image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserProfile
+        fields = ['id', 'username', 'name', 'bio', 'favorite_cuisines_list', 'profile_image_url']
+        read_only_fields = fields
+
+    def get_name(self, obj):
+        return obj.user.get_full_name() or obj.user.username
+
+    def get_favorite_cuisines_list(self, obj):
+        return obj.get_favorite_cuisines_list()
+
+    def get_profile_image_url(self, obj):
+        request = self.context.get('request')
+        if obj.profile_image and request:
+            return request.build_absolute_uri(obj.profile_image.url)
+        return None
+
 class UserProfileCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating UserProfile"""
     favorite_cuisines_list = serializers.ListField(
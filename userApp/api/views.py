@@ -3,6 +3,7 @@ from userApp.models import UserProfile
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from App.query_budget import query_budget
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from userApp.api.serializer import (
@@ -50,6 +51,7 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(2)
 class UserProfileViewSet(viewsets.ModelViewSet):
     """ViewSet for UserProfile model with proper permissions"""
     queryset = UserProfile.objects.select_related('user').all()
@@ -6,6 +6,7 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from userApp.models import UserProfile
 from recipeApp.models import Recipe
+from App.query_budget import query_budget
 from userApp.forms import SignUpForm, UserProfileForm
 
 # Create your views here.
@@ -111,6 +112,7 @@ def profile_create(request):
     }
     return render(request, 'profile/Create_Profile.html', context)
 
+@query_budget(6)
 def profile_detail(request, username):
     try:
         profile = UserProfile.objects.select_related('user').get(user__username=username)